@@ -0,0 +1,197 @@
+from functools import cache
+from operator import methodcaller
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, fields as drf_fields, relations, serializers
+from rest_framework.settings import api_settings
+
+from account.bulk import chunked
+
+# Field types whose to_representation is a no-op for the values the database returns
+_IDENTITY = (drf_fields.CharField, drf_fields.IntegerField, drf_fields.BooleanField, drf_fields.ReadOnlyField)
+_CASTS = {drf_fields.FloatField: float}
+# Temporal fields rendered as ISO 8601; with USE_TZ off DRF just calls isoformat()
+_TEMPORAL = {
+    drf_fields.DateTimeField: 'DATETIME_FORMAT',
+    drf_fields.DateField: 'DATE_FORMAT',
+    drf_fields.TimeField: 'TIME_FORMAT',
+}
+_isoformat = methodcaller('isoformat')
+# Owner ids per query when loading a nested many=True relation
+RELATION_BATCH = 5000
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _related_order(model):
+    # A prefetch_related() of the relation sorts by the related model's default
+    # ordering; without one the database order is arbitrary, so use the primary key
+    return model._meta.ordering or [model._meta.pk.name]
+
+
+def _model_field(model, attrs):
+    """The concrete model field behind a dotted source, following forward relations."""
+    field = None
+    for i, attr in enumerate(attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if i < len(attrs) - 1:
+            if not (field.many_to_one or field.one_to_one):
+                return None
+            model = field.related_model
+    return field
+
+
+def _mapper(field):
+    if isinstance(field, _IDENTITY):
+        return None
+    setting = _TEMPORAL.get(type(field))
+    if setting and not settings.USE_TZ:
+        output_format = getattr(field, 'format', getattr(api_settings, setting))
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return _isoformat
+    return _CASTS.get(type(field), field.to_representation)
+
+
+class CompiledSerializer:
+    """Read-only fast path for a ModelSerializer.
+
+    Rows come from queryset.values_list() over every column the serializer
+    reads, including the columns of nested one-to-one/foreign-key serializers,
+    and are turned into dicts by a list of precomputed (key, kind, column,
+    mapper) steps. Nested many=True serializers over a many-to-many or reverse
+    foreign key are loaded with one extra query per relation for the whole
+    batch, in the related model's Meta.ordering like prefetch_related(). The
+    output is the same as serializer_class(instances, many=True).data.
+    """
+
+    def __init__(self, serializer, prefix=''):
+        self.model = serializer.Meta.model
+        pk_path = prefix + self.model._meta.pk.name
+        self.paths = [pk_path]
+        self.relations = []   # (owner pk path, key, lookup, CompiledSerializer)
+        steps = []            # (key, kind, path, payload)
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                raise Unsupported(key)
+            path = prefix + '__'.join(field.source_attrs)
+            model_field = _model_field(self.model, field.source_attrs)
+            if model_field is None:
+                raise Unsupported(key)
+
+            if isinstance(field, serializers.ListSerializer):
+                if not isinstance(field.child, serializers.ModelSerializer):
+                    raise Unsupported(key)
+                if model_field.many_to_many and not model_field.auto_created:
+                    lookup = model_field.related_query_name()
+                elif model_field.one_to_many or model_field.many_to_many:
+                    lookup = model_field.field.name
+                else:
+                    raise Unsupported(key)
+                self.relations.append((pk_path, key, lookup, CompiledSerializer(field.child)))
+                steps.append((key, 'many', pk_path, None))
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                raise Unsupported(key)
+
+            self.paths.append(path)
+            if isinstance(field, serializers.ModelSerializer):
+                nested = CompiledSerializer(field, prefix=path + '__')
+                self.paths += nested.paths
+                self.relations += nested.relations
+                steps.append((key, 'one', path, nested))
+            elif isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+                steps.append((key, 'value', path, None))
+            elif isinstance(field, drf_fields.FileField):
+                use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+                steps.append((key, 'file', path, model_field.storage if use_url else None))
+            elif isinstance(field, (relations.RelatedField, drf_fields.SerializerMethodField,
+                                    drf_fields.HiddenField, serializers.Serializer)):
+                raise Unsupported(key)
+            else:
+                steps.append((key, 'value', path, _mapper(field)))
+        self.paths = list(dict.fromkeys(self.paths))
+        self._steps = steps
+        if not prefix:
+            self._bind({path: i for i, path in enumerate(self.paths)})
+
+    def _bind(self, columns):
+        # Swap paths for tuple positions once the full column list is known
+        self.steps = []
+        for key, kind, path, payload in self._steps:
+            if kind == 'one':
+                payload._bind(columns)
+            self.steps.append((key, kind, columns[path], payload))
+        self.relation_columns = [(columns[path], key) for path, key, _, _ in self.relations]
+
+    def rows(self, queryset):
+        """The queryset as values_list() rows carrying every column this serializer needs."""
+        return queryset.prefetch_related(None).values_list(*self.paths)
+
+    def _related(self, rows, context):
+        # {(owner column, key): {owner id: [representations]}} for the whole batch
+        loaded = {}
+        for (column, key), (_, _, lookup, nested) in zip(self.relation_columns, self.relations):
+            ids = list(dict.fromkeys(row[column] for row in rows if row[column] is not None))
+            grouped = {}
+            for batch in chunked(ids, RELATION_BATCH):
+                # The owner id rides along as an extra last column
+                related = list(nested.model._default_manager.filter(**{f'{lookup}__in': batch})
+                               .order_by(*_related_order(nested.model)).values_list(*nested.paths, lookup))
+                for row, item in zip(related, nested.represent(related, context)):
+                    grouped.setdefault(row[-1], []).append(item)
+            loaded[(column, key)] = grouped
+        return loaded
+
+    def _build(self, row, loaded, request):
+        data = {}
+        for key, kind, column, payload in self.steps:
+            value = row[column]
+            if kind == 'value':
+                data[key] = value if payload is None or value is None else payload(value)
+            elif kind == 'many':
+                data[key] = loaded[(column, key)].get(value, [])
+            elif value is None:
+                data[key] = None
+            elif kind == 'one':
+                data[key] = payload._build(row, loaded, request)
+            elif not value or payload is None:
+                data[key] = value or None
+            else:
+                url = payload.url(value)
+                data[key] = request.build_absolute_uri(url) if request is not None else url
+        return data
+
+    def represent(self, rows, context=None):
+        """Dicts for a batch of rows from rows()."""
+        context = context or {}
+        loaded = self._related(rows, context) if self.relations else {}
+        request = context.get('request')
+        return [self._build(row, loaded, request) for row in rows]
+
+    def serialize(self, queryset, context=None):
+        return self.represent(list(self.rows(queryset)), context)
+
+
+@cache
+def compiled(serializer_class):
+    """The CompiledSerializer for serializer_class, or None if it uses fields the fast path cannot reproduce."""
+    try:
+        return CompiledSerializer(serializer_class())
+    except Unsupported:
+        return None
+
+
+def serialize_many(queryset, serializer_class, context=None):
+    """serializer_class(queryset, many=True).data, through the compiled path when there is one."""
+    fast = compiled(serializer_class)
+    if fast is None:
+        return serializer_class(queryset, many=True, context=context or {}).data
+    return fast.serialize(queryset, context)
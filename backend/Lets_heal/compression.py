@@ -0,0 +1,137 @@
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript')
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header; codings with q=0 are left out."""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    offered = (['br'] if brotli is not None else []) + ['gzip']
+    best = None
+    for coding in offered:
+        q = accepted.get(coding, accepted.get('*', 0))
+        # On a tie the first offered coding (brotli) wins
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._stream = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._stream.compress(data) + self._stream.flush()
+
+    def chunk(self, data):
+        # Sync flush so every chunk reaches the client as soon as it is produced
+        return self._stream.compress(data) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._stream.flush()
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._stream = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._stream.process(data) + self._stream.finish()
+
+    def chunk(self, data):
+        return self._stream.process(data) + self._stream.flush()
+
+    def finish(self):
+        return self._stream.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """gzip/brotli response compression negotiated from Accept-Encoding.
+
+    Bodies under settings.COMPRESSION_MIN_SIZE are sent as-is, as is anything
+    that is not JSON/text or already encoded. Streaming responses are compressed
+    chunk by chunk so they keep their time-to-first-byte.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', MIN_SIZE)
+
+    def _encoder(self, coding):
+        if coding == 'br':
+            return _Brotli(getattr(settings, 'COMPRESSION_BROTLI_QUALITY', BROTLI_QUALITY))
+        return _Gzip(getattr(settings, 'COMPRESSION_GZIP_LEVEL', GZIP_LEVEL))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if coding is None:
+            return response
+
+        encoder = self._encoder(coding)
+        if response.streaming:
+            content = response.streaming_content
+            if response.is_async:
+                async def compressed():
+                    async for chunk in content:
+                        yield encoder.chunk(chunk)
+                    yield encoder.finish()
+            else:
+                def compressed():
+                    for chunk in content:
+                        yield encoder.chunk(chunk)
+                    yield encoder.finish()
+            response.streaming_content = compressed()
+            del response.headers['Content-Length']
+        else:
+            body = encoder.compress(response.content)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response.headers['Content-Length'] = str(len(body))
+
+        # The encoded body differs byte for byte, so a strong validator becomes weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
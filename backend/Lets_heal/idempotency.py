@@ -0,0 +1,143 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from account.models import IdempotencyKey
+from jobs.tasks import task
+from .profiling import registry
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# How long a stored response can be replayed, and how long a crashed first attempt
+# keeps its key locked
+DEFAULT_TTL = 60 * 60 * 24
+LOCK_TIMEOUT = 60
+PRUNE_BATCH_SIZE = 1000
+
+
+def _value(value):
+    if isinstance(value, UploadedFile):
+        return ['file', value.name, value.size]
+    return value
+
+
+def fingerprint(request):
+    """Hash of what the request asks for: method, path and parsed body.
+
+    Uploaded files contribute their name and size, so a multipart retry
+    matches its original without the file being read again.
+    """
+    data = request.data
+    if hasattr(data, 'lists'):
+        body = sorted((key, [_value(v) for v in values]) for key, values in data.lists())
+    else:
+        body = data
+    payload = json.dumps([request.method, request.path, body], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _digest(request, key):
+    # Scoped to the caller so one user can never replay another's response
+    owner = request.user.id if request.user and request.user.is_authenticated else 'anon'
+    return hashlib.sha256(f'{request.path}\n{owner}\n{key}'.encode()).hexdigest()
+
+
+def _begin(digest, request_hash):
+    """Record the request as running: (True, None) if this caller got the key, else (False, its row)."""
+    now = timezone.now()
+    lock_until = now + timedelta(seconds=LOCK_TIMEOUT)
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key=digest, fingerprint=request_hash, expires_at=lock_until)
+        return True, None
+    except IntegrityError:
+        pass
+    # An expired row (an old response, or a first attempt that died) is taken over in place
+    if IdempotencyKey.objects.filter(key=digest, expires_at__lte=now).update(
+            fingerprint=request_hash, status_code=None, response=None, expires_at=lock_until):
+        return True, None
+    return False, IdempotencyKey.objects.filter(key=digest).first()
+
+
+def _in_progress():
+    response = Response({"error": f"A request with this {HEADER} is still being processed."},
+                        status=status.HTTP_409_CONFLICT)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _replay(entry):
+    response = Response(entry.response, status=entry.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Make a DRF function view safe to retry with an Idempotency-Key header.
+
+    Goes below @api_view, so authentication, permissions and throttles still
+    run on every attempt. The first request with a given key runs the view and
+    its response is kept in the IdempotencyKey table for IDEMPOTENCY_TTL
+    seconds, where every worker process sees it; a retry with the same key and
+    body gets that response back without the view running again. The same key
+    with a different body is rejected with 422, and a retry that arrives while
+    the first attempt is still running gets 409. Server errors are not stored,
+    so the client can retry them. Requests without the header are not affected.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response({"error": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        digest = _digest(request, key)
+        request_hash = fingerprint(request)
+        owned, entry = _begin(digest, request_hash)
+        if owned:
+            stored = False
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code < 500 and isinstance(response, Response):
+                    ttl = getattr(settings, 'IDEMPOTENCY_TTL', DEFAULT_TTL)
+                    IdempotencyKey.objects.filter(key=digest).update(
+                        status_code=response.status_code, response=response.data,
+                        expires_at=timezone.now() + timedelta(seconds=ttl))
+                    stored = True
+                return response
+            finally:
+                if not stored:
+                    IdempotencyKey.objects.filter(key=digest, status_code__isnull=True).delete()
+
+        if entry is None:  # pruned between the insert and the read
+            return _in_progress()
+        if entry.fingerprint != request_hash:
+            return Response({"error": f"This {HEADER} was already used for a different request."},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if entry.status_code is None:
+            return _in_progress()
+        registry.increment('idempotent_replays', (('view', view.__name__),))
+        return _replay(entry)
+
+    return wrapper
+
+
+@task
+def prune_idempotency_keys():
+    """Recurring job (see JOBS_RECURRING) deleting keys past their expiry."""
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).values_list('id', flat=True)
+    while True:
+        ids = list(expired[:PRUNE_BATCH_SIZE])
+        if not ids:
+            return
+        IdempotencyKey.objects.filter(id__in=ids).delete()
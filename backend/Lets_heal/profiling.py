@@ -0,0 +1,244 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds for every metric we record per endpoint
+BUCKETS = {
+    'queries': (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+    'sql_seconds': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    'render_seconds': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+    'response_bytes': (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    'latency_seconds': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+}
+
+METRIC_HELP = {
+    'queries': 'DB queries per request',
+    'sql_seconds': 'Total SQL time per request',
+    # Only the DRF renderer turning response.data into bytes: serializer .data built
+    # inside the view counts as view time, and streamed bodies are encoded after the
+    # response has left the middleware, so neither is included
+    'render_seconds': 'DRF response rendering time per request (excludes serializer .data and streamed bodies)',
+    'response_bytes': 'Response body size',
+    'latency_seconds': 'Total request latency',
+}
+
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'avg': self.sum / self.count if self.count else 0,
+            'max': self.max,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([str(b) for b in self.bounds] + ['+Inf'], self.counts)),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._duplicates = Counter()
+        self._counters = Counter()
+
+    def record(self, endpoint, **observations):
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+            if histograms is None:
+                histograms = {name: Histogram(bounds) for name, bounds in BUCKETS.items()}
+                self._endpoints[endpoint] = histograms
+            for name, value in observations.items():
+                histograms[name].observe(value)
+
+    def record_duplicates(self, endpoint, count):
+        with self._lock:
+            self._duplicates[endpoint] += count
+
+    def increment(self, name, labels=(), amount=1):
+        # Free-form counters (e.g. throttled requests) exported alongside the histograms
+        with self._lock:
+            self._counters[(name, tuple(labels))] += amount
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._duplicates.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {name: h.snapshot() for name, h in histograms.items()}
+                for endpoint, histograms in self._endpoints.items()
+            }
+            for endpoint, data in endpoints.items():
+                data['duplicate_queries'] = self._duplicates.get(endpoint, 0)
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {'endpoints': endpoints, 'counters': counters}
+
+    def render_prometheus(self, prefix='letsheal'):
+        lines = []
+        with self._lock:
+            for name, bounds in BUCKETS.items():
+                metric = f'{prefix}_request_{name}'
+                lines.append(f'# HELP {metric} {METRIC_HELP[name]}')
+                lines.append(f'# TYPE {metric} histogram')
+                for endpoint, histograms in sorted(self._endpoints.items()):
+                    h = histograms[name]
+                    label = f'endpoint="{_escape(endpoint)}"'
+                    cumulative = 0
+                    for bound, n in zip(bounds, h.counts):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {h.count}')
+                    lines.append(f'{metric}_sum{{{label}}} {h.sum}')
+                    lines.append(f'{metric}_count{{{label}}} {h.count}')
+
+            metric = f'{prefix}_duplicate_queries_total'
+            lines.append(f'# HELP {metric} Repeated query signatures (possible N+1)')
+            lines.append(f'# TYPE {metric} counter')
+            for endpoint, n in sorted(self._duplicates.items()):
+                lines.append(f'{metric}{{endpoint="{_escape(endpoint)}"}} {n}')
+
+            for name in sorted({name for name, _ in self._counters}):
+                metric = f'{prefix}_{name}_total'
+                lines.append(f'# TYPE {metric} counter')
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter != name:
+                        continue
+                    label = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                    lines.append(f'{metric}{{{label}}} {value}' if label else f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def query_signature(sql):
+    # Collapse IN (%s, %s, ...) lists so batches of different sizes share a signature
+    return _IN_LIST.sub('(%s...)', sql)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.signatures[query_signature(sql)] += 1
+
+
+class QueryProfilingMiddleware:
+    """Opt-in per-endpoint query/latency instrumentation (settings.PROFILING_ENABLED)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_threshold = getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 3)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request._profiling_render_seconds = 0.0
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.url_name or match.view_name) if match else '<unresolved>'
+        if getattr(response, 'streaming', False):
+            size = 0
+        else:
+            size = len(response.content)
+
+        registry.record(
+            endpoint,
+            queries=recorder.count,
+            sql_seconds=recorder.seconds,
+            render_seconds=request._profiling_render_seconds,
+            response_bytes=size,
+            latency_seconds=latency,
+        )
+        self._report_duplicates(endpoint, match, recorder)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook; time the render itself
+        start = time.perf_counter()
+
+        def _done(rendered):
+            request._profiling_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(_done)
+        return response
+
+    def _report_duplicates(self, endpoint, match, recorder):
+        repeated = {sig: n for sig, n in recorder.signatures.items() if n >= self.duplicate_threshold}
+        if not repeated:
+            return
+        view = match._func_path if match else endpoint
+        registry.record_duplicates(endpoint, sum(repeated.values()))
+        for sig, n in repeated.items():
+            logger.warning('Possible N+1 in %s (%s): %d x %s', view, endpoint, n, sig)
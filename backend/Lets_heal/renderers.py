@@ -0,0 +1,152 @@
+import re
+from functools import partial
+from itertools import chain, islice
+from math import isfinite
+
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from account.bulk import chunked
+from .compiled import compiled
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+STREAM_CHUNK_SIZE = 500
+# Lists with more rows than this are streamed even without ?stream=1
+STREAM_MIN_ROWS = 1000
+
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+# A number in exponent form (orjson writes 1e16 where the stdlib writes 1e+16).
+# A match inside a string only costs a needless fallback.
+_EXPONENT = re.compile(rb'(?:^|[\[:,])-?\d+(?:\.\d+)?e')
+
+
+def _has_non_finite(values):
+    for value in values:
+        kind = type(value)
+        if kind is float:
+            if not isfinite(value):
+                return True
+        elif kind is dict:
+            if _has_non_finite(value.values()):
+                return True
+        elif kind is list or kind is tuple:
+            if _has_non_finite(value):
+                return True
+    return False
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes, via orjson when it is installed.
+
+    The output is byte-for-byte what DRF's JSONRenderer produces: datetimes go
+    through DRF's encoder, and payloads orjson would write differently (floats
+    in exponent form, or NaN/infinity, which orjson turns into null) are left to
+    the stdlib encoder, which raises ValueError for the non-finite ones.
+    """
+    if orjson is not None:
+        try:
+            body = orjson.dumps(data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            pass  # e.g. non-string dict keys; let the stdlib encoder deal with it
+        else:
+            if _EXPONENT.search(body) or (b'null' in body and _has_non_finite((data,))):
+                return JSONRenderer().render(data)
+            # Same escaping as DRF: these are valid JSON but break JavaScript literals
+            if b'\xe2\x80\xa8' in body or b'\xe2\x80\xa9' in body:
+                body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+            return body
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF's JSONRenderer with orjson doing the encoding when it is available."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+def json_response(data, status=200, headers=None):
+    """A plain Django response with the same body FastJSONRenderer gives the DRF views."""
+    return HttpResponse(dumps(data), status=status, content_type='application/json', headers=headers)
+
+
+def plain_response(response):
+    """An unrendered DRF Response from a shared helper, for the async views outside DRF."""
+    if not isinstance(response, Response):
+        return response  # already a Django response, e.g. a stream
+    headers = {key: value for key, value in response.items() if key != 'Content-Type'}
+    return json_response(response.data, response.status_code, headers)
+
+
+def iter_json_array(rows, represent, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield a JSON array piece by piece; represent(list of rows) is called once per chunk."""
+    yield b'['
+    separator = b''
+    for chunk in chunked(rows, chunk_size):
+        yield separator + dumps(represent(chunk))[1:-1]
+        separator = b','
+    yield b']'
+
+
+def stream_json(rows, represent, chunk_size=STREAM_CHUNK_SIZE, status=200):
+    """A response that starts sending the array before the whole list is serialized."""
+    return StreamingHttpResponse(
+        iter_json_array(rows, represent, chunk_size),
+        content_type='application/json',
+        status=status,
+    )
+
+
+def _represent_and_release(serializer, instances):
+    data = [serializer.to_representation(instance) for instance in instances]
+    # File fields cache a FieldFile pointing back at the instance; dropping the
+    # attributes breaks that cycle so the rows are freed now rather than by gc
+    for instance in instances:
+        instance.__dict__.clear()
+    return data
+
+
+def wants_stream(request):
+    return request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def list_response(request, queryset, serializer_class, chunk_size=None, min_rows=None, context=None, empty=None):
+    """Serialized queryset for a DRF function view, streamed when it is big.
+
+    The rows are read once, through .iterator(chunk_size). When no more than
+    min_rows come back they are answered as a normal Response; past that, or
+    with ?stream=1, the rows already read and the rest of the iterator are
+    encoded a chunk at a time, so memory stays flat however large the table
+    grows. With empty given, a result without rows is answered 404 with that
+    body. Serializers the compiled path supports are fed .values() rows
+    instead of model instances.
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    min_rows = STREAM_MIN_ROWS if min_rows is None else min_rows
+    fast = compiled(serializer_class)
+    if fast is not None:
+        rows = fast.rows(queryset).iterator(chunk_size=chunk_size)
+        represent = partial(fast.represent, context=context)
+    else:
+        rows = queryset.iterator(chunk_size=chunk_size)
+        # One serializer for every row: a serializer per chunk would leave reference
+        # cycles (and the rows they hold) around until the next full gc pass
+        represent = partial(_represent_and_release, serializer_class(context=context or {}))
+    stream = wants_stream(request)
+    head = list(islice(rows, 1 if stream else min_rows + 1))
+    if not head and empty is not None:
+        return Response(empty, status=status.HTTP_404_NOT_FOUND)
+    if stream or len(head) > min_rows:
+        return stream_json(chain(head, rows), represent, chunk_size)
+    return Response(represent(head), status=status.HTTP_200_OK)
@@ -47,9 +47,13 @@ INSTALLED_APPS = [
     'chat.apps.ChatConfig',
     'quiz.apps.QuizConfig',
     'therapy.apps.TherapyConfig',
+    'jobs.apps.JobsConfig',
+    'benchmarks.apps.BenchmarksConfig',
 ]
 
 MIDDLEWARE = [
+    'Lets_heal.profiling.QueryProfilingMiddleware',
+    'Lets_heal.compression.CompressionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,6 +64,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-endpoint query/latency profiling, exposed at /api/admin/metrics/
+PROFILING_ENABLED = os.environ.get('LETS_HEAL_PROFILING', '') == '1'
+PROFILING_DUPLICATE_THRESHOLD = 3
+
+# gzip/brotli (when the brotli package is installed) for bodies at least this big
+COMPRESSION_MIN_SIZE = 1024
+
 CORS_ALLOWED_ORIGINS =[
     "http://localhost:5173",
     "http://127.0.0.1:5173",
@@ -99,6 +110,33 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# LocMemCache is private to each worker process, so throttle budgets, revocation
+# versions and the change log behind the in-memory therapist indexes (facets,
+# autocomplete) are per process with it: those indexes then only see other
+# workers' edits when they are rebuilt, every INDEX_MAX_AGE seconds. Point
+# LETS_HEAL_REDIS_URL at a Redis server (needs the redis package) to share them.
+if os.environ.get('LETS_HEAL_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['LETS_HEAL_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'lets-heal',
+        }
+    }
+
+# Longest an in-memory index (account.cache.ChangeLogIndex) is served before a full rebuild
+INDEX_MAX_AGE = 60 * 5
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -117,6 +155,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Stored passwords are hashed with the first hasher; hashes made by any other hasher,
+# or with a different PBKDF2 work factor, are upgraded on the next successful login.
+PASSWORD_HASHERS = [
+    'account.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    # Argon2/BCrypt need the argon2-cffi/bcrypt packages; add them back with those installed
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('LETS_HEAL_PBKDF2_ITERATIONS', 600000))
+# Logins are verified on a bounded pool so hashing never ties up request workers.
+# Hashing is CPU bound (hashlib releases the GIL), so more workers than cores buys nothing;
+# PASSWORD_VERIFY_QUEUE hash jobs may wait for a worker before new logins get 503.
+PASSWORD_VERIFY_WORKERS = int(os.environ.get('LETS_HEAL_PASSWORD_WORKERS', os.cpu_count() or 1))
+PASSWORD_VERIFY_QUEUE = 64
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -152,15 +205,59 @@ EMAIL_HOST_PASSWORD = 'zmlisqbxuyiibgil'   # <-- your 16-char App Password
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 
+# Background jobs (jobs app), run by `manage.py run_jobs`
+JOBS_WORKER_PROCESSES = int(os.environ.get('LETS_HEAL_JOB_WORKERS', 2))
+JOBS_BATCH_SIZE = 10
+JOBS_POLL_INTERVAL = 1.0
+# Retry n waits JOBS_RETRY_BASE * 2**(n-1) seconds, up to JOBS_RETRY_MAX, with jitter
+JOBS_RETRY_BASE = 10
+JOBS_RETRY_MAX = 60 * 60
+# A job still running after this long is assumed to have lost its worker and is retried
+JOBS_LEASE_SECONDS = 60 * 10
+JOBS_RETENTION_DAYS = 7
+
+# Appointment reminders (therapy.reminders): sent this many seconds before the start,
+# dispatched once per bucket, REMINDER_BATCH_SIZE emails per SMTP batch
+APPOINTMENT_REMINDER_OFFSETS = (24 * 60 * 60, 60 * 60)
+REMINDER_BUCKET_SECONDS = 60
+REMINDER_BATCH_SIZE = 100
+
+# {key: (task name, every n seconds)}
+JOBS_RECURRING = {
+    'appointment_reminders': ('therapy.reminders.dispatch_reminders', REMINDER_BUCKET_SECONDS),
+    'prune_idempotency_keys': ('Lets_heal.idempotency.prune_idempotency_keys', 60 * 60),
+    'prune_tokens': ('account.tokens.prune_tokens', 60 * 60 * 24),
+}
+
+
 REST_FRAMEWORK = {
   'DEFAULT_AUTHENTICATION_CLASSES': (
         'account.authentication.UserAuthJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    # orjson-backed when installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'Lets_heal.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Client addresses for throttling come from REMOTE_ADDR; behind reverse proxies set
+    # this to their number so X-Forwarded-For is read, never trusted from clients directly
+    'NUM_PROXIES': int(os.environ.get('LETS_HEAL_NUM_PROXIES', 0)),
+    # Sliding-window limits for the anonymous endpoints (account.throttling); a scope
+    # left out here is not throttled
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_account': '10/min',
+        'signup_ip': '20/hour',
+    },
 }
 
+# Build request.user from validated JWT claims instead of loading UserAuth on every
+# request; revocation is checked against a cached per-user token version.
+AUTH_CLAIMS_PRINCIPAL = os.environ.get('LETS_HEAL_CLAIMS_PRINCIPAL', '') == '1'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
@@ -168,5 +265,15 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'ALGORITHM': 'HS256',
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'account.tokens.UserAuthTokenRefreshSerializer',
 }
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+
+# Upper bound on how stale a worker's in-memory refresh-token blacklist filter can be
+# when the cache is not shared between workers. Expired tokens are pruned daily by the
+# prune_tokens job (JOBS_RECURRING) or on demand with `manage.py prune_tokens`.
+TOKEN_BLACKLIST_SYNC_SECONDS = 5
+CORS_ALLOW_CREDENTIALS = True
+
+# Seconds a response stays replayable for retries carrying the same Idempotency-Key
+# (Lets_heal.idempotency, stored in account.IdempotencyKey)
+IDEMPOTENCY_TTL = 60 * 60 * 24
\ No newline at end of file
@@ -0,0 +1,270 @@
+import gzip
+import json
+import random
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from account.models import Admin, Customer, Hospital, Therapist, UserAuth
+from account.serializers import CustomerSerializer, TherapistSerializer
+from blog.models import Blog
+from blog.serializers import BlogSerializer
+from quiz.models import Quiz, QuizAttempt, QuizQuestion
+from quiz.serializers import QuizQuestionSerializer, QuizSerializer
+from therapy.models import Appointment
+from therapy.serializers import AppointmentSerializer
+from .compiled import compiled, serialize_many
+from .compression import choose_encoding
+from .profiling import Histogram, query_signature, registry
+from .renderers import FastJSONRenderer, dumps
+
+
+def admin_client():
+    admin = Admin.objects.create(admin_name='root', admin_email='root@example.com', admin_password='pw')
+    user_auth = UserAuth.objects.create(admin=admin, user_role='admin')
+    refresh = RefreshToken()
+    refresh['user_id'] = user_auth.id
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    return client
+
+
+class HistogramTests(TestCase):
+    def test_quantiles_use_bucket_bounds(self):
+        h = Histogram((1, 5, 10))
+        for value in (1, 1, 4, 9, 50):
+            h.observe(value)
+        self.assertEqual(h.count, 5)
+        self.assertEqual(h.counts, [2, 1, 1, 1])
+        self.assertEqual(h.quantile(0.5), 5)
+        self.assertEqual(h.quantile(0.99), 50)
+
+    def test_in_lists_share_signature(self):
+        self.assertEqual(
+            query_signature('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            query_signature('SELECT 1 WHERE id IN (%s, %s)'),
+        )
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        cache.clear()
+        Hospital.objects.create(name='City', address='Dhaka')
+
+    def test_records_per_url_name(self):
+        client = APIClient()
+        client.get('/api/view_hospital_list/')
+        client.get('/api/view_hospital_list/')
+        stats = registry.snapshot()['endpoints']['view_hospital_list']
+        self.assertEqual(stats['queries']['count'], 2)
+        # the second call is served from the cached hospital directory
+        self.assertEqual(stats['queries']['sum'], 1)
+        self.assertGreater(stats['response_bytes']['sum'], 0)
+
+    def test_report_is_admin_only(self):
+        self.assertEqual(APIClient().get('/api/admin/metrics/').status_code, 401)
+        client = admin_client()
+        client.get('/api/view_hospital_list/')
+        response = client.get('/api/admin/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('view_hospital_list', response.json()['endpoints'])
+
+        text = client.get('/api/admin/metrics/prometheus/').content.decode()
+        self.assertIn('letsheal_request_queries_count{endpoint="view_hospital_list"}', text)
+
+
+class AsyncViewParityTests(TestCase):
+    """The /api/async/ twins must answer exactly like their sync counterparts."""
+
+    def setUp(self):
+        cache.clear()
+        hospital = Hospital.objects.create(name='Square', address='Panthapath')
+        self.therapist = Therapist.objects.create(therapist_name='Dr. Rahman', therapist_email='t@example.com',
+                                                  therapist_specialization='Psychiatrist')
+        self.therapist.hospital.add(hospital)
+        self.customer = Customer.objects.create(customer_name='Cus', customer_email='c@example.com')
+        self.author = UserAuth.objects.create(customer=self.customer, user_role='customer')
+        self.blog = Blog.objects.create(blog_title='Sleep well', blog_content='...', blog_author=self.author)
+        quiz = Quiz.objects.create(title='PHQ', is_active=True)
+        QuizQuestion.objects.create(quiz=quiz, order=1, question_text='Q1')
+        self.attempt = QuizAttempt.objects.create(customer=self.customer, quiz=quiz)
+
+    async def assert_same(self, path, params=None, headers=None):
+        sync = await sync_to_async(self.client.get)(f'/api/{path}', params or {}, headers=headers)
+        async_ = await self.async_client.get(f'/api/async/{path}', params or {}, headers=headers)
+        self.assertEqual(async_.status_code, sync.status_code, path)
+        self.assertEqual(async_.json(), sync.json(), path)
+        return async_
+
+    async def test_responses_match(self):
+        await self.assert_same('view_hospital_list/')
+        await self.assert_same('search_therapist/', {'search': 'rah', 'sort': 'rating_desc'})
+        await self.assert_same('search_therapist/', {'page_size': 1, 'page': 1})
+        await self.assert_same('search_therapist/', {'search': 'nobody'})
+        await self.assert_same(f'view_therapist_profile/{self.therapist.id}/')
+        await self.assert_same('view_therapist_profile/9999/')
+        await self.assert_same('search_blog/', {'q': 'sleep'})
+        await self.assert_same(f'get_next_question/{self.attempt.id}/')
+
+        refresh = RefreshToken()
+        refresh['user_id'] = self.author.id
+        response = await self.assert_same(f'blog_detail/{self.blog.id}/', headers={'Authorization': f'Bearer {refresh.access_token}'})
+        self.assertTrue(response.json()['is_author'])
+        response = await self.assert_same(f'blog_detail/{self.blog.id}/')
+        self.assertFalse(response.json()['is_author'])
+
+    async def test_conditional_hospital_list(self):
+        first = await self.async_client.get('/api/async/view_hospital_list/')
+        again = await self.async_client.get('/api/async/view_hospital_list/', headers={'If-None-Match': first['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+
+class RenderingAndCompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(40):
+            Hospital.objects.create(name=f'Hospital {i}', address='Mirpur Road, Dhaka')
+
+    def test_fast_renderer_matches_stdlib(self):
+        data = [{'name': 'Ä ', 'when': datetime(2024, 1, 2, 3, 4), 'n': Decimal('1.50')},
+                {'utc': datetime(2024, 1, 2, 3, 4, tzinfo=dt_timezone.utc), 'day': date(2024, 1, 2),
+                 'at': time(3, 4, 5, 600), 'floats': [0.1, 1e16, -1.5e-07, 2.5], 'none': None}]
+        fast = dumps(data)
+        with patch('Lets_heal.renderers.orjson', None):
+            self.assertEqual(dumps(data), fast)
+        self.assertIn(b'"2024-01-02T03:04:00Z"', fast)
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                dumps({'rating': [value, None]})
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_negotiation_and_threshold(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, identity'))
+        self.assertIsNone(choose_encoding(''))
+
+        plain = self.client.get('/api/view_hospital_list/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        response = self.client.get('/api/view_hospital_list/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        again = self.client.get('/api/view_hospital_list/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': response['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        small = self.client.get(f'/api/view_specific_hospital_info/{Hospital.objects.first().id}/', headers={'Accept-Encoding': 'gzip'})
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_large_search_is_streamed(self):
+        for i in range(5):
+            Therapist.objects.create(therapist_name=f'T{i}', therapist_email=f't{i}@example.com')
+        expected = self.client.get('/api/search_therapist/').json()
+        with patch('Lets_heal.renderers.STREAM_MIN_ROWS', 2), patch('Lets_heal.renderers.STREAM_CHUNK_SIZE', 2):
+            response = self.client.get('/api/search_therapist/')
+            self.assertTrue(response.streaming)
+            self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+            response = self.client.get('/api/search_therapist/', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(json.loads(gzip.decompress(b''.join(response.streaming_content))), expected)
+
+
+class CompiledSerializerTests(TestCase):
+    """Property-style checks: random rows must render byte for byte like the DRF serializers."""
+
+    ALPHABET = 'abcxyz ÄéŋÜ "\\'
+
+    def text(self, rng, nullable=True):
+        if nullable and rng.random() < 0.2:
+            return None
+        return ''.join(rng.choice(self.ALPHABET) for _ in range(rng.randint(0, 12)))
+
+    def populate(self, rng):
+        hospitals = [Hospital.objects.create(name=self.text(rng, False), address=self.text(rng, False))
+                     for _ in range(rng.randint(1, 5))]
+        therapists, customers = [], []
+        for i in range(rng.randint(1, 8)):
+            therapist = Therapist.objects.create(
+                therapist_name=self.text(rng, False), therapist_email=f't{rng.random()}@example.com',
+                therapist_phone=self.text(rng), year_of_experience=rng.choice([None, 0, rng.randint(1, 40)]),
+                therapist_image=rng.choice(['', None, f'image/t{i}.png']),
+                therapist_licence=rng.choice(['', None, 'pdf/therapist_license/l ä.pdf']),
+                therapist_gender=rng.choice(['male', 'female', 'no choice']),
+                rating_avg=rng.choice([0, 4.25, 1 / 3]),
+                next_available_date=rng.choice([None, date(2025, 1, rng.randint(1, 28))]),
+            )
+            links = rng.sample(hospitals, rng.randint(0, len(hospitals)))
+            therapist.hospital.add(*links)
+            therapists.append(therapist)
+        for i in range(rng.randint(1, 5)):
+            customers.append(Customer.objects.create(
+                customer_name=self.text(rng, False), customer_email=f'c{rng.random()}@example.com',
+                customer_age=rng.choice([None, 30]), customer_image=rng.choice([None, 'image/c.jpg']),
+                customer_gender=rng.choice([None, 'male', 'no choice']),
+            ))
+        for _ in range(rng.randint(0, 10)):
+            Appointment.objects.create(
+                customer=rng.choice(customers), therapist=rng.choice(therapists),
+                hospital=rng.choice(hospitals + [None]), consultation_type=self.text(rng, False),
+                appointment_type='new patient', appointment_date=date(2025, 2, rng.randint(1, 28)),
+                appointment_time=time(rng.randint(0, 23), rng.choice([0, 30]), rng.choice([0, 15])),
+            )
+        quiz = Quiz.objects.create(title=self.text(rng))
+        for order in rng.sample(range(20), rng.randint(0, 6)):
+            QuizQuestion.objects.create(quiz=quiz, order=order, question_text=self.text(rng), option_a=self.text(rng),
+                                        score_b=rng.randint(-3, 3), is_required=rng.random() < 0.5)
+        for _ in range(rng.randint(0, 5)):
+            Blog.objects.create(blog_title=self.text(rng), blog_content=self.text(rng),
+                                blog_image=rng.choice([None, '', 'b.png']), blog_author_name=self.text(rng))
+
+    def test_matches_drf_output(self):
+        request = Request(APIRequestFactory().get('/'))
+        cases = [
+            (TherapistSerializer, lambda: Therapist.objects.prefetch_related('hospital').order_by('id')),
+            (AppointmentSerializer, lambda: Appointment.objects.order_by('appointment_date', 'id')),
+            (BlogSerializer, lambda: Blog.objects.order_by('-blog_created_at')),
+            (QuizQuestionSerializer, lambda: QuizQuestion.objects.all()),
+            # Nested lists come out in the related model's Meta.ordering, as prefetch_related() sorts them
+            (QuizSerializer, lambda: Quiz.objects.prefetch_related('questions', 'result_ranges').order_by('id')),
+            (CustomerSerializer, lambda: Customer.objects.order_by('id')),
+        ]
+        for seed in range(12):
+            rng = random.Random(seed)
+            self.populate(rng)
+            for serializer_class, queryset in cases:
+                fast = compiled(serializer_class)
+                self.assertIsNotNone(fast, serializer_class.__name__)
+                for context in ({}, {'request': request}):
+                    expected = dumps(serializer_class(queryset(), many=True, context=context).data)
+                    self.assertEqual(dumps(fast.serialize(queryset(), context)), expected,
+                                     f'{serializer_class.__name__} seed={seed}')
+
+    def test_unsupported_fields_fall_back(self):
+        class Custom(serializers.ModelSerializer):
+            shout = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Hospital
+                fields = ['id', 'shout']
+
+            def get_shout(self, obj):
+                return obj.name.upper()
+
+        Hospital.objects.create(name='Square', address='Panthapath')
+        self.assertIsNone(compiled(Custom))
+        self.assertEqual(serialize_many(Hospital.objects.all(), Custom)[0]['shout'], 'SQUARE')
+
+    def test_nested_relations_take_one_query_each(self):
+        self.populate(random.Random(99))
+        with self.assertNumQueries(2):
+            compiled(AppointmentSerializer).serialize(Appointment.objects.all())
@@ -8,6 +8,11 @@ from blog import views as b_views
 from chat import views as c_views
 from quiz import views as q_views
 from therapy import views as t_views
+from . import views as p_views
+from account import async_views as a_async
+from blog import async_views as b_async
+from quiz import async_views as q_async
+from therapy import async_views as t_async
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
@@ -20,7 +25,9 @@ urlpatterns = [
     path('api/list_therapist_request/', a_views.list_therapist_request, name='list_therapist_request'),
     path('api/requested_therapist_info/<int:request_id>/', a_views.requested_therapist_info, name='requested_therapist_info'),
     path('api/process_therapist_request/<int:request_id>/', a_views.process_therapist_request, name='process_therapist_request'),
+    path('api/process_therapist_requests/', a_views.process_therapist_requests, name='process_therapist_requests'),
     path('api/login/', a_views.login, name='login'),
+    path('api/revoke_tokens/', a_views.revoke_all_tokens, name='revoke_tokens'),
     path('api/list_customer/', a_views.list_customer, name='list_customer'),
     path('api/view_customer_profile/<int:request_id>/', a_views.view_customer_profile, name='view_customer_profile'),
     path('api/delete_customer/<int:customer_id>/', a_views.delete_customer, name='delete_customer'),
@@ -30,6 +37,10 @@ urlpatterns = [
     path('api/view_specific_hospital_info/<int:pk>/', a_views.view_specific_hospital_info, name='view_specific_hospital_info'),
     path('api/update_hospital/<int:pk>/', a_views.update_hospital, name='update_hospital'),
     path('api/delete_hospital/<int:pk>/', a_views.delete_hospital, name='delete_hospital'),
+    path('api/admin/customers/', a_views.admin_list_customers, name='admin_list_customers'),
+    path('api/admin/therapist_requests/', a_views.admin_list_therapist_requests, name='admin_list_therapist_requests'),
+    path('api/admin/import/<str:resource>/', a_views.bulk_import, name='bulk_import'),
+    path('api/admin/export/<str:resource>/<str:file_format>/', a_views.bulk_export, name='bulk_export'),
 
     #blog app
     path('api/search_blog/', b_views.search_blog, name='search_blog'),
@@ -41,6 +52,8 @@ urlpatterns = [
 
     #therapy app
     path('api/search_therapist/', t_views.search_therapist, name='search_therapist'),
+    path('api/therapist_facets/', t_views.therapist_facets, name='therapist_facets'),
+    path('api/autocomplete/', t_views.autocomplete_search, name='autocomplete'),
     path('api/view_therapist_profile/<int:therapist_id>/', t_views.view_therapist_profile, name='view_therapist_profile'),
     path('api/update_therapist_profile/<int:therapist_id>/', t_views.update_therapist_profile, name='update_therapist_profile'),
     path('api/delete_therapist/<int:therapist_id>/', t_views.delete_therapist, name='delete_therapist'),
@@ -50,6 +63,9 @@ urlpatterns = [
     path('api/therapist_appointment_prev_history/', t_views.therapist_appointment_prev_history, name='therapist_appointment_prev_history'),
     path('api/therapist_appointment_current_history/', t_views.therapist_appointment_current_history, name='therapist_appointment_current_history'),
     path('api/cancel_appointment/<int:appointment_id>/', t_views.cancel_appointment, name='cancel_appointment'),
+    path('api/submit_review/<int:therapist_id>/', t_views.submit_review, name='submit_review'),
+    path('api/therapist_reviews/<int:therapist_id>/', t_views.list_therapist_reviews, name='list_therapist_reviews'),
+    path('api/delete_review/<int:review_id>/', t_views.delete_review, name='delete_review'),
    
     #quiz app
     path('api/admin/view_all_questions/', q_views.admin_view_all_questions, name='admin_view_all_questions'),
@@ -64,8 +80,21 @@ urlpatterns = [
     path('api/finish_attempt/<int:attempt_id>/', q_views.finish_attempt, name='finish_attempt'),
     path('api/get_attempt_result/<int:attempt_id>/', q_views.get_attempt_result, name='get_attempt_result'),
 
+    #profiling (admin only, enabled with PROFILING_ENABLED)
+    path('api/admin/metrics/', p_views.profiling_report, name='profiling_report'),
+    path('api/admin/metrics/prometheus/', p_views.profiling_prometheus, name='profiling_prometheus'),
+
     # JWT token refresh
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    #async twins of the hot read paths (served natively under ASGI)
+    path('api/async/view_hospital_list/', a_async.view_hospital_list, name='async_view_hospital_list'),
+    path('api/async/search_therapist/', t_async.search_therapist, name='async_search_therapist'),
+    path('api/async/view_therapist_profile/<int:therapist_id>/', t_async.view_therapist_profile, name='async_view_therapist_profile'),
+    path('api/async/search_blog/', b_async.search_blog, name='async_search_blog'),
+    path('api/async/blog_detail/<int:pk>/', b_async.blog_detail, name='async_blog_detail'),
+    path('api/async/get_next_question/<int:attempt_id>/', q_async.get_next_question, name='async_get_next_question'),
+    path('api/async/login/', a_async.login, name='async_login'),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
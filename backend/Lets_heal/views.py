@@ -0,0 +1,25 @@
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from .profiling import registry
+
+# Per-endpoint profiling data (for admin)
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def profiling_report(request):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can view profiling data"}, status=status.HTTP_403_FORBIDDEN)
+    if request.method == 'DELETE':
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(registry.snapshot(), status=status.HTTP_200_OK)
+
+# Prometheus text exposition of the same data (for admin)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def profiling_prometheus(request):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can view profiling data"}, status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,116 @@
+from django.db import transaction
+
+from .bulk import chunked
+from .cache import THERAPIST_INDEX, bump_version, record_change
+from .models import Therapist, TherapistRequest, UserAuth
+from .notifications import queue_mass_mail
+
+APPROVAL_CHUNK_SIZE = 200
+
+APPROVED_MAIL = (
+    "Therapist Request Approved",
+    "Congratulations! Your therapist registration request has been approved. You can now log in.",
+)
+DECLINED_MAIL = (
+    "Therapist Request Declined",
+    "Sorry, your therapist registration request has been declined.",
+)
+
+
+def _therapist_from(req):
+    return Therapist(
+        therapist_name=req.name,
+        therapist_email=req.email,
+        therapist_phone=req.phone,
+        year_of_experience=req.year_of_experience,
+        therapist_specialization=req.specialization,
+        therapist_qualification=req.qualification,
+        therapist_password=req.password,
+        therapist_gender=req.gender,
+        therapist_role="therapist",
+        therapist_licence=req.licence_pdf,
+        therapist_image=req.image,
+    )
+
+
+def _pending(request_ids, errors):
+    """Lock and return the still-pending requests; everything else is reported in errors."""
+    found = {
+        req.id: req
+        for req in TherapistRequest.objects.select_for_update().filter(id__in=request_ids)
+    }
+    pending = []
+    for request_id in request_ids:
+        req = found.get(request_id)
+        if req is None:
+            errors[request_id] = "Therapist request not found."
+        elif req.status != 'pending':
+            errors[request_id] = f"Request is already {req.status}."
+        else:
+            pending.append(req)
+    return pending
+
+
+def approve_requests(request_ids, chunk_size=APPROVAL_CHUNK_SIZE):
+    """Approve therapist requests in bulk.
+
+    Each chunk is one transaction: therapists, their UserAuth rows and hospital
+    links are bulk-inserted, the requests are marked approved and the emails are
+    queued as jobs in the same transaction. Returns (approved ids, {id: error}).
+    """
+    request_ids = list(dict.fromkeys(request_ids))
+    approved, errors = [], {}
+    through = Therapist.hospital.through
+
+    for chunk in chunked(request_ids, chunk_size):
+        with transaction.atomic():
+            pending = _pending(chunk, errors)
+            emails = [req.email for req in pending if req.email]
+            taken = set(Therapist.objects.filter(therapist_email__in=emails).values_list('therapist_email', flat=True))
+            accepted = []
+            for req in pending:
+                if req.email in taken:
+                    errors[req.id] = "A therapist with this email already exists."
+                else:
+                    accepted.append(req)
+            if not accepted:
+                continue
+
+            hospitals = {}
+            links = TherapistRequest.hospital.through.objects.filter(
+                therapistrequest_id__in=[req.id for req in accepted])
+            for request_id, hospital_id in links.values_list('therapistrequest_id', 'hospital_id'):
+                hospitals.setdefault(request_id, []).append(hospital_id)
+
+            therapists = Therapist.objects.bulk_create([_therapist_from(req) for req in accepted])
+            UserAuth.objects.bulk_create([UserAuth(therapist=therapist, user_role="therapist") for therapist in therapists])
+            through.objects.bulk_create([
+                through(therapist_id=therapist.id, hospital_id=hospital_id)
+                for req, therapist in zip(accepted, therapists)
+                for hospital_id in hospitals.get(req.id, [])
+            ])
+            TherapistRequest.objects.filter(id__in=[req.id for req in accepted]).update(status='approved')
+            new_ids = [therapist.id for therapist in therapists]
+            transaction.on_commit(lambda ids=new_ids: record_change(THERAPIST_INDEX, ids))
+
+            queue_mass_mail([(*APPROVED_MAIL, [req.email]) for req in accepted if req.email])
+            approved += [req.id for req in accepted]
+
+    if approved:
+        # .update() skips post_save, so invalidate the cached listings here
+        bump_version('therapist_requests')
+    return approved, errors
+
+
+def decline_requests(request_ids, chunk_size=APPROVAL_CHUNK_SIZE):
+    request_ids = list(dict.fromkeys(request_ids))
+    declined, errors = [], {}
+    for chunk in chunked(request_ids, chunk_size):
+        with transaction.atomic():
+            pending = _pending(chunk, errors)
+            TherapistRequest.objects.filter(id__in=[req.id for req in pending]).update(status='declined')
+            queue_mass_mail([(*DECLINED_MAIL, [req.email]) for req in pending if req.email])
+            declined += [req.id for req in pending]
+    if declined:
+        bump_version('therapist_requests')
+    return declined, errors
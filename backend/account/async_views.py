@@ -0,0 +1,67 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import ParseError, Throttled
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+
+from Lets_heal.renderers import json_response
+from . import passwords
+from .cache import not_modified
+from .throttling import LOGIN_THROTTLES, throttle_wait
+from .views import LOGIN_PROFILES, hospital_directory_entry, login_password, login_payload, login_queryset, rehash_rows
+
+
+def conditional_json(request, data, etag):
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if not_modified(request, etag):
+        return HttpResponseNotModified(headers=headers)
+    return json_response(data, headers=headers)
+
+
+# Async twin of view_hospital_list; the cache lookup (and a rebuild on a miss) is one ORM-thread hop
+@require_GET
+async def view_hospital_list(request):
+    directory, etag = await sync_to_async(hospital_directory_entry)()
+    return conditional_json(request, directory['list'], etag)
+
+
+# Async twin of login: the password hash runs on the bounded pool while the event loop keeps serving
+@csrf_exempt
+@require_POST
+async def login(request):
+    # Parsed and throttled exactly as the DRF view does
+    request = Request(request, parsers=[JSONParser(), FormParser(), MultiPartParser()])
+    try:
+        data = request.data
+    except ParseError as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=400)
+    wait = throttle_wait(request, LOGIN_THROTTLES)
+    if wait is not None:
+        return JsonResponse({"detail": str(Throttled(wait).detail)}, status=429, headers={'Retry-After': str(wait)})
+    role = data.get('role')
+    email = data.get('email')
+    password = data.get('password')
+
+    if not email or not password or not role:
+        return JsonResponse({"success": False, "error": "Email, password, and role are required"}, status=400)
+    if role not in LOGIN_PROFILES:
+        return JsonResponse({"success": False, "error": "Invalid role"}, status=400)
+
+    user = await login_queryset(role, email).afirst()
+    if not user:
+        return JsonResponse({"success": False, "error": "User not found"}, status=404)
+
+    try:
+        matches, rehash = await passwords.averify(password, login_password(user, role))
+    except passwords.Busy:
+        return JsonResponse({"success": False, "error": "Too many login attempts, try again shortly"},
+                            status=503, headers={'Retry-After': '1'})
+    if not matches:
+        return JsonResponse({"success": False, "error": "Incorrect password"}, status=401)
+    if rehash:
+        rows, changes = rehash_rows(user, role, rehash)
+        await rows.aupdate(**changes)
+
+    return JsonResponse(login_payload(user, role))
@@ -1,12 +1,126 @@
-
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import UserAuth
 
+TOKEN_VERSION_TTL = 60 * 60
+REVOKED = -1
+
+
+def token_version_key(user_id):
+    return f'token_version:{user_id}'
+
+
+def current_token_version(user_id):
+    # Cached per user; the DB is only read on a cache miss
+    key = token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        row = UserAuth.objects.filter(id=user_id).values_list('token_version', flat=True).first()
+        version = REVOKED if row is None else row
+        cache.set(key, version, TOKEN_VERSION_TTL)
+    return version
+
+
+def is_owner(user, profile):
+    """Whether request.user is the login linked to this profile.
+
+    Compared by auth id: the email claim in a token goes stale when the profile's
+    email changes, and can match a profile of a different role.
+    """
+    auth = getattr(profile, 'auth', None)
+    return auth is not None and auth.id == user.id
+
+
+def revoke_tokens(user_id):
+    """Invalidate every token issued to this user so far."""
+    UserAuth.objects.filter(id=user_id).update(token_version=F('token_version') + 1)
+    cache.delete(token_version_key(user_id))
+
+
+class ClaimsPrincipal:
+    """Lightweight request.user built only from validated token claims.
+
+    Exposes the same attributes the views read from UserAuth (id, user_email,
+    user_role) plus profile_id. Endpoints that need fresh data use .user, which
+    loads the UserAuth row on first access.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, validated_token):
+        self.id = self.pk = validated_token.get('user_id')
+        self.user_email = validated_token.get('email')
+        self.user_role = validated_token.get('role')
+        self.profile_id = validated_token.get('profile_id')
+        self.token_version = validated_token.get('ver', 0)
+        self._user = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = UserAuth.objects.select_related(*UserAuth.PROFILES).get(id=self.id)
+        return self._user
+
+    def __eq__(self, other):
+        if isinstance(other, (ClaimsPrincipal, UserAuth)):
+            return self.id == other.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(('UserAuth', self.id))
+
+    def __str__(self):
+        return f"{self.user_email}-{self.user_role}"
+
+
 class UserAuthJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
-    #Return a UserAuth instance based on token info.
+        user_id = validated_token.get('user_id')
+        version = validated_token.get('ver', 0)
+
+        if getattr(settings, 'AUTH_CLAIMS_PRINCIPAL', False):
+            if version != current_token_version(user_id):
+                raise AuthenticationFailed("Token has been revoked", code='token_revoked')
+            return ClaimsPrincipal(validated_token)
+
+    #Return a UserAuth instance based on token info, with the profile its identity fields come from
         try:
-            user_id = validated_token.get('user_id')
-            return UserAuth.objects.get(id=user_id)
+            user = UserAuth.objects.select_related(*UserAuth.PROFILES).get(id=user_id)
         except UserAuth.DoesNotExist:
             return None
+        if version != user.token_version:
+            raise AuthenticationFailed("Token has been revoked", code='token_revoked')
+        return user
+
+
+async def acurrent_token_version(user_id):
+    key = token_version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        row = await UserAuth.objects.filter(id=user_id).values_list('token_version', flat=True).afirst()
+        version = REVOKED if row is None else row
+        await cache.aset(key, version, TOKEN_VERSION_TTL)
+    return version
+
+
+async def aauthenticate(request):
+    """Optional authentication for the async views: a ClaimsPrincipal, or None.
+
+    Only the token and the cached token version are checked, so no thread hop is
+    needed in the common case. Invalid or revoked tokens count as anonymous.
+    """
+    auth = UserAuthJWTAuthentication()
+    try:
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = auth.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    if validated_token.get('ver', 0) != await acurrent_token_version(validated_token.get('user_id')):
+        return None
+    return ClaimsPrincipal(validated_token)
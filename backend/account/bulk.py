@@ -0,0 +1,331 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .cache import THERAPIST_INDEX, bump_version, record_change, therapist_namespace
+from .models import Customer, Hospital, Therapist, UserAuth
+from .passwords import hash_many
+from .serializers import CustomerImportSerializer, HospitalSerializer, TherapistImportSerializer
+
+IMPORT_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+
+
+def chunked(rows, size):
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _split_ids(value):
+    if value in (None, ''):
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [part.strip() for part in str(value).split('|') if part.strip()]
+
+
+# ---- reading uploads -------------------------------------------------------
+
+def read_upload(uploaded, file_format):
+    """Yield one dict per CSV/JSONL row without reading the whole file into memory.
+
+    Empty CSV cells are dropped so that updates leave those columns untouched.
+    """
+    lines = codecs.iterdecode(uploaded, 'utf-8-sig')
+    if file_format == 'csv':
+        for row in csv.DictReader(lines):
+            yield {k: v for k, v in row.items() if k and v not in (None, '')}
+    else:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield {'__error__': f"Invalid JSON: {exc}"}
+
+
+def detect_format(uploaded, requested=None):
+    if requested in ('csv', 'jsonl'):
+        return requested
+    name = (uploaded.name or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return None
+
+
+# ---- importing -------------------------------------------------------------
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def fail(self, row_number, errors):
+        self.errors.append({'row': row_number, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'success': not self.errors,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+
+class Importer:
+    model = None
+    serializer_class = None
+    key_field = None      # upsert key on the model
+    auth_role = None      # role of the UserAuth row each new profile gets, if any
+    password_field = None  # raw passwords in this column are hashed per chunk, not per row
+    cache_namespace = None
+
+    def run(self, rows, chunk_size=IMPORT_CHUNK_SIZE):
+        report = ImportReport()
+        for chunk in chunked(enumerate(rows, start=1), chunk_size):
+            self.import_chunk(chunk, report)
+        # bulk_create/bulk_update skip model signals, so invalidate cached listings here
+        if self.cache_namespace and (report.created or report.updated):
+            bump_version(self.cache_namespace)
+        return report
+
+    def key_for(self, row):
+        return row.get(self.key_field)
+
+    def import_chunk(self, chunk, report):
+        keys = [self.key_for(row) for _, row in chunk if isinstance(row, dict)]
+        existing = self.model.objects.in_bulk([k for k in keys if k not in (None, '')], field_name=self.key_field)
+        context = self.chunk_context(chunk)
+
+        seen = set()
+        to_create, to_update, unhashed = [], [], []
+        for number, row in chunk:
+            if not isinstance(row, dict) or '__error__' in row:
+                report.fail(number, row.get('__error__') if isinstance(row, dict) else "Row must be an object")
+                continue
+            key = self.key_for(row)
+            if key not in (None, ''):
+                if key in seen:
+                    report.fail(number, {self.key_field: ["Duplicate key in this file."]})
+                    continue
+                seen.add(key)
+            instance = existing.get(self._normalize_key(key))
+            serializer = self.serializer_class(instance, data=row, partial=instance is not None)
+            if not serializer.is_valid():
+                report.fail(number, serializer.errors)
+                continue
+            extra, errors = self.clean_extra(row, context)
+            if errors:
+                report.fail(number, errors)
+                continue
+            if instance is None:
+                instance = self.model(**serializer.validated_data)
+                to_create.append((instance, extra))
+            else:
+                for field, value in serializer.validated_data.items():
+                    setattr(instance, field, value)
+                to_update.append((instance, extra))
+            if self.password_field in serializer.validated_data:
+                unhashed.append(instance)
+
+        if unhashed:
+            hashed = hash_many([getattr(obj, self.password_field) for obj in unhashed])
+            for obj, value in zip(unhashed, hashed):
+                setattr(obj, self.password_field, value)
+
+        with transaction.atomic():
+            created = self.model.objects.bulk_create([obj for obj, _ in to_create])
+            if to_update:
+                self.model.objects.bulk_update([obj for obj, _ in to_update], self.update_fields())
+            self.after_save(list(zip(created, [e for _, e in to_create])), to_update)
+        report.created += len(to_create)
+        report.updated += len(to_update)
+
+    def update_fields(self):
+        concrete = {f.name for f in self.model._meta.concrete_fields if not f.primary_key}
+        return [f for f in self.serializer_class.Meta.fields if f in concrete]
+
+    def _normalize_key(self, key):
+        return key
+
+    def chunk_context(self, chunk):
+        return None
+
+    def clean_extra(self, row, context):
+        return None, None
+
+    def after_save(self, created, updated):
+        # Identity columns live on the profile only, so updated rows need nothing here
+        if self.auth_role:
+            UserAuth.objects.bulk_create([
+                UserAuth(**{self.auth_role: obj}, user_role=self.auth_role) for obj, _ in created
+            ])
+
+
+class HospitalImporter(Importer):
+    model = Hospital
+    serializer_class = HospitalSerializer
+    key_field = 'id'
+    cache_namespace = 'hospitals'
+
+    def run(self, rows, chunk_size=IMPORT_CHUNK_SIZE):
+        report = super().run(rows, chunk_size)
+        if report.created or report.updated:
+            record_change(THERAPIST_INDEX)
+        return report
+
+    def _normalize_key(self, key):
+        try:
+            return int(key)
+        except (TypeError, ValueError):
+            return None
+
+    def import_chunk(self, chunk, report):
+        # Unknown ids would silently create new rows; flag them instead
+        wanted = {self._normalize_key(row.get('id')) for _, row in chunk if isinstance(row, dict) and row.get('id')}
+        known = set(Hospital.objects.filter(id__in=wanted - {None}).values_list('id', flat=True))
+        kept = []
+        for number, row in chunk:
+            if isinstance(row, dict) and row.get('id') not in (None, '') and self._normalize_key(row['id']) not in known:
+                report.fail(number, {'id': ["Hospital with this id does not exist."]})
+            else:
+                kept.append((number, row))
+        super().import_chunk(kept, report)
+
+
+class CustomerImporter(Importer):
+    model = Customer
+    serializer_class = CustomerImportSerializer
+    key_field = 'customer_email'
+    auth_role = 'customer'
+    password_field = 'customer_password'
+    cache_namespace = 'customers'
+
+
+class TherapistImporter(Importer):
+    model = Therapist
+    serializer_class = TherapistImportSerializer
+    key_field = 'therapist_email'
+    auth_role = 'therapist'
+    password_field = 'therapist_password'
+
+    def chunk_context(self, chunk):
+        wanted = set()
+        for _, row in chunk:
+            if isinstance(row, dict):
+                wanted.update(str(h) for h in _split_ids(row.get('hospital')))
+        ids = [int(h) for h in wanted if h.isdigit()]
+        return set(Hospital.objects.filter(id__in=ids).values_list('id', flat=True))
+
+    def clean_extra(self, row, known_hospitals):
+        if 'hospital' not in row:
+            return None, None
+        raw = [str(h) for h in _split_ids(row['hospital'])]
+        invalid = [h for h in raw if not h.isdigit() or int(h) not in known_hospitals]
+        if invalid:
+            return None, {'hospital': [f"Unknown hospital id(s): {', '.join(invalid)}"]}
+        return list(dict.fromkeys(int(h) for h in raw)), None
+
+    def after_save(self, created, updated):
+        super().after_save(created, updated)
+        through = Therapist.hospital.through
+        replaced = [obj.id for obj, hospitals in updated if hospitals is not None]
+        if replaced:
+            through.objects.filter(therapist_id__in=replaced).delete()
+        through.objects.bulk_create([
+            through(therapist_id=obj.id, hospital_id=hospital_id)
+            for obj, hospitals in list(created) + list(updated) if hospitals
+            for hospital_id in hospitals
+        ])
+        # bulk_create/bulk_update skip model signals; drop cached profiles and tell the
+        # indexes once the chunk commits, so no one rebuilds from uncommitted rows
+        updated_ids = [obj.id for obj, _ in updated]
+        changed_ids = [obj.id for obj, _ in created] + updated_ids
+        transaction.on_commit(lambda: self._invalidate(updated_ids, changed_ids))
+
+    def _invalidate(self, updated_ids, changed_ids):
+        for therapist_id in updated_ids:
+            bump_version(therapist_namespace(therapist_id))
+        record_change(THERAPIST_INDEX, changed_ids)
+
+
+IMPORTERS = {
+    'hospitals': HospitalImporter,
+    'customers': CustomerImporter,
+    'therapists': TherapistImporter,
+}
+
+
+# ---- exporting -------------------------------------------------------------
+
+EXPORT_FIELDS = {
+    'hospitals': (Hospital, ['id', 'name', 'address']),
+    'customers': (Customer, [
+        'id', 'customer_name', 'customer_email', 'customer_phone', 'customer_age', 'customer_gender',
+    ]),
+    'therapists': (Therapist, [
+        'id', 'therapist_name', 'therapist_email', 'therapist_phone', 'year_of_experience',
+        'therapist_specialization', 'therapist_qualification', 'therapist_status',
+        'therapist_Serve_for', 'therapist_gender',
+    ]),
+}
+
+
+def export_rows(resource, chunk_size=EXPORT_CHUNK_SIZE):
+    model, fields = EXPORT_FIELDS[resource]
+    rows = model.objects.order_by('id').values(*fields).iterator(chunk_size=chunk_size)
+    if resource != 'therapists':
+        yield from rows
+        return
+    # Attach hospital ids one chunk at a time instead of joining (which would repeat rows)
+    through = Therapist.hospital.through
+    for chunk in chunked(rows, chunk_size):
+        hospitals = {}
+        links = through.objects.filter(therapist_id__in=[r['id'] for r in chunk]).order_by('hospital_id')
+        for therapist_id, hospital_id in links.values_list('therapist_id', 'hospital_id'):
+            hospitals.setdefault(therapist_id, []).append(hospital_id)
+        for row in chunk:
+            row['hospital'] = hospitals.get(row['id'], [])
+            yield row
+
+
+def export_columns(resource):
+    columns = list(EXPORT_FIELDS[resource][1])
+    if resource == 'therapists':
+        columns.append('hospital')
+    return columns
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def stream_csv(resource, chunk_size=EXPORT_CHUNK_SIZE):
+    columns = export_columns(resource)
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in export_rows(resource, chunk_size):
+        if 'hospital' in row:
+            row['hospital'] = '|'.join(str(h) for h in row['hospital'])
+        yield writer.writerow([row[c] for c in columns])
+
+
+def stream_jsonl(resource, chunk_size=EXPORT_CHUNK_SIZE):
+    for row in export_rows(resource, chunk_size):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
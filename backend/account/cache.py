@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags
+
+COUNT_TTL = 60 * 10
+PAYLOAD_TTL = 60 * 60
+STALE_TTL = 60 * 5
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+CHANGE_TTL = 60 * 60
+MAX_CHANGES = 500
+EVERYTHING = '*'
+# Change log for the in-memory therapist indexes (facets, autocomplete)
+THERAPIST_INDEX = 'therapist_index'
+
+
+def get_version(namespace):
+    # Versions live in the cache too; losing one just means a fresh namespace
+    key = f'version:{namespace}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def therapist_namespace(therapist_id):
+    return f'therapist:{therapist_id}'
+
+
+def bump_version(namespace):
+    key = f'version:{namespace}'
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+        return 2
+
+
+def cached_count(namespace, queryset, filters):
+    """COUNT(*) for a filtered admin listing, cached until the namespace version changes."""
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+    key = f'count:{namespace}:{get_version(namespace)}:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, COUNT_TTL)
+    return total
+
+
+def etag_for(data):
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def cached_payload(namespace, name, build, ttl=PAYLOAD_TTL):
+    """Serialized response data for a public read, cached until the namespace version changes.
+
+    build() must return plain (picklable) data; the entry is stored together with
+    its strong ETag so conditional requests never touch the database.
+    """
+    key = f'payload:{namespace}:{get_version(namespace)}:{name}'
+    entry = cache.get(key)
+    if entry is None:
+        data = build()
+        entry = (data, etag_for(data))
+        cache.set(key, entry, ttl)
+    return entry
+
+
+def not_modified(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # Weak comparison: compression turns the ETag into W/"..."
+    return header.strip() == '*' or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in parse_etags(header)}
+
+
+def single_flight(key, build, ttl, stale_ttl=STALE_TTL, lock_timeout=LOCK_TIMEOUT):
+    """Cache build() under key, letting only one caller recompute it at a time.
+
+    Entries stay in the cache for stale_ttl past their freshness so that when a hot
+    key expires, the caller holding the lock rebuilds while everyone else keeps
+    serving the old copy. On a cold miss the others wait briefly for the winner.
+    A None result (e.g. a missing row) is returned but never cached.
+    """
+    entry = cache.get(key)
+    if entry is not None and entry[1] > time.time():
+        return entry[0]
+
+    lock_key = f'lock:{key}'
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            data = build()
+            if data is not None:
+                cache.set(key, (data, time.time() + ttl), ttl + stale_ttl)
+            return data
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        return entry[0]
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if cache.get(lock_key) is None:
+            break
+    # Winner failed or is too slow; compute without caching rather than fail the request
+    return build()
+
+
+def record_change(namespace, ids=None):
+    """Bump namespace and log which rows changed, so in-memory indexes can catch up.
+
+    ids=None means "everything" and forces readers to rebuild.
+    """
+    version = bump_version(namespace)
+    cache.set(f'changes:{namespace}:{version}', EVERYTHING if ids is None else list(ids), CHANGE_TTL)
+    return version
+
+
+def changes_since(namespace, since):
+    """Return (current version, changed ids); ids is None when a full rebuild is needed."""
+    version = get_version(namespace)
+    if since is None or version < since or version - since > MAX_CHANGES:
+        return version, None
+    if version == since:
+        return version, set()
+    keys = [f'changes:{namespace}:{v}' for v in range(since + 1, version + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys) or EVERYTHING in found.values():
+        return version, None
+    return version, set().union(*found.values())
+
+
+class ChangeLogIndex:
+    """Base for the per-process in-memory indexes that follow a change-log namespace.
+
+    sync() hands the rows changed since the last call to _apply(), and calls
+    _rebuild() when the log has a gap, when _stale() says so, or once the index is
+    older than INDEX_MAX_AGE seconds. The age limit matters with a per-process
+    cache (LocMemCache): changes made in other workers never reach this process's
+    log, so a periodic rebuild is the only way to see them. Subclasses hold
+    self._lock around sync() and their reads.
+    """
+
+    namespace = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._built_at = None
+        self._reset()
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _rebuild(self):
+        raise NotImplementedError
+
+    def _apply(self, changed):
+        raise NotImplementedError
+
+    def _stale(self):
+        return False
+
+    def sync(self):
+        version, changed = changes_since(self.namespace, self._version)
+        now = time.monotonic()
+        if changed is None or self._built_at is None or now - self._built_at >= settings.INDEX_MAX_AGE \
+                or self._stale():
+            self._rebuild()
+            self._built_at = now
+        elif changed:
+            self._apply(changed)
+        self._version = version
+
+
+# ---- async variants for the ASGI views --------------------------------------
+
+async def aget_version(namespace):
+    key = f'version:{namespace}'
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, 1, None)
+        version = await cache.aget(key, 1)
+    return version
+
+
+async def asingle_flight(key, build, ttl, stale_ttl=STALE_TTL, lock_timeout=LOCK_TIMEOUT):
+    """single_flight for coroutines: waiting callers yield to the event loop instead of a thread."""
+    entry = await cache.aget(key)
+    if entry is not None and entry[1] > time.time():
+        return entry[0]
+
+    lock_key = f'lock:{key}'
+    if await cache.aadd(lock_key, 1, lock_timeout):
+        try:
+            data = await build()
+            if data is not None:
+                await cache.aset(key, (data, time.time() + ttl), ttl + stale_ttl)
+            return data
+        finally:
+            await cache.adelete(lock_key)
+
+    if entry is not None:
+        return entry[0]
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry[0]
+        if await cache.aget(lock_key) is None:
+            break
+    return await build()
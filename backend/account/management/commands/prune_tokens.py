@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from account.tokens import PRUNE_BATCH_SIZE, prune_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=0,
+                            help="Seconds to pause between batches to keep lock times short.")
+
+    def handle(self, *args, **options):
+        deleted = prune_tokens(options['batch_size'], options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired tokens."))
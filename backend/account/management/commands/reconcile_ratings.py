@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from account.ratings import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute therapist rating aggregates from reviews and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted therapists without fixing them.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = reconcile(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        verb = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(fixed)} therapist(s) with drifted ratings."))
+        if fixed and options['verbosity'] > 1:
+            self.stdout.write("Therapist ids: " + ", ".join(str(pk) for pk in fixed))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0007_hospital_remove_therapist_hospital_address_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['customer_gender', 'customer_age'], name='customer_gender_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['customer_age'], name='customer_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='therapistrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='therapistreq_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='therapistrequest',
+            index=models.Index(fields=['status', '-created_at'], name='therapistreq_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_admin_listing_indexes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userauth',
+            index=models.Index(fields=['content_type', 'object_id'], name='userauth_profile_idx'),
+        ),
+    ]
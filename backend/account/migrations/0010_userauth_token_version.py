@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0009_userauth_profile_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userauth',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:10
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Therapist = apps.get_model('account', 'Therapist')
+    rows = Therapist.objects.annotate(
+        actual_count=Count('review', filter=Q(review__review_rating__isnull=False)),
+        actual_sum=Sum('review__review_rating'),
+    ).filter(actual_count__gt=0).values_list('id', 'actual_count', 'actual_sum')
+    Therapist.objects.bulk_update([
+        Therapist(id=pk, rating_count=count, rating_sum=total, rating_avg=total / count)
+        for pk, count, total in rows
+    ], ['rating_count', 'rating_sum', 'rating_avg'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0011_outstandingtoken_expires_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='therapist',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='therapist',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='therapist',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['therapist', '-review_date'], name='review_therapist_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='therapist',
+            index=models.Index(fields=['-rating_avg', '-rating_count', 'id'], name='therapist_rating_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0012_therapist_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='therapist',
+            name='next_available_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='therapist',
+            index=models.Index(fields=['therapist_name'], name='therapist_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='therapist',
+            index=models.Index(fields=['-year_of_experience', 'id'], name='therapist_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='therapist',
+            index=models.Index(fields=['next_available_date', 'id'], name='therapist_available_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import migrations
+
+BATCH_SIZE = 500
+PASSWORD_COLUMNS = [
+    ('Customer', 'customer_password'),
+    ('Therapist', 'therapist_password'),
+    ('TherapistRequest', 'password'),
+    ('Admin', 'admin_password'),
+    ('UserAuth', 'user_password'),
+]
+
+
+def _is_hashed(value):
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def hash_passwords(apps, schema_editor):
+    # Plaintext values are hashed with the default hasher, a batch at a time across
+    # every core (hashlib releases the GIL); values that already hash are left alone
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        for model_name, column in PASSWORD_COLUMNS:
+            model = apps.get_model('account', model_name)
+            rows = model.objects.exclude(**{f'{column}__isnull': True}).exclude(**{column: ''}).order_by('pk')
+            last = 0
+            # Keyset batches, so no cursor is left open over rows being rewritten
+            while True:
+                page = list(rows.filter(pk__gt=last).values_list('pk', column)[:BATCH_SIZE])
+                if not page:
+                    break
+                last = page[-1][0]
+                _store(model, column, [(pk, value) for pk, value in page if not _is_hashed(value)], pool)
+
+
+def _store(model, column, batch, pool):
+    if not batch:
+        return
+    hashed = pool.map(make_password, [value for _, value in batch])
+    model.objects.bulk_update(
+        [model(pk=pk, **{column: encoded}) for (pk, _), encoded in zip(batch, hashed)],
+        [column], batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0013_therapist_sort_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_passwords, migrations.RunPython.noop),
+    ]
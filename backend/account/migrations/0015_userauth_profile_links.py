@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+PROFILES = {'customer': 'Customer', 'therapist': 'Therapist', 'admin': 'Admin'}
+
+
+def link_profiles(apps, schema_editor):
+    """Point each UserAuth row at its profile through the new one-to-one key.
+
+    The password login accepted (the UserAuth copy) is carried over to the
+    profile, since profile edits never reached it. Rows whose profile is gone,
+    and extra rows for a profile that already has one, are dropped.
+    """
+    UserAuth = apps.get_model('account', 'UserAuth')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    roles = {ct.id: ct.model for ct in ContentType.objects.filter(app_label='account', model__in=PROFILES)}
+    stale = []
+    for role, model_name in PROFILES.items():
+        Profile = apps.get_model('account', model_name)
+        content_type_ids = [ct_id for ct_id, model in roles.items() if model == role]
+        rows = UserAuth.objects.filter(content_type_id__in=content_type_ids).order_by('id')
+        linked = set()
+        last = 0
+        while True:
+            page = list(rows.filter(id__gt=last).values_list('id', 'object_id', 'user_password')[:BATCH_SIZE])
+            if not page:
+                break
+            last = page[-1][0]
+            profiles = set(Profile.objects.filter(id__in=[object_id for _, object_id, _ in page])
+                           .values_list('id', flat=True))
+            auths, passwords = [], []
+            for auth_id, object_id, password in page:
+                if object_id not in profiles or object_id in linked:
+                    stale.append(auth_id)
+                    continue
+                linked.add(object_id)
+                auths.append(UserAuth(id=auth_id, **{f'{role}_id': object_id}))
+                if password:
+                    passwords.append(Profile(id=object_id, **{f'{role}_password': password}))
+            UserAuth.objects.bulk_update(auths, [f'{role}_id'], batch_size=BATCH_SIZE)
+            Profile.objects.bulk_update(passwords, [f'{role}_password'], batch_size=BATCH_SIZE)
+    stale += UserAuth.objects.exclude(content_type_id__in=roles).values_list('id', flat=True)
+    for batch_start in range(0, len(stale), BATCH_SIZE):
+        UserAuth.objects.filter(id__in=stale[batch_start:batch_start + BATCH_SIZE]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0014_hash_passwords'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userauth',
+            name='userauth_profile_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='userauth',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='userauth',
+            name='admin',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='auth', to='account.admin'),
+        ),
+        migrations.AddField(
+            model_name='userauth',
+            name='customer',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='auth', to='account.customer'),
+        ),
+        migrations.AddField(
+            model_name='userauth',
+            name='therapist',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='auth', to='account.therapist'),
+        ),
+        migrations.RunPython(link_profiles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userauth',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('admin__isnull', True), ('customer__isnull', False), ('therapist__isnull', True)), models.Q(('admin__isnull', True), ('customer__isnull', True), ('therapist__isnull', False)), models.Q(('admin__isnull', False), ('customer__isnull', True), ('therapist__isnull', True)), _connector='OR'), name='userauth_one_profile'),
+        ),
+        migrations.RemoveField(
+            model_name='userauth',
+            name='content_type',
+        ),
+        migrations.RemoveField(
+            model_name='userauth',
+            name='object_id',
+        ),
+        migrations.RemoveField(
+            model_name='userauth',
+            name='user_email',
+        ),
+        migrations.RemoveField(
+            model_name='userauth',
+            name='user_name',
+        ),
+        migrations.RemoveField(
+            model_name='userauth',
+            name='user_password',
+        ),
+    ]
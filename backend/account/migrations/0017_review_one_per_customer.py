@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:05
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def dedupe_reviews(apps, schema_editor):
+    # Keep each customer's newest review of a therapist, then recount the therapists
+    # whose aggregates included the dropped duplicates
+    Review = apps.get_model('account', 'Review')
+    Therapist = apps.get_model('account', 'Therapist')
+    groups = (Review.objects.values('customer_id', 'therapist_id')
+              .annotate(n=Count('id'), keep=Max('id')).filter(n__gt=1))
+    affected = set()
+    for group in groups:
+        Review.objects.filter(customer_id=group['customer_id'], therapist_id=group['therapist_id']) \
+            .exclude(id=group['keep']).delete()
+        affected.add(group['therapist_id'])
+    totals = Therapist.objects.filter(id__in=affected).annotate(
+        actual_count=Count('review', filter=Q(review__review_rating__isnull=False)),
+        actual_sum=Sum('review__review_rating'),
+    ).values_list('id', 'actual_count', 'actual_sum')
+    for pk, count, total in totals:
+        total = total or 0
+        Therapist.objects.filter(id=pk).update(
+            rating_count=count, rating_sum=total, rating_avg=total / count if count else 0.0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0016_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('customer', 'therapist'), name='review_one_per_customer_therapist'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0017_review_one_per_customer'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='hospital',
+            options={'ordering': ['id']},
+        ),
+    ]
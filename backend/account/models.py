@@ -1,6 +1,6 @@
 from django.db import models
-from django.contrib.contenttypes.models import ContentType
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
 
 # Create your models here.
 class Customer(models.Model):
@@ -20,6 +20,12 @@ class Customer(models.Model):
     )
     customer_gender=models.CharField(max_length=150,choices=customer_gender_choice,default='no choice' , blank=True,null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer_gender', 'customer_age'], name='customer_gender_age_idx'),
+            models.Index(fields=['customer_age'], name='customer_age_idx'),
+        ]
+
     def __str__(self):
        return self.customer_name
     
@@ -27,6 +33,10 @@ class Hospital(models.Model):
     name = models.CharField(max_length=200)
     address = models.TextField()
 
+    class Meta:
+        # Gives nested hospital lists one order on the DRF and compiled paths
+        ordering = ['id']
+
     def __str__(self):
         return self.name
     
@@ -55,6 +65,21 @@ class Therapist(models.Model):
     therapist_gender=models.CharField(max_length=150,choices=therapist_gender_choice,default='no choice')
     hospital = models.ManyToManyField(Hospital,related_name='therapist', blank=True)
 
+    # Denormalized from Review; kept in step by account.ratings, repaired by reconcile_ratings
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+    # Soonest day with a free slot, kept by therapy.availability; NULL means today
+    next_available_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating_avg', '-rating_count', 'id'], name='therapist_rating_idx'),
+            models.Index(fields=['therapist_name'], name='therapist_name_idx'),
+            models.Index(fields=['-year_of_experience', 'id'], name='therapist_experience_idx'),
+            models.Index(fields=['next_available_date', 'id'], name='therapist_available_idx'),
+        ]
+
     def __str__(self):
        return self.therapist_name
    
@@ -88,6 +113,12 @@ class TherapistRequest(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='therapistreq_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='therapistreq_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.status})"    
 
@@ -103,14 +134,16 @@ class Admin(models.Model):
     
 
 class UserAuth(models.Model):
-    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    object_id = models.BigIntegerField()  
-    user_object = GenericForeignKey('content_type', 'object_id')
-    
-    user_name = models.CharField(max_length=100,blank=True,null=True)
-    user_email = models.EmailField(max_length=100,blank=True,null=True)
-    user_password = models.CharField(max_length=200,blank=True,null=True)
+    # Login identity of exactly one profile; name, email and password are read from it
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, blank=True, null=True, related_name='auth')
+    therapist = models.OneToOneField(Therapist, on_delete=models.CASCADE, blank=True, null=True, related_name='auth')
+    admin = models.OneToOneField(Admin, on_delete=models.CASCADE, blank=True, null=True, related_name='auth')
+
     user_role = models.CharField(max_length=20,blank=True,null=True)
+    token_version = models.PositiveIntegerField(default=0)  # bump to revoke issued tokens
+
+    # Joins that load the profile along with the row
+    PROFILES = ('customer', 'therapist', 'admin')
 
     def __str__(self):
        return f"{self.user_name}-{self.user_role}"
@@ -119,8 +152,37 @@ class UserAuth(models.Model):
     def is_authenticated(self):
      return True
 
+    @property
+    def profile(self):
+        return getattr(self, self.user_role) if self.user_role in self.PROFILES else None
+
+    def _profile_field(self, name):
+        profile = self.profile
+        return getattr(profile, f'{self.user_role}_{name}') if profile is not None else None
+
+    @property
+    def user_name(self):
+        return self._profile_field('name')
+
+    @property
+    def user_email(self):
+        return self._profile_field('email')
+
+    @property
+    def user_password(self):
+        return self._profile_field('password')
+
     class Meta:
-        unique_together = ('user_email','user_role')
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    Q(customer__isnull=False, therapist__isnull=True, admin__isnull=True)
+                    | Q(customer__isnull=True, therapist__isnull=False, admin__isnull=True)
+                    | Q(customer__isnull=True, therapist__isnull=True, admin__isnull=False)
+                ),
+                name='userauth_one_profile',
+            ),
+        ]
     
 class Review(models.Model):
     customer=models.ForeignKey(Customer,on_delete=models.CASCADE)
@@ -129,7 +191,41 @@ class Review(models.Model):
     review_rating=models.IntegerField(blank=True,null=True)
     review_date=models.DateTimeField(auto_now=True,blank=True,null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['therapist', '-review_date'], name='review_therapist_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'therapist'], name='review_one_per_customer_therapist'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored rating so an update can adjust the aggregates by the difference
+        instance = super().from_db(db, field_names, values)
+        instance._stored = (instance.__dict__.get('therapist_id'), instance.__dict__.get('review_rating'))
+        return instance
+
     def __str__(self):
        return f"Review by {self.customer.customer_name} for {self.therapist.therapist_name}"
 
 
+
+
+class IdempotencyKey(models.Model):
+    """A POST seen with an Idempotency-Key header and, once it finished, its response.
+
+    Kept in the database so retries that reach a different worker process
+    still find it; rows past expires_at are ignored and pruned by a job.
+    """
+    # sha256 of path, caller and the client's key
+    key=models.CharField(max_length=64,unique=True)
+    fingerprint=models.CharField(max_length=64)
+    # Null while the first request is still running
+    status_code=models.PositiveSmallIntegerField(blank=True,null=True)
+    response=models.JSONField(blank=True,null=True,encoder=DjangoJSONEncoder)
+    created_at=models.DateTimeField(auto_now_add=True)
+    expires_at=models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key[:12]} ({self.status_code or 'running'})"
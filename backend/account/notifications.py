@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.mail import send_mass_mail
+
+from .bulk import chunked
+from jobs.tasks import enqueue, task
+
+MAIL_BATCH_SIZE = 100
+
+
+@task
+def send_mails(messages):
+    """Send [subject, message, from, recipients] lists over one SMTP connection."""
+    send_mass_mail([tuple(message) for message in messages], fail_silently=False)
+
+
+def queue_mass_mail(messages):
+    """Queue (subject, message, recipients) notifications for the job workers.
+
+    The jobs are written in the current transaction: a rolled-back approval
+    never emails anyone, and the view does not wait on SMTP. Messages queued
+    together go out in batches of MAIL_BATCH_SIZE per SMTP session. A batch is
+    retried as a whole, so if SMTP fails partway through one, recipients whose
+    mail already went out get it again on the retry.
+    """
+    messages = [[subject, message, settings.DEFAULT_FROM_EMAIL, list(recipients)]
+                for subject, message, recipients in messages]
+    for batch in chunked(messages, MAIL_BATCH_SIZE):
+        enqueue(send_mails, [batch])
+
+
+def queue_mail(subject, message, recipients):
+    queue_mass_mail([(subject, message, recipients)])
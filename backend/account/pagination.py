@@ -0,0 +1,29 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+class AdminCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-id'
+
+    def __init__(self, total=None, ordering=None):
+        self.total = total
+        if ordering:
+            self.ordering = ordering
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.total,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class DirectoryPagination(PageNumberPagination):
+    # Opt-in: public listings stay plain lists unless page_size is given
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
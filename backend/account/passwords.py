@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+class Busy(Exception):
+    """Every verification slot is taken; the caller should answer 503."""
+
+
+def _executor():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.PASSWORD_VERIFY_WORKERS
+                _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_VERIFY_QUEUE)
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-verify')
+    return _pool, _slots
+
+
+def is_hashed(value):
+    if not value:
+        return False
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def hash_password(raw):
+    """The encoded hash to store for a password a client sent.
+
+    Always hashed, even when the value looks like an encoded hash: a client must
+    not be able to pick the hasher or work factor its password is stored with.
+    """
+    if raw is None:
+        return raw
+    return make_password(raw)
+
+
+def ensure_hashed(value):
+    """Like hash_password, but values that are already hashed pass through.
+
+    Only for internal copy paths (e.g. the benchmark loader) whose input is trusted.
+    """
+    if value is None or is_hashed(value):
+        return value
+    return make_password(value)
+
+
+def hash_many(values, keep_hashed=False):
+    """hash_password over a batch, spread across the verification workers.
+
+    With keep_hashed, values that are already hashed pass through as in
+    ensure_hashed; only for trusted internal copy paths.
+    """
+    pool, _ = _executor()
+    return list(pool.map(ensure_hashed if keep_hashed else hash_password, values))
+
+
+def _check(raw, encoded):
+    # (matches, new encoded hash if the stored one was made with other settings)
+    rehashed = []
+    try:
+        ok = is_hashed(encoded) and check_password(raw, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    except ValueError:
+        # e.g. a hasher whose library is missing, or a malformed hash: treat as no match
+        return False, None
+    return ok, rehashed[0] if rehashed else None
+
+
+def _submit(raw, encoded):
+    pool, slots = _executor()
+    # Never wait for a slot: a login flood gets 503s instead of an ever-growing queue
+    if not slots.acquire(blocking=False):
+        raise Busy()
+    try:
+        future = pool.submit(_check, raw, encoded)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def verify(raw, encoded):
+    """(matches, rehash) for a login attempt, checked on the bounded hashing pool.
+
+    rehash is the new encoded value to store when the password matched but was
+    hashed with an outdated hasher or work factor, else None. Plaintext values
+    never match. Raises Busy when the pool's queue is full.
+    """
+    return _submit(raw, encoded).result()
+
+
+async def averify(raw, encoded):
+    """verify() for async views; the event loop stays free while the hash runs."""
+    return await asyncio.wrap_future(_submit(raw, encoded))
@@ -0,0 +1,79 @@
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .cache import bump_version, therapist_namespace
+from .models import Therapist
+
+
+def _contribution(rating):
+    return (0, 0) if rating is None else (1, rating)
+
+
+def apply_rating(therapist_id, count_delta, sum_delta):
+    """Adjust a therapist's rating aggregates in a single UPDATE, safe under concurrent reviews."""
+    if therapist_id is None or (not count_delta and not sum_delta):
+        return
+    new_count = F('rating_count') + count_delta
+    Therapist.objects.filter(id=therapist_id).update(
+        rating_count=new_count,
+        rating_sum=F('rating_sum') + sum_delta,
+        # Every right-hand side reads the pre-update row, so the average uses the new totals
+        rating_avg=Case(
+            When(rating_count__gt=-count_delta,
+                 then=Cast(F('rating_sum') + sum_delta, FloatField()) / Cast(new_count, FloatField())),
+            default=Value(0.0),
+        ),
+    )
+    bump_version(therapist_namespace(therapist_id))
+
+
+def review_saved(review, created):
+    stored = getattr(review, '_stored', None)
+    if not created and stored is None:
+        # Saved without being loaded first: the previous rating is unknown, so recount
+        reconcile([review.therapist_id])
+    else:
+        old_therapist, old_rating = stored if stored else (None, None)
+        old_count, old_sum = _contribution(old_rating)
+        new_count, new_sum = _contribution(review.review_rating)
+        if old_therapist == review.therapist_id:
+            apply_rating(review.therapist_id, new_count - old_count, new_sum - old_sum)
+        else:
+            apply_rating(old_therapist, -old_count, -old_sum)
+            apply_rating(review.therapist_id, new_count, new_sum)
+    review._stored = (review.therapist_id, review.review_rating)
+
+
+def review_deleted(review):
+    therapist_id, rating = getattr(review, '_stored', None) or (review.therapist_id, review.review_rating)
+    count, total = _contribution(rating)
+    apply_rating(therapist_id, -count, -total)
+
+
+def reconcile(therapist_ids=None, dry_run=False, batch_size=1000):
+    """Recompute aggregates from Review and fix therapists that drifted. Returns the fixed ids."""
+    therapists = Therapist.objects.order_by('id')
+    if therapist_ids is not None:
+        therapists = therapists.filter(id__in=therapist_ids)
+    therapists = therapists.annotate(
+        actual_count=Count('review', filter=Q(review__review_rating__isnull=False)),
+        actual_sum=Sum('review__review_rating'),
+    ).values_list('id', 'rating_count', 'rating_sum', 'rating_avg', 'actual_count', 'actual_sum')
+
+    fixed, pending = [], []
+    for pk, count, total, avg, actual_count, actual_sum in list(therapists):
+        actual_sum = actual_sum or 0
+        actual_avg = actual_sum / actual_count if actual_count else 0.0
+        if (count, total) == (actual_count, actual_sum) and abs(avg - actual_avg) < 1e-9:
+            continue
+        fixed.append(pk)
+        pending.append(Therapist(id=pk, rating_count=actual_count, rating_sum=actual_sum, rating_avg=actual_avg))
+        if not dry_run and len(pending) >= batch_size:
+            Therapist.objects.bulk_update(pending, ['rating_count', 'rating_sum', 'rating_avg'])
+            pending = []
+    if not dry_run and pending:
+        Therapist.objects.bulk_update(pending, ['rating_count', 'rating_sum', 'rating_avg'])
+    if not dry_run:
+        for pk in fixed:
+            bump_version(therapist_namespace(pk))
+    return fixed
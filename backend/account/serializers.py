@@ -1,6 +1,7 @@
 # serializers.py
 from rest_framework import serializers
 from .models import Customer, Therapist, Admin, UserAuth, Review ,TherapistRequest,Hospital
+from .passwords import hash_password
 
 class HospitalSerializer(serializers.ModelSerializer):
     class Meta:
@@ -28,6 +29,7 @@ class CustomerSerializer(serializers.ModelSerializer):
             'customer_gender',
             'confirm_password',
         ]
+        extra_kwargs = {'customer_password': {'write_only': True}}
 
     def validate(self, data):
      password = data.get("customer_password")
@@ -37,6 +39,8 @@ class CustomerSerializer(serializers.ModelSerializer):
         raise serializers.ValidationError("Passwords do not match")
      else:
         data.pop("confirm_password", None)  
+     if password:
+        data["customer_password"] = hash_password(password)
      return data
 
 class TherapistSerializer(serializers.ModelSerializer):
@@ -59,7 +63,88 @@ class TherapistSerializer(serializers.ModelSerializer):
             'therapist_role',
             'therapist_gender',
             'hospital',
+            'rating_count',
+            'rating_avg',
+            'next_available_date',
         ]
+        read_only_fields = ['rating_count', 'rating_avg', 'next_available_date']
+        extra_kwargs = {'therapist_password': {'write_only': True}}
+
+    def validate_therapist_password(self, value):
+        return hash_password(value)
+
+# Compact rows for paginated admin listings (no images, files or passwords)
+class CustomerRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = [
+            'id',
+            'customer_name',
+            'customer_email',
+            'customer_phone',
+            'customer_age',
+            'customer_gender',
+        ]
+
+class TherapistRequestRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TherapistRequest
+        fields = [
+            'id',
+            'name',
+            'email',
+            'phone',
+            'specialization',
+            'gender',
+            'status',
+            'created_at',
+        ]
+
+# Row serializers for bulk import: uniqueness is handled by upserting on the email key,
+# and passwords are hashed a chunk at a time by the importer (account.bulk)
+class CustomerImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = [
+            'customer_name',
+            'customer_email',
+            'customer_phone',
+            'customer_age',
+            'customer_gender',
+            'customer_password',
+        ]
+        extra_kwargs = {
+            'customer_email': {'required': True, 'allow_null': False, 'validators': []},
+        }
+
+    def validate(self, data):
+        if self.instance is None and not data.get('customer_password'):
+            raise serializers.ValidationError({"customer_password": ["This field is required for new customers."]})
+        return data
+
+class TherapistImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Therapist
+        fields = [
+            'therapist_name',
+            'therapist_email',
+            'therapist_phone',
+            'year_of_experience',
+            'therapist_specialization',
+            'therapist_qualification',
+            'therapist_status',
+            'therapist_Serve_for',
+            'therapist_gender',
+            'therapist_password',
+        ]
+        extra_kwargs = {
+            'therapist_email': {'required': True, 'allow_null': False, 'validators': []},
+        }
+
+    def validate(self, data):
+        if self.instance is None and not data.get('therapist_password'):
+            raise serializers.ValidationError({"therapist_password": ["This field is required for new therapists."]})
+        return data
 
 class TherapistRequestSerializer(serializers.ModelSerializer):
     confirm_password = serializers.CharField(write_only=True)
@@ -87,6 +172,7 @@ class TherapistRequestSerializer(serializers.ModelSerializer):
             'status',
         ]
         read_only_fields = ['status']
+        extra_kwargs = {'password': {'write_only': True}}
 
     def validate(self, data):
         password = data.get("password")
@@ -96,6 +182,8 @@ class TherapistRequestSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Passwords do not match")
         else:
             data.pop("confirm_password", None)  
+        if password:
+            data["password"] = hash_password(password)
         return data
     
     
@@ -109,27 +197,34 @@ class AdminSerializer(serializers.ModelSerializer):
             'admin_password',
             'admin_role',
         ]
+        extra_kwargs = {'admin_password': {'write_only': True}}
+
+    def validate_admin_password(self, value):
+        return hash_password(value)
 
 class UserAuthSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserAuth
         fields = [
             'id',
-            'content_type',
-            'object_id',
-            'user_name',
-            'user_email',
-            'user_password',
+            'customer',
+            'therapist',
+            'admin',
             'user_role',
         ]
 
 class ReviewSerializer(serializers.ModelSerializer):
+    customer_name = serializers.CharField(source='customer.customer_name', read_only=True)
+    review_rating = serializers.IntegerField(min_value=1, max_value=5)
+
     class Meta:
         model = Review
         fields = [
             'id',
             'customer',
+            'customer_name',
             'therapist',
             'review_rating',
             'review_date',
         ]
+        read_only_fields = ['customer', 'therapist']
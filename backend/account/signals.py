@@ -0,0 +1,64 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from django.core.cache import cache
+
+from .authentication import REVOKED, TOKEN_VERSION_TTL, token_version_key
+from .cache import THERAPIST_INDEX, bump_version, record_change, therapist_namespace
+from . import ratings
+from .models import Customer, Hospital, Review, Therapist, TherapistRequest, UserAuth
+
+
+@receiver([post_save, post_delete], sender=Customer)
+def customer_changed(sender, **kwargs):
+    bump_version('customers')
+
+
+@receiver([post_save, post_delete], sender=Hospital)
+def hospital_changed(sender, **kwargs):
+    bump_version('hospitals')
+    record_change(THERAPIST_INDEX)
+
+
+@receiver([post_save, post_delete], sender=Therapist)
+def therapist_changed(sender, instance, **kwargs):
+    bump_version(therapist_namespace(instance.id))
+    record_change(THERAPIST_INDEX, [instance.id])
+
+
+@receiver(m2m_changed, sender=Therapist.hospital.through)
+def therapist_hospitals_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            bump_version(therapist_namespace(instance.id))
+            record_change(THERAPIST_INDEX, [instance.id])
+        return
+    # Changed from the hospital side: pk_set holds therapist ids, except on clear
+    if action == 'pre_clear':
+        pk_set = list(instance.therapist.values_list('id', flat=True))
+    elif action not in ('post_add', 'post_remove'):
+        return
+    for therapist_id in pk_set:
+        bump_version(therapist_namespace(therapist_id))
+    record_change(THERAPIST_INDEX, pk_set)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    ratings.review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    ratings.review_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=TherapistRequest)
+def therapist_request_changed(sender, **kwargs):
+    bump_version('therapist_requests')
+
+
+@receiver(post_delete, sender=UserAuth)
+def user_auth_deleted(sender, instance, **kwargs):
+    # Claims-mode tokens of a deleted user must stop working before the cached version expires
+    cache.set(token_version_key(instance.id), REVOKED, TOKEN_VERSION_TTL)
@@ -1,3 +1,632 @@
-from django.test import TestCase
+import json
+import tracemalloc
+from importlib import import_module
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from Lets_heal.profiling import registry
+from jobs.tasks import sync_recurring
+from jobs.worker import run_due
+from . import passwords, throttling
+from .authentication import revoke_tokens
+from .models import Admin, Customer, Hospital, Therapist, TherapistRequest, UserAuth
+from .tokens import BloomFilter, UserAuthRefreshToken, blacklist_index
 
-# Create your tests here.
+
+# Test accounts are hashed with a cheap work factor; classes that log in use the same one
+cheap_hashing = override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+
+
+def make_user(model, role, **fields):
+    prefix = {'customer': 'customer', 'therapist': 'therapist', 'admin': 'admin'}[role]
+    if fields.get(f'{prefix}_password'):
+        with cheap_hashing:
+            fields[f'{prefix}_password'] = make_password(fields[f'{prefix}_password'])
+    profile = model.objects.create(**fields)
+    user_auth = UserAuth.objects.create(**{role: profile}, user_role=role)
+    return profile, user_auth
+
+
+def client_for(user_auth):
+    refresh = RefreshToken()
+    refresh['user_id'] = user_auth.id
+    refresh['email'] = user_auth.user_email
+    refresh['role'] = user_auth.user_role
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    return client
+
+
+class BulkImportExportTests(TestCase):
+    def setUp(self):
+        _, self.admin_auth = make_user(Admin, 'admin', admin_name='root', admin_email='root@example.com', admin_password='pw')
+        self.admin = client_for(self.admin_auth)
+        self.hospital = Hospital.objects.create(name='Square', address='Panthapath')
+
+    def upload(self, resource, name, content):
+        return self.admin.post(f'/api/admin/import/{resource}/', {'file': SimpleUploadedFile(name, content.encode())}, format='multipart')
+
+    def test_customer_csv_upsert_reports_row_errors(self):
+        Customer.objects.create(customer_name='Old', customer_email='old@example.com', customer_password='x')
+        response = self.upload('customers', 'c.csv', (
+            'customer_name,customer_email,customer_age,customer_password\n'
+            'New,new@example.com,30,pw\n'
+            'Renamed,old@example.com,,\n'
+            'Bad,not-an-email,20,pw\n'
+            'NoPass,nopass@example.com,20,\n'
+        ))
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['failed']), (1, 1, 2))
+        self.assertEqual([e['row'] for e in body['errors']], [3, 4])
+        self.assertEqual(Customer.objects.get(customer_email='old@example.com').customer_name, 'Renamed')
+        self.assertTrue(UserAuth.objects.filter(customer__customer_email='new@example.com', user_role='customer').exists())
+        # Hashed once per chunk on the worker pool, never per row during validation
+        self.assertTrue(passwords.verify('pw', Customer.objects.get(customer_email='new@example.com').customer_password)[0])
+        self.assertEqual(Customer.objects.get(customer_email='old@example.com').customer_password, 'x')
+
+    def test_therapist_jsonl_sets_hospitals(self):
+        lines = [
+            {'therapist_name': 'Dr A', 'therapist_email': 'a@example.com', 'therapist_password': 'pw', 'hospital': [self.hospital.id]},
+            {'therapist_name': 'Dr B', 'therapist_email': 'b@example.com', 'therapist_password': 'pw', 'hospital': [999]},
+        ]
+        with patch('account.bulk.record_change') as record_change, \
+                patch('account.bulk.hash_many', wraps=passwords.hash_many) as hash_many:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.upload('therapists', 't.jsonl', '\n'.join(json.dumps(l) for l in lines))
+            # The therapist index hears about the rows only once the chunk has committed
+            record_change.assert_not_called()
+            for callback in callbacks:
+                callback()
+        self.assertEqual(len(record_change.call_args.args[1]), 1)
+        hash_many.assert_called_once_with(['pw'])
+        body = response.json()
+        self.assertEqual((body['created'], body['failed']), (1, 1))
+        therapist = Therapist.objects.get(therapist_email='a@example.com')
+        self.assertEqual(list(therapist.hospital.all()), [self.hospital])
+
+    def test_streaming_exports(self):
+        therapist = Therapist.objects.create(therapist_name='Dr A', therapist_email='a@example.com')
+        therapist.hospital.add(self.hospital)
+
+        response = self.admin.get('/api/admin/export/therapists/csv/')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].endswith(',hospital'))
+        self.assertTrue(lines[1].endswith(f',{self.hospital.id}'))
+
+        response = self.admin.get('/api/admin/export/hospitals/jsonl/')
+        rows = [json.loads(l) for l in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [{'id': self.hospital.id, 'name': 'Square', 'address': 'Panthapath'}])
+
+    def test_admin_only(self):
+        _, customer_auth = make_user(Customer, 'customer', customer_name='c', customer_email='c@example.com', customer_password='pw')
+        self.assertEqual(client_for(customer_auth).get('/api/admin/export/customers/csv/').status_code, 403)
+
+
+class AdminListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _, admin_auth = make_user(Admin, 'admin', admin_name='root', admin_email='root@example.com', admin_password='pw')
+        self.admin = client_for(admin_auth)
+        for i in range(7):
+            Customer.objects.create(customer_name=f'C{i}', customer_email=f'c{i}@example.com',
+                                    customer_age=20 + i * 10, customer_gender='female' if i % 2 else 'male',
+                                    customer_image='image/x.png', customer_password='secret')
+
+    def test_cursor_pages_are_compact(self):
+        body = self.admin.get('/api/admin/customers/', {'page_size': 3}).json()
+        self.assertEqual(body['count'], 7)
+        self.assertEqual(len(body['results']), 3)
+        self.assertNotIn('customer_password', body['results'][0])
+        self.assertNotIn('customer_image', body['results'][0])
+
+        seen = [r['id'] for r in body['results']]
+        while body['next']:
+            body = self.admin.get(body['next']).json()
+            seen += [r['id'] for r in body['results']]
+        self.assertEqual(seen, sorted(Customer.objects.values_list('id', flat=True), reverse=True))
+
+    def test_filters_and_cached_count(self):
+        body = self.admin.get('/api/admin/customers/', {'gender': 'male', 'age_band': '30-60'}).json()
+        self.assertEqual([r['customer_name'] for r in body['results']], ['C4', 'C2'])
+        self.assertEqual(body['count'], 2)
+        self.assertEqual(self.admin.get('/api/admin/customers/', {'age_band': 'old'}).status_code, 400)
+
+        # second call serves the total from cache: auth + page query only
+        with self.assertNumQueries(2):
+            self.admin.get('/api/admin/customers/', {'gender': 'male', 'age_band': '30-60'})
+        Customer.objects.create(customer_name='C9', customer_email='c9@example.com', customer_age=35, customer_gender='male')
+        body = self.admin.get('/api/admin/customers/', {'gender': 'male', 'age_band': '30-60'}).json()
+        self.assertEqual(body['count'], 3)
+
+    def test_therapist_requests_by_status_and_date(self):
+        TherapistRequest.objects.create(name='A', email='a@example.com', status='pending')
+        TherapistRequest.objects.create(name='B', email='b@example.com', status='approved')
+        body = self.admin.get('/api/admin/therapist_requests/', {'status': 'pending'}).json()
+        self.assertEqual([r['name'] for r in body['results']], ['A'])
+        for bad in ('yesterday', '2024-02-30', '9999-12-31'):
+            response = self.admin.get('/api/admin/therapist_requests/', {'created_to': bad})
+            self.assertEqual(response.status_code, 400, bad)
+        body = self.admin.get('/api/admin/therapist_requests/', {'created_to': '2000-01-01'}).json()
+        self.assertEqual(body['count'], 0)
+        self.assertEqual(self.admin.get('/api/admin/therapist_requests/', {'created_from': 'x'}).status_code, 400)
+
+
+@cheap_hashing
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_user(Customer, 'customer', customer_name='Cus', customer_email='c@example.com', customer_password='pw')
+        self.therapist, _ = make_user(Therapist, 'therapist', therapist_name='Dr T', therapist_email='t@example.com', therapist_password='pw')
+        self.therapist.hospital.add(Hospital.objects.create(name='Square', address='Panthapath'))
+        make_user(Admin, 'admin', admin_name='root', admin_email='root@example.com', admin_password='pw')
+        self.client = APIClient()
+
+    def login(self, email, role, password='pw'):
+        return self.client.post('/api/login/', {'email': email, 'password': password, 'role': role}, format='json')
+
+    def test_each_role_logs_in_with_one_profile_query(self):
+        for email, role, queries in (('c@example.com', 'customer', 1), ('root@example.com', 'admin', 1),
+                                     ('t@example.com', 'therapist', 2)):
+            with self.assertNumQueries(queries):
+                response = self.login(email, role)
+            self.assertEqual(response.status_code, 200, role)
+            self.assertEqual(response.json()['role'], role)
+        self.assertEqual(response.json()['data']['hospital'][0]['name'], 'Square')
+
+    def test_token_identifies_user_auth_row(self):
+        token = self.login('c@example.com', 'customer').json()['access_token']
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        customer = Customer.objects.get(customer_email='c@example.com')
+        self.assertEqual(client.get(f'/api/view_customer_profile/{customer.id}/').status_code, 200)
+
+    def test_profiles_are_changed_only_by_owner_or_admin(self):
+        victim, _ = make_user(Customer, 'customer', customer_name='B', customer_email='b@example.com', customer_password='pw')
+        _, other_therapist = make_user(Therapist, 'therapist', therapist_name='Dr O', therapist_email='o@example.com')
+        attacker = client_for(UserAuth.objects.get(customer__customer_email='c@example.com'))
+        url = f'/api/update_customer_profile/{victim.id}/'
+        self.assertEqual(attacker.put(url, {'customer_password': 'owned'}, format='json').status_code, 403)
+        self.assertEqual(self.login('b@example.com', 'customer', password='owned').status_code, 401)
+        self.assertEqual(attacker.get(f'/api/view_customer_profile/{victim.id}/').status_code, 403)
+        self.assertEqual(attacker.delete(f'/api/delete_customer/{victim.id}/').status_code, 403)
+
+        therapist_url = f'/api/update_therapist_profile/{self.therapist.id}/'
+        self.assertEqual(client_for(other_therapist).put(therapist_url, {'therapist_name': 'X'}, format='json').status_code, 403)
+        self.assertEqual(client_for(other_therapist).delete(f'/api/delete_therapist/{self.therapist.id}/').status_code, 403)
+        self.assertEqual(client_for(self.therapist.auth).put(therapist_url, {'therapist_name': 'Y'}, format='json').status_code, 200)
+
+        admin = client_for(UserAuth.objects.get(user_role='admin'))
+        self.assertEqual(admin.put(url, {'customer_name': 'Renamed'}, format='json').status_code, 200)
+        self.assertEqual(client_for(victim.auth).put(url, {'customer_name': 'Mine'}, format='json').status_code, 200)
+
+    def test_failures(self):
+        self.assertEqual(self.login('c@example.com', 'customer', password='nope').status_code, 401)
+        self.assertEqual(self.login('c@example.com', 'therapist').status_code, 404)
+        self.assertEqual(self.login('c@example.com', 'root').status_code, 400)
+
+    def test_signup_stores_only_hashes(self):
+        response = self.client.post('/api/customer_signup/', {
+            'customer_name': 'New', 'customer_email': 'new@example.com',
+            'customer_password': 'secret-pw', 'confirm_password': 'secret-pw',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('customer_password', response.json()['data'])
+        customer = Customer.objects.get(customer_email='new@example.com')
+        self.assertTrue(customer.customer_password.startswith('pbkdf2_sha256$1000$'))
+        self.assertEqual(customer.auth.user_password, customer.customer_password)
+        self.assertEqual(self.login('new@example.com', 'customer', password='secret-pw').status_code, 200)
+
+    def test_hash_like_passwords_from_clients_are_hashed(self):
+        for i, raw in enumerate(['argon2$abc', make_password('x', 'salt', 'pbkdf2_sha256').replace('$1000$', '$1$')]):
+            email = f'h{i}@example.com'
+            response = self.client.post('/api/customer_signup/', {
+                'customer_name': 'H', 'customer_email': email, 'customer_password': raw, 'confirm_password': raw,
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertTrue(Customer.objects.get(customer_email=email).customer_password.startswith('pbkdf2_sha256$1000$'))
+            self.assertEqual(self.login(email, 'customer', password=raw).status_code, 200)
+
+        # A stored hash Django cannot check is a failed login, not a 500
+        Customer.objects.filter(customer_email='h0@example.com').update(customer_password='bcrypt_sha256$$2b$12$abc')
+        self.assertEqual(self.login('h0@example.com', 'customer', password='x').status_code, 401)
+        with override_settings(PASSWORD_HASHERS=settings.PASSWORD_HASHERS + ['django.contrib.auth.hashers.Argon2PasswordHasher']):
+            self.assertEqual(passwords.verify('x', 'argon2$argon2id$v=19$m=102400,t=2,p=8$c2FsdA$aGFzaA'), (False, None))
+
+    def test_signup_retry_with_idempotency_key(self):
+        body = {'customer_name': 'New', 'customer_email': 'new@example.com',
+                'customer_password': 'secret-pw', 'confirm_password': 'secret-pw'}
+        first = self.client.post('/api/customer_signup/', body, format='json', HTTP_IDEMPOTENCY_KEY='signup-1')
+        replay = self.client.post('/api/customer_signup/', body, format='json', HTTP_IDEMPOTENCY_KEY='signup-1')
+        self.assertEqual((replay.status_code, replay.json()), (201, first.json()))
+        self.assertEqual(Customer.objects.filter(customer_email='new@example.com').count(), 1)
+        # Without a key a retry runs again and hits the unique email
+        self.assertEqual(self.client.post('/api/customer_signup/', body, format='json').status_code, 400)
+
+    def test_login_rehashes_when_the_work_factor_changes(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1200):
+            self.assertEqual(self.login('c@example.com', 'customer').status_code, 200)
+        customer = Customer.objects.get(customer_email='c@example.com')
+        self.assertTrue(customer.customer_password.startswith('pbkdf2_sha256$1200$'))
+        self.assertEqual(self.login('c@example.com', 'customer', password='nope').status_code, 401)
+
+    def test_plaintext_rows_are_hashed_by_the_migration(self):
+        admin = Admin.objects.get(admin_email='root@example.com')
+        Admin.objects.filter(id=admin.id).update(admin_password='pw')
+        self.assertEqual(self.login('root@example.com', 'admin').status_code, 401)
+
+        migration = import_module('account.migrations.0014_hash_passwords')
+        # UserAuth's password column has since moved to the profiles
+        with patch.object(migration, 'PASSWORD_COLUMNS', [('Admin', 'admin_password')]):
+            migration.hash_passwords(django_apps, None)
+        self.assertTrue(Admin.objects.get(id=admin.id).admin_password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(self.login('root@example.com', 'admin').status_code, 200)
+
+    def test_full_verification_pool_answers_503(self):
+        with patch.object(passwords, '_submit', side_effect=passwords.Busy):
+            response = self.login('c@example.com', 'customer')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    async def test_async_login_matches_sync(self):
+        client = AsyncClient()
+        response = await client.post('/api/async/login/', {'email': 't@example.com', 'password': 'pw', 'role': 'therapist'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['data']['hospital'][0]['name'], 'Square')
+        self.assertNotIn('therapist_password', body['data'])
+        wrong = await client.post('/api/async/login/', {'email': 't@example.com', 'password': 'x', 'role': 'therapist'},
+                                  content_type='application/json')
+        self.assertEqual(wrong.status_code, 401)
+
+
+@cheap_hashing
+class ClaimsPrincipalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer, self.user_auth = make_user(Customer, 'customer', customer_name='Cus', customer_email='c@example.com', customer_password='pw')
+        self.client = client_for(self.user_auth)
+        self.url = f'/api/view_customer_profile/{self.customer.id}/'
+
+    def test_database_mode_loads_user_auth(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(AUTH_CLAIMS_PRINCIPAL=True)
+    def test_claims_mode_skips_auth_query_once_version_is_cached(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(AUTH_CLAIMS_PRINCIPAL=True)
+    def test_revocation_and_deletion(self):
+        self.assertEqual(self.client.post('/api/revoke_tokens/').status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        login = APIClient().post('/api/login/', {'email': 'c@example.com', 'password': 'pw', 'role': 'customer'}, format='json').json()
+        fresh = APIClient()
+        fresh.credentials(HTTP_AUTHORIZATION=f"Bearer {login['access_token']}")
+        self.assertEqual(fresh.get(self.url).status_code, 200)
+
+        self.customer.delete()
+        self.assertEqual(fresh.get('/api/get_my_blog/').status_code, 401)
+
+    def test_revocation_in_database_mode(self):
+        self.client.post('/api/revoke_tokens/')
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@cheap_hashing
+class RefreshTokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_index._bloom = None
+        make_user(Customer, 'customer', customer_name='Cus', customer_email='c@example.com', customer_password='pw')
+        self.client = APIClient()
+
+    def refresh_token(self):
+        return self.client.post('/api/login/', {'email': 'c@example.com', 'password': 'pw', 'role': 'customer'}, format='json').json()['refresh_token']
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        items = [f'jti-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 100)
+
+    def test_rotation_blacklists_old_token(self):
+        old = self.refresh_token()
+        response = self.client.post('/api/token/refresh/', {'refresh': old}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.json())
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        replay = self.client.post('/api/token/refresh/', {'refresh': old}, format='json')
+        self.assertEqual(replay.status_code, 401)
+        new = self.client.post('/api/token/refresh/', {'refresh': response.json()['refresh']}, format='json')
+        self.assertEqual(new.status_code, 200)
+
+    def test_filter_sees_rows_blacklisted_elsewhere(self):
+        token = self.refresh_token()
+        self.client.post('/api/token/refresh/', {'refresh': self.refresh_token()}, format='json')
+        # blacklisted by "another worker": row exists, this process never called add()
+        UserAuthRefreshToken(token).blacklist()
+        blacklist_index._bloom = BloomFilter(10)
+        blacklist_index._high_water = 0
+        blacklist_index._generation = 'stale'
+        self.assertEqual(self.client.post('/api/token/refresh/', {'refresh': token}, format='json').status_code, 401)
+
+    def test_prune_removes_only_expired(self):
+        live = OutstandingToken.objects.create(jti='live', token='', expires_at=datetime.now() + timedelta(days=1))
+        for i in range(5):
+            expired = OutstandingToken.objects.create(jti=f'old{i}', token='', expires_at=datetime.now() - timedelta(days=1))
+            BlacklistedToken.objects.create(token=expired)
+        call_command('prune_tokens', batch_size=2, stdout=StringIO())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live.jti])
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+
+        # The daily job runs the same pruning
+        OutstandingToken.objects.create(jti='old', token='', expires_at=datetime.now() - timedelta(days=1))
+        with override_settings(JOBS_RECURRING={'prune_tokens': settings.JOBS_RECURRING['prune_tokens']}):
+            sync_recurring()
+        run_due()
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live.jti])
+
+    def test_revoked_user_cannot_refresh(self):
+        token = self.refresh_token()
+        revoke_tokens(UserAuth.objects.get().id)
+        self.assertEqual(self.client.post('/api/token/refresh/', {'refresh': token}, format='json').status_code, 401)
+
+
+class TherapistApprovalTests(TestCase):
+    def setUp(self):
+        _, admin_auth = make_user(Admin, 'admin', admin_name='root', admin_email='root@example.com', admin_password='pw')
+        self.admin = client_for(admin_auth)
+        self.hospital = Hospital.objects.create(name='Square', address='Panthapath')
+        self.requests = []
+        for i in range(5):
+            req = TherapistRequest.objects.create(name=f'T{i}', email=f't{i}@example.com', password='pw')
+            req.hospital.add(self.hospital)
+            self.requests.append(req)
+
+    def process(self, ids, action='approve'):
+        response = self.admin.post('/api/process_therapist_requests/', {'ids': ids, 'action': action}, format='json')
+        run_due()
+        return response
+
+    def test_batch_approval_creates_therapists_and_queues_mail(self):
+        ids = [req.id for req in self.requests]
+        body = self.process(ids + [9999]).json()
+        self.assertEqual(body['processed'], ids)
+        self.assertEqual(body['errors'], [{'id': 9999, 'error': 'Therapist request not found.'}])
+        self.assertEqual(Therapist.objects.filter(hospital=self.hospital).count(), 5)
+        self.assertEqual(UserAuth.objects.filter(user_role='therapist').count(), 5)
+        self.assertFalse(TherapistRequest.objects.exclude(status='approved').exists())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f't{i}@example.com' for i in range(5)])
+
+        # already approved requests are reported, not duplicated
+        body = self.process(ids[:1]).json()
+        self.assertEqual(body['errors'], [{'id': ids[0], 'error': 'Request is already approved.'}])
+        self.assertEqual(Therapist.objects.count(), 5)
+
+    def test_decline_and_existing_email(self):
+        Therapist.objects.create(therapist_name='Old', therapist_email='t0@example.com')
+        body = self.process([self.requests[0].id, self.requests[1].id]).json()
+        self.assertEqual(body['processed'], [self.requests[1].id])
+        self.assertEqual(body['errors'][0]['id'], self.requests[0].id)
+
+        body = self.process([self.requests[0].id], action='decline').json()
+        self.assertEqual(body['processed'], [self.requests[0].id])
+        self.assertEqual(TherapistRequest.objects.get(id=self.requests[0].id).status, 'declined')
+
+    def test_single_request_endpoint_and_permissions(self):
+        response = self.admin.post(f'/api/process_therapist_request/{self.requests[2].id}/', {'action': 'approve'})
+        run_due()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Therapist.objects.filter(therapist_email='t2@example.com', hospital=self.hospital).exists())
+
+        _, customer_auth = make_user(Customer, 'customer', customer_name='C', customer_email='c@example.com')
+        customer = client_for(customer_auth)
+        response = customer.post('/api/process_therapist_requests/', {'ids': [1], 'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = customer.post(f'/api/process_therapist_request/{self.requests[3].id}/', {'action': 'approve'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(TherapistRequest.objects.get(id=self.requests[3].id).status, 'pending')
+        self.assertEqual(self.process([], action='approve').status_code, 400)
+
+
+class UserAuthLinkMigrationTests(TransactionTestCase):
+    before = [('account', '0014_hash_passwords')]
+    after = [('account', '0015_userauth_profile_links')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_generic_links_become_one_to_one_keys(self):
+        old = self.migrate(self.before)
+        content_type = old.get_model('contenttypes', 'ContentType').objects.get_or_create(
+            app_label='account', model='customer')[0]
+        customer = old.get_model('account', 'Customer').objects.create(
+            customer_name='C', customer_email='c@example.com', customer_password='edited-but-never-synced')
+        OldUserAuth = old.get_model('account', 'UserAuth')
+        linked = OldUserAuth.objects.create(content_type=content_type, object_id=customer.id, user_email='c@example.com',
+                                            user_password='hash-login-accepts', user_role='customer')
+        OldUserAuth.objects.create(content_type=content_type, object_id=customer.id, user_role='customer')
+        OldUserAuth.objects.create(content_type=content_type, object_id=customer.id + 100, user_role='customer')
+
+        new = self.migrate(self.after)
+        auth = new.get_model('account', 'UserAuth').objects.get()
+        self.assertEqual((auth.id, auth.customer_id), (linked.id, customer.id))
+        self.assertEqual(new.get_model('account', 'Customer').objects.get().customer_password, 'hash-login-accepts')
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates})
+
+
+@cheap_hashing
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        make_user(Customer, 'customer', customer_name='Cus', customer_email='c@example.com', customer_password='pw')
+        self.client = APIClient()
+
+    def login(self, email='c@example.com', password='pw'):
+        return self.client.post('/api/login/', {'email': email, 'password': password, 'role': 'customer'}, format='json')
+
+    def test_sliding_window_weights_the_previous_bucket(self):
+        self.assertEqual([throttling.hit('k', 3, 60, now=t)[0] for t in (0, 10, 20, 30)], [True, True, True, False])
+        # Half-way through the next bucket the previous 4 hits count as 2
+        self.assertEqual(throttling.hit('k', 3, 60, now=90), (True, 0))
+        self.assertEqual(throttling.hit('k', 3, 60, now=90), (False, 15))
+        self.assertEqual(throttling.hit('k', 3, 60, now=180)[0], True)
+
+    @throttle_rates(login_account='2/min', login_ip='100/min')
+    def test_login_attempts_per_account(self):
+        self.assertEqual(self.login(password='nope').status_code, 401)
+        self.assertEqual(self.login().status_code, 200)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Another account from the same address is unaffected
+        self.assertEqual(self.login(email='other@example.com').status_code, 404)
+        counters = registry.snapshot()['counters']
+        self.assertEqual(counters, [{'name': 'throttled_requests', 'labels': {'scope': 'login_account'}, 'value': 1}])
+
+    @throttle_rates(login_ip='2/min')
+    def test_login_and_async_login_share_the_ip_budget(self):
+        self.login(email='a@example.com')
+        self.login(email='b@example.com')
+        response = async_to_sync(AsyncClient().post)(
+            '/api/async/login/', {'email': 'c@example.com', 'password': 'pw', 'role': 'customer'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    @throttle_rates(signup_ip='1/hour')
+    def test_signup_per_address(self):
+        data = {'customer_name': 'N', 'customer_email': 'n@example.com', 'customer_password': 'x', 'confirm_password': 'x'}
+        self.assertEqual(self.client.post('/api/customer_signup/', data, format='json').status_code, 201)
+        data['customer_email'] = 'm@example.com'
+        self.assertEqual(self.client.post('/api/customer_signup/', data, format='json').status_code, 429)
+
+    @throttle_rates(login_ip='2/min', login_account='100/min')
+    def test_forwarded_for_header_does_not_reset_the_ip_budget(self):
+        statuses = [self.client.post('/api/login/', {'email': f'{i}@example.com', 'password': 'pw', 'role': 'customer'},
+                                     format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code
+                    for i in range(3)]
+        self.assertEqual(statuses, [404, 404, 429])
+
+
+class HospitalDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _, admin_auth = make_user(Admin, 'admin', admin_name='root', admin_email='root@example.com', admin_password='pw')
+        self.admin = client_for(admin_auth)
+        self.hospital = Hospital.objects.create(name='Square', address='Panthapath')
+        Hospital.objects.create(name='Labaid', address='Dhanmondi')
+
+    def test_directory_is_cached_and_conditional(self):
+        response = self.client.get('/api/view_hospital_list/')
+        self.assertEqual([h['name'] for h in response.json()], ['Square', 'Labaid'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/view_hospital_list/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+
+        self.admin.put(f'/api/update_hospital/{self.hospital.id}/', {'name': 'Square Hospital'}, format='json')
+        response = self.client.get('/api/view_hospital_list/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['name'], 'Square Hospital')
+
+    def test_single_hospital(self):
+        response = self.client.get(f'/api/view_specific_hospital_info/{self.hospital.id}/')
+        self.assertEqual(response.json()['name'], 'Square')
+        again = self.client.get(f'/api/view_specific_hospital_info/{self.hospital.id}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.client.get('/api/view_specific_hospital_info/9999/').status_code, 404)
+
+        self.admin.delete(f'/api/delete_hospital/{self.hospital.id}/')
+        self.assertEqual(self.client.get(f'/api/view_specific_hospital_info/{self.hospital.id}/').status_code, 404)
+
+
+class StreamingListTests(TestCase):
+    def setUp(self):
+        _, admin_auth = make_user(Admin, 'admin', admin_name='root', admin_email='root@example.com', admin_password='pw')
+        self.admin = client_for(admin_auth)
+
+    def add_customers(self, count):
+        start = Customer.objects.count()
+        Customer.objects.bulk_create([
+            Customer(customer_name=f'C{i}', customer_email=f'c{i}@example.com', customer_password='x' * 200)
+            for i in range(start, start + count)
+        ])
+
+    def streamed_peak(self):
+        tracemalloc.start()
+        response = self.admin.get('/api/list_customer/', {'stream': '1'})
+        rows = 0
+        for chunk in response.streaming_content:
+            rows += chunk.count(b'"customer_email"')
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return rows, peak
+
+    def test_stream_matches_plain_list(self):
+        self.add_customers(7)
+        plain = self.admin.get('/api/list_customer/').json()
+        with patch('Lets_heal.renderers.STREAM_CHUNK_SIZE', 3):
+            response = self.admin.get('/api/list_customer/', {'stream': 'true'})
+            self.assertTrue(response.streaming)
+            self.assertEqual(json.loads(b''.join(response.streaming_content)), plain)
+        response = self.admin.get('/api/list_therapist_request/', {'stream': '1'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_one_customer_query_whether_empty_small_or_streamed(self):
+        with CaptureQueriesContext(connection) as empty:
+            self.assertEqual(self.admin.get('/api/list_customer/').status_code, 404)
+        self.add_customers(3)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(len(self.admin.get('/api/list_customer/').json()), 3)
+        with patch('Lets_heal.renderers.STREAM_MIN_ROWS', 2), CaptureQueriesContext(connection) as big:
+            response = self.admin.get('/api/list_customer/')
+            self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 3)
+        for queries in (empty, small, big):
+            self.assertEqual(sum('FROM "account_customer"' in q['sql'] for q in queries.captured_queries), 1)
+
+    def test_peak_memory_does_not_grow_with_rows(self):
+        self.add_customers(500)
+        small_rows, small_peak = self.streamed_peak()
+        self.add_customers(4500)
+        large_rows, large_peak = self.streamed_peak()
+        self.assertEqual((small_rows, large_rows), (500, 5000))
+        # 10x the rows; a buffered list would need roughly 10x the memory
+        self.assertLess(large_peak, small_peak * 2)
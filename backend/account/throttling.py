@@ -0,0 +1,108 @@
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from Lets_heal.profiling import registry
+
+
+def hit(key, limit, window, now=None):
+    """Count one request against a sliding window; returns (allowed, seconds to wait).
+
+    The window is approximated from two fixed buckets: the previous bucket's
+    count weighted by how much of it still overlaps the window, plus the
+    current bucket's count. That is two cache reads and one atomic incr per
+    request, whatever the rate, and nothing is written to the database.
+    """
+    now = time.time() if now is None else now
+    bucket, offset = divmod(now, window)
+    current_key = f'{key}:{int(bucket)}'
+    previous_key = f'{key}:{int(bucket) - 1}'
+
+    # The bucket must outlive the window in which it is the "previous" one
+    cache.add(current_key, 0, int(window * 2) + 1)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(current_key, 1, int(window * 2) + 1)
+        current = 1
+    previous = cache.get(previous_key, 0)
+
+    weight = 1 - offset / window
+    if previous * weight + current <= limit:
+        return True, 0
+    if current > limit:
+        # Over budget on this bucket alone: wait for it to become the previous one
+        return False, math.ceil(window - offset) or 1
+    # Wait until the previous bucket's share has decayed enough
+    needed = 1 - (limit - current) / previous
+    return False, max(1, math.ceil(needed * window - offset))
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """DRF throttle over hit(); rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+
+    A scope with no rate configured is not throttled. Rejections are counted
+    in the metrics registry as throttled_requests{scope=...}. Counts live in
+    the default cache, so they are only shared between worker processes when
+    that cache is (see CACHES); with LocMemCache each process has its own budget.
+    """
+
+    def get_rate(self):
+        # Looked up per request rather than once at import, so rate changes apply
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.retry_after = hit(self.key, self.num_requests, self.duration)
+        if not allowed:
+            registry.increment('throttled_requests', (('scope', self.scope),))
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginAccountThrottle(SlidingWindowThrottle):
+    """Attempts against one email and role, whichever addresses they come from."""
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not email:
+            return None
+        account = f"{str(email).strip().lower()}|{request.data.get('role')}"
+        # Hashed so arbitrary input always makes a valid cache key
+        ident = hashlib.sha256(account.encode()).hexdigest()[:32]
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class SignupIPThrottle(SlidingWindowThrottle):
+    scope = 'signup_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+LOGIN_THROTTLES = [LoginIPThrottle, LoginAccountThrottle]
+
+
+def throttle_wait(request, throttles, view=None):
+    """Seconds to wait if any throttle rejects the request, else None (as APIView.check_throttles)."""
+    waits = [throttle.wait() for throttle in (cls() for cls in throttles)
+             if not throttle.allow_request(request, view)]
+    return max(waits) if waits else None
@@ -0,0 +1,199 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+from jobs.tasks import task
+from .authentication import REVOKED, current_token_version
+
+GENERATION_KEY = 'token_blacklist:generation'
+PRUNE_BATCH_SIZE = 1000
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BlacklistIndex:
+    """Per-process Bloom filter over blacklisted refresh-token jtis.
+
+    A miss means the jti is certainly not blacklisted, so the refresh path can
+    skip the BlacklistedToken lookup. The filter is built from the table on first
+    use and then follows new rows by primary key whenever the shared generation
+    counter in the cache moves, or at least every TOKEN_BLACKLIST_SYNC_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._high_water = 0
+        self._generation = None
+        self._synced_at = 0
+
+    def _load(self, rows):
+        for pk, jti in rows:
+            self._bloom.add(jti)
+            self._high_water = max(self._high_water, pk)
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        count = BlacklistedToken.objects.count()
+        self._bloom = BloomFilter(max(count * 2, 10000))
+        self._high_water = 0
+        self._load(BlacklistedToken.objects.order_by().values_list('id', 'token__jti').iterator(chunk_size=5000))
+        self._generation = cache.get(GENERATION_KEY)
+        self._synced_at = time.monotonic()
+
+    def _sync(self):
+        if self._bloom is None or self._bloom.count > self._bloom.capacity:
+            self._rebuild()
+            return
+        generation = cache.get(GENERATION_KEY)
+        interval = getattr(settings, 'TOKEN_BLACKLIST_SYNC_SECONDS', 5)
+        if generation == self._generation and time.monotonic() - self._synced_at < interval:
+            return
+        self._load(BlacklistedToken.objects.filter(id__gt=self._high_water).order_by()
+                   .values_list('id', 'token__jti'))
+        self._generation = generation
+        self._synced_at = time.monotonic()
+
+    def might_contain(self, jti):
+        with self._lock:
+            self._sync()
+            return jti in self._bloom
+
+    def add(self, jti):
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            generation = 1
+            cache.set(GENERATION_KEY, generation, None)
+        with self._lock:
+            if self._bloom is None:
+                return
+            self._bloom.add(jti)
+            # Nobody else bumped the counter since our last sync: we are still current
+            if generation == (self._generation or 0) + 1:
+                self._generation = generation
+
+
+blacklist_index = BlacklistIndex()
+
+
+@task
+def prune_tokens(batch_size=PRUNE_BATCH_SIZE, pause=0):
+    """Delete expired outstanding refresh tokens and their blacklist rows; returns how many.
+
+    Runs daily from JOBS_RECURRING and backs `manage.py prune_tokens`. Rows go
+    in batches of batch_size, with pause seconds between them to keep lock
+    times short.
+    """
+    now = aware_utcnow()
+    deleted = 0
+    while True:
+        ids = list(OutstandingToken.objects.filter(expires_at__lte=now).order_by()
+                   .values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+    # Pruned jtis would otherwise linger in this process's filter as false positives;
+    # other processes only pay an extra lookup until their own rebuild
+    blacklist_index.rebuild()
+    return deleted
+
+
+class UserAuthRefreshToken(RefreshToken):
+    """Refresh token whose blacklist check is fronted by the in-memory Bloom filter.
+
+    Outstanding/blacklisted rows are written without a user: the stock token
+    looks the id up in django.contrib.auth's User table, which is not where our
+    user ids live.
+    """
+
+    def check_blacklist(self):
+        if blacklist_index.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def _outstanding(self):
+        return OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                'user': None,
+                'created_at': self.current_time,
+                'token': str(self),
+                'expires_at': datetime_from_epoch(self.payload['exp']),
+            },
+        )
+
+    def outstand(self):
+        return self._outstanding()
+
+    def blacklist(self):
+        token, _ = self._outstanding()
+        result = BlacklistedToken.objects.get_or_create(token=token)
+        blacklist_index.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+class UserAuthTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = UserAuthRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        # Users live in UserAuth; honour revocation through the cached token version
+        user_id = refresh.payload.get('user_id')
+        version = current_token_version(user_id)
+        if version == REVOKED or version != refresh.payload.get('ver', 0):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data['refresh'] = str(refresh)
+
+        return data
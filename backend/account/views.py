@@ -1,38 +1,46 @@
 from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view,permission_classes
+from rest_framework.decorators import api_view,permission_classes,throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.core.mail import send_mail
-from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
 from rest_framework import status
-from django.contrib.contenttypes.models import ContentType
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
+from django.db.models import F, Q
 from .models import Customer, Therapist, Admin, UserAuth, Review ,TherapistRequest,Hospital
 from .serializers import CustomerSerializer, TherapistSerializer, AdminSerializer,UserAuthSerializer, ReviewSerializer ,TherapistRequestSerializer,HospitalSerializer
+from .serializers import CustomerRowSerializer, TherapistRequestRowSerializer
+from .pagination import AdminCursorPagination
+from .authentication import is_owner, revoke_tokens
+from .tokens import UserAuthRefreshToken
+from .throttling import LOGIN_THROTTLES, SignupIPThrottle
+from .cache import cached_count, cached_payload, etag_for, not_modified
+from datetime import datetime, time, timedelta
+from django.utils.dateparse import parse_date
+from . import approvals, bulk, passwords
+from Lets_heal.idempotency import idempotent
+from Lets_heal.renderers import list_response
+
+MAX_BATCH_REQUESTS = 1000
 
 #customer signup
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignupIPThrottle])
+@idempotent
 def customer_signup(request):
     serializer = CustomerSerializer(data=request.data)
     if serializer.is_valid():
-        customer=serializer.save()
-
-        UserAuth.objects.create(
-        content_type=ContentType.objects.get_for_model(Customer),
-        object_id=customer.id,
-        user_name=customer.customer_name,
-        user_email=customer.customer_email,
-        user_password=customer.customer_password,
-        user_role=customer.customer_role
-       )
-  
+        with transaction.atomic():
+            customer=serializer.save()
+            UserAuth.objects.create(customer=customer, user_role='customer')
+
         return Response({"success": True, "data": serializer.data}, status=status.HTTP_201_CREATED)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignupIPThrottle])
 def therapist_request_signup(request):
     email = request.data.get('email') or request.POST.get('email')
     if not email:
@@ -68,10 +76,8 @@ def therapist_request_signup(request):
 @permission_classes([IsAuthenticated])
 def list_therapist_request(request):
     requests = TherapistRequest.objects.all().order_by('-created_at')
-    if not requests.exists():
-            return Response({"message": "No therapist request for registration is found"}, status=status.HTTP_404_NOT_FOUND)
-    serializer = TherapistRequestSerializer(requests, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return list_response(request, requests, TherapistRequestSerializer,
+                         empty={"message": "No therapist request for registration is found"})
 
 #Details of a specific therapist request (for admin)
 @api_view(['GET'])
@@ -87,67 +93,105 @@ def requested_therapist_info(request,request_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def process_therapist_request(request, request_id):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can process therapist requests"}, status=status.HTTP_403_FORBIDDEN)
     action = request.data.get("action")  # "approve" or "decline"
     therapist_req = get_object_or_404(TherapistRequest, id=request_id)
 
     if action == "approve":
-        therapist = Therapist.objects.create(
-            therapist_name=therapist_req.name,
-            therapist_email=therapist_req.email,
-            therapist_phone=therapist_req.phone,
-            year_of_experience=therapist_req.year_of_experience,
-            therapist_specialization=therapist_req.specialization,
-            therapist_qualification=therapist_req.qualification,
-            therapist_password=therapist_req.password,
-            therapist_gender=therapist_req.gender,
-            therapist_role="therapist",
-            therapist_licence=therapist_req.licence_pdf,
-            therapist_image=therapist_req.image 
-        )
-
-        therapist.hospital.set(therapist_req.hospital.all())
-     
-        UserAuth.objects.create(
-            content_type=ContentType.objects.get_for_model(Therapist),
-            object_id=therapist.id,
-            user_name=therapist.therapist_name,
-            user_email=therapist.therapist_email,
-            user_password=therapist.therapist_password,
-            user_role="therapist"
-        )
-
-        therapist_req.status = "approved"
-        therapist_req.save()
-    
-        send_mail(
-            "Therapist Request Approved",
-            "Congratulations! Your therapist registration request has been approved. You can now log in.",
-            settings.DEFAULT_FROM_EMAIL,
-            [therapist_req.email],
-            fail_silently=False,
-        )
-
+        _, errors = approvals.approve_requests([therapist_req.id])
+        if errors:
+            return Response({"success": False, "error": errors[therapist_req.id]}, status=status.HTTP_400_BAD_REQUEST)
         return Response({"success": True, "message": "Request approved and therapist created."},status=status.HTTP_200_OK)
 
     elif action == "decline":
-        therapist_req.status = "declined"
-        therapist_req.save()
-
-        send_mail(
-            "Therapist Request Declined",
-            "Sorry, your therapist registration request has been declined.",
-            settings.DEFAULT_FROM_EMAIL,
-            [therapist_req.email],
-            fail_silently=False,
-        )
-
+        _, errors = approvals.decline_requests([therapist_req.id])
+        if errors:
+            return Response({"success": False, "error": errors[therapist_req.id]}, status=status.HTTP_400_BAD_REQUEST)
         return Response({"success": True, "message": "Request declined."},status=status.HTTP_200_OK)
 
     return Response({"success": False, "error": "Invalid action"}, status=status.HTTP_400_BAD_REQUEST)
 
+# Approve or decline many therapist requests at once (for admin)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def process_therapist_requests(request):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can process therapist requests"}, status=status.HTTP_403_FORBIDDEN)
+    action = request.data.get("action")
+    ids = request.data.get("ids")
+    if action not in ("approve", "decline"):
+        return Response({"success": False, "error": "Invalid action"}, status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(ids, list) or not ids:
+        return Response({"success": False, "error": "ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > MAX_BATCH_REQUESTS:
+        return Response({"success": False, "error": f"At most {MAX_BATCH_REQUESTS} ids per call"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        return Response({"success": False, "error": "ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+    process = approvals.approve_requests if action == "approve" else approvals.decline_requests
+    done, errors = process(ids)
+    return Response({
+        "success": not errors,
+        "processed": done,
+        "errors": [{"id": request_id, "error": error} for request_id, error in errors.items()],
+    }, status=status.HTTP_200_OK)
+
+# Profile queryset and serializer per login role; each profile's columns are prefixed with its role
+LOGIN_PROFILES = {
+    'customer': (Customer.objects.all(), CustomerSerializer),
+    'therapist': (Therapist.objects.prefetch_related('hospital'), TherapistSerializer),
+    'admin': (Admin.objects.all(), AdminSerializer),
+}
+
+
+def login_queryset(role, email):
+    # One query: the profile by its unique email, joined to its UserAuth row on the one-to-one key
+    profiles = LOGIN_PROFILES[role][0]
+    return profiles.filter(**{f'{role}_email': email}, auth__isnull=False).annotate(
+        auth_id=F('auth__id'),
+        auth_token_version=F('auth__token_version'),
+    )
+
+
+def login_password(user, role):
+    return getattr(user, f'{role}_password')
+
+
+def rehash_rows(user, role, encoded):
+    """(profile rows, update) storing an upgraded hash.
+
+    The row is only touched while it still holds the hash that was verified,
+    so a password changed in the meantime is never overwritten.
+    """
+    field = f'{role}_password'
+    return type(user).objects.filter(id=user.id, **{field: login_password(user, role)}), {field: encoded}
+
+
+def login_payload(user, role):
+    serializer = LOGIN_PROFILES[role][1](user)
+
+    refresh = UserAuthRefreshToken()
+    refresh['user_id'] = user.auth_id
+    refresh['email'] = getattr(user, f'{role}_email')
+    refresh['role'] = role
+    refresh['profile_id'] = user.id
+    refresh['ver'] = user.auth_token_version
+
+    return {
+    "success": True,
+    "role": role,
+    "data": serializer.data,
+    "access_token": str(refresh.access_token),
+    "refresh_token": str(refresh),
+    }
+
 #login for customer,therapist and admin
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def login(request):
     role = request.data.get('role')
     email = request.data.get('email')
@@ -155,61 +199,49 @@ def login(request):
 
     if not email or not password or not role:
         return Response({"success": False, "error": "Email, password, and role are required"}, status=status.HTTP_400_BAD_REQUEST)
+    if role not in LOGIN_PROFILES:
+        return Response({"success": False, "error": "Invalid role"}, status=status.HTTP_400_BAD_REQUEST)
 
-    user_auth = UserAuth.objects.filter(user_email=email, user_role=role).first()
-    if not user_auth: 
+    user = login_queryset(role, email).first()
+    if not user:
         return Response({"success": False, "error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    if user_auth.user_password != password:
+    try:
+        matches, rehash = passwords.verify(password, login_password(user, role))
+    except passwords.Busy:
+        return Response({"success": False, "error": "Too many login attempts, try again shortly"},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+    if not matches:
         return Response({"success": False, "error": "Incorrect password"}, status=status.HTTP_401_UNAUTHORIZED)
+    if rehash:
+        rows, changes = rehash_rows(user, role, rehash)
+        rows.update(**changes)
 
-    if role == "customer":
-        user = get_object_or_404(Customer, customer_email=email)
-        serializer = CustomerSerializer(user)
-    elif role == "therapist":
-        user = get_object_or_404(Therapist, therapist_email=email)
-        serializer = TherapistSerializer(user)
-    elif role == "admin":
-        user = get_object_or_404(Admin, admin_email=email)
-        serializer = AdminSerializer(user)
-    else:
-        return Response({"success": False, "error": "Invalid role"}, status=status.HTTP_400_BAD_REQUEST)
-
-    refresh = RefreshToken()
-    refresh['user_id'] = user_auth.id
-    refresh['email'] = user_auth.user_email
-    refresh['role'] = user_auth.user_role
-
-    access_token = str(refresh.access_token)
-    refresh_token = str(refresh)
+    return Response(login_payload(user, role), status=status.HTTP_200_OK)
 
-    return Response({
-    "success": True,
-    "role": user_auth.user_role,
-    "data": serializer.data,
-    "access_token": access_token,
-    "refresh_token": refresh_token,
-    },status=status.HTTP_200_OK)
+# Revoke every token issued to the current user (logout everywhere)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def revoke_all_tokens(request):
+    revoke_tokens(request.user.id)
+    return Response({"success": True, "message": "All sessions have been logged out."}, status=status.HTTP_200_OK)
 
 # get customer list(for admin)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_customer(request):
     customer=Customer.objects.all()
-    if not customer.exists():
-            return Response({"message": "No customer found"}, status=status.HTTP_404_NOT_FOUND)
-    serializer=CustomerSerializer(customer,many=True)
-    return Response(serializer.data,status=status.HTTP_200_OK)
+    return list_response(request, customer.order_by('id'), CustomerSerializer, empty={"message": "No customer found"})
 
 # View customer profile 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def view_customer_profile(request, request_id):
     user = request.user
-    customer = get_object_or_404(Customer, id=request_id)
+    customer = get_object_or_404(Customer.objects.select_related('auth'), id=request_id)
     if not customer:
             return Response({"message": "No customer found"}, status=status.HTTP_404_NOT_FOUND)
-    if user.user_role != "admin" and user.user_email != customer.customer_email:
+    if user.user_role != "admin" and not is_owner(user, customer):
         return Response({"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
     serializer = CustomerSerializer(customer)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -219,7 +251,9 @@ def view_customer_profile(request, request_id):
 @permission_classes([IsAuthenticated])
 def update_customer_profile(request, customer_id):
     user = request.user
-    customer = get_object_or_404(Customer, id=customer_id) 
+    customer = get_object_or_404(Customer.objects.select_related('auth'), id=customer_id)
+    if user.user_role != "admin" and not is_owner(user, customer):
+        return Response({"error": "Not authorized to update this profile"}, status=status.HTTP_403_FORBIDDEN)
     serializer = CustomerSerializer(customer, data=request.data, partial=True)
     if serializer.is_valid():
         serializer.save()
@@ -231,8 +265,8 @@ def update_customer_profile(request, customer_id):
 @permission_classes([IsAuthenticated])
 def delete_customer(request, customer_id):
     user = request.user
-    customer = get_object_or_404(Customer, id=customer_id)
-    if user.user_role != "admin" and user.user_email != customer.customer_email:
+    customer = get_object_or_404(Customer.objects.select_related('auth'), id=customer_id)
+    if user.user_role != "admin" and not is_owner(user, customer):
         return Response({"error": "Not authorized"}, status=403)
     customer.delete()
     return Response({"message": "Customer deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
@@ -252,21 +286,37 @@ def create_hospital(request):
         else:
          return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
+def hospital_directory(hospitals):
+    # Whole directory plus per-hospital entries, rebuilt only after a hospital write
+    rows = [dict(row) for row in HospitalSerializer(hospitals, many=True).data]
+    return {'list': rows, 'by_id': {row['id']: (row, etag_for(row)) for row in rows}}
+
+def hospital_directory_entry():
+    return cached_payload('hospitals', 'directory', lambda: hospital_directory(Hospital.objects.order_by('id')))
+
+def _conditional_response(request, data, etag):
+    # Clients revalidate every time; unchanged data costs a bodiless 304
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if not_modified(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data, status=status.HTTP_200_OK, headers=headers)
+
 # View hospital list
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def view_hospital_list(request):
-        hospital=Hospital.objects.all()
-        serializer=HospitalSerializer(hospital, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        directory, etag = hospital_directory_entry()
+        return _conditional_response(request, directory['list'], etag)
     
 # View hospital profile
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def view_specific_hospital_info(request, pk):
-        hospital=Hospital.objects.get(id=pk)
-        serializer=HospitalSerializer(hospital)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        directory, _ = hospital_directory_entry()
+        if pk not in directory['by_id']:
+            return Response({"error": "Hospital not found"}, status=status.HTTP_404_NOT_FOUND)
+        hospital, etag = directory['by_id'][pk]
+        return _conditional_response(request, hospital, etag)
 
 # Update hospital
 @api_view(['PUT'])
@@ -295,5 +345,113 @@ def delete_hospital(request, pk):
     hospital.delete()
     return Response({"message": "Customer deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
-
-
+# Bulk import of hospitals, customers or therapists from a CSV/JSONL upload (for admin)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_import(request, resource):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can import data"}, status=status.HTTP_403_FORBIDDEN)
+    if resource not in bulk.IMPORTERS:
+        return Response({"error": f"Unknown resource '{resource}'"}, status=status.HTTP_404_NOT_FOUND)
+
+    uploaded = request.FILES.get('file')
+    if not uploaded:
+        return Response({"error": "A CSV or JSONL file is required in the 'file' field"}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = bulk.detect_format(uploaded, request.data.get('file_format'))
+    if not file_format:
+        return Response({"error": "file_format must be 'csv' or 'jsonl'"}, status=status.HTTP_400_BAD_REQUEST)
+
+    report = bulk.IMPORTERS[resource]().run(bulk.read_upload(uploaded, file_format))
+    return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+# Streaming CSV/JSONL export of hospitals, customers or therapists (for admin)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bulk_export(request, resource, file_format):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can export data"}, status=status.HTTP_403_FORBIDDEN)
+    if resource not in bulk.EXPORT_FIELDS:
+        return Response({"error": f"Unknown resource '{resource}'"}, status=status.HTTP_404_NOT_FOUND)
+
+    if file_format == 'csv':
+        response = StreamingHttpResponse(bulk.stream_csv(resource), content_type='text/csv')
+    elif file_format == 'jsonl':
+        response = StreamingHttpResponse(bulk.stream_jsonl(resource), content_type='application/x-ndjson')
+    else:
+        return Response({"error": "file_format must be 'csv' or 'jsonl'"}, status=status.HTTP_400_BAD_REQUEST)
+    response['Content-Disposition'] = f'attachment; filename="{resource}.{file_format}"'
+    return response
+
+def _age_band(value):
+    # "18-25" -> (18, 25), "60+" -> (60, None)
+    value = value.strip()
+    if value.endswith('+'):
+        return int(value[:-1]), None
+    low, high = value.split('-')
+    return int(low), int(high)
+
+# Paginated, filterable customer listing (for admin)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_list_customers(request):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can list customers"}, status=status.HTTP_403_FORBIDDEN)
+
+    customers = Customer.objects.only(*CustomerRowSerializer.Meta.fields)
+    filters = {}
+    gender = request.GET.get('gender', '').strip()
+    if gender:
+        filters['customer_gender'] = gender
+    age_band = request.GET.get('age_band', '').strip()
+    if age_band:
+        try:
+            low, high = _age_band(age_band)
+        except ValueError:
+            return Response({"error": "age_band must look like '18-25' or '60+'"}, status=status.HTTP_400_BAD_REQUEST)
+        filters['customer_age__gte'] = low
+        if high is not None:
+            filters['customer_age__lte'] = high
+    search = request.GET.get('search', '').strip()
+    customers = customers.filter(**filters)
+    if search:
+        customers = customers.filter(Q(customer_name__istartswith=search) | Q(customer_email__istartswith=search))
+
+    total = cached_count('customers', customers, {**filters, 'search': search})
+    paginator = AdminCursorPagination(total=total, ordering='-id')
+    page = paginator.paginate_queryset(customers, request)
+    return paginator.get_paginated_response(CustomerRowSerializer(page, many=True).data)
+
+# Paginated, filterable therapist request listing (for admin)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_list_therapist_requests(request):
+    if request.user.user_role != 'admin':
+        return Response({"error": "Only admin can list therapist requests"}, status=status.HTTP_403_FORBIDDEN)
+
+    filters = {}
+    request_status = request.GET.get('status', '').strip()
+    if request_status:
+        filters['status'] = request_status
+    gender = request.GET.get('gender', '').strip()
+    if gender:
+        filters['gender'] = gender
+    for param, lookup in (('created_from', 'created_at__gte'), ('created_to', 'created_at__lt')):
+        value = request.GET.get(param, '').strip()
+        if not value:
+            continue
+        try:
+            # None for a malformed value; ValueError for an impossible one such as 2024-02-30
+            day = parse_date(value)
+            if day is not None and param == 'created_to':
+                day += timedelta(days=1)  # inclusive end date
+        except (ValueError, OverflowError):
+            day = None
+        if day is None:
+            return Response({"error": f"{param} must be a date (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
+        filters[lookup] = datetime.combine(day, time.min)
+
+    requests = TherapistRequest.objects.only(*TherapistRequestRowSerializer.Meta.fields).filter(**filters)
+    total = cached_count('therapist_requests', requests, filters)
+    paginator = AdminCursorPagination(total=total, ordering=('-created_at', '-id'))
+    page = paginator.paginate_queryset(requests, request)
+    return paginator.get_paginated_response(TherapistRequestRowSerializer(page, many=True).data)
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from django.test import AsyncClient, Client
+
+from blog.models import Blog
+from quiz.models import QuizAttempt
+
+from .data import FIRST_NAMES, SPECIALIZATIONS, TITLE_WORDS
+from .scenarios import BenchContext
+
+# name -> callable(ctx, ids) returning the sync path; the async twin lives under /api/async/
+ENDPOINTS = {
+    'view_hospital_list': lambda ctx, ids: '/api/view_hospital_list/',
+    'search_therapist': lambda ctx, ids: (
+        f"/api/search_therapist/?search={ctx.rng.choice(FIRST_NAMES + SPECIALIZATIONS)[:4]}&page_size=20"),
+    'view_therapist_profile': lambda ctx, ids: (
+        f"/api/view_therapist_profile/{ctx.rng.choice(ctx.dataset.therapist_ids)}/"),
+    'search_blog': lambda ctx, ids: f"/api/search_blog/?q={ctx.rng.choice(TITLE_WORDS)}",
+    'blog_detail': lambda ctx, ids: f"/api/blog_detail/{ctx.rng.choice(ids['blogs'])}/",
+    'get_next_question': lambda ctx, ids: f"/api/get_next_question/{ctx.rng.choice(ids['attempts'])}/",
+}
+
+
+def async_path(path):
+    return path.replace('/api/', '/api/async/', 1)
+
+
+def _serve_wsgi(paths):
+    # One WSGI worker thread handles its requests one after another
+    client = Client()
+    errors = 0
+    started = time.perf_counter()
+    for path in paths:
+        errors += client.get(path).status_code >= 400
+    return time.perf_counter() - started, errors
+
+
+async def _serve_asgi(paths, concurrency):
+    # One ASGI worker keeps up to `concurrency` requests in flight on its event loop
+    client = AsyncClient()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch(path):
+        async with slots:
+            return (await client.get(path)).status_code >= 400
+
+    started = time.perf_counter()
+    errors = sum(await asyncio.gather(*(fetch(path) for path in paths)))
+    return time.perf_counter() - started, errors
+
+
+def compare(dataset, requests=200, concurrency=8, seed=None):
+    """Requests per second for each hot read path through one WSGI and one ASGI worker.
+
+    The ASGI worker serves both the sync view (which Django runs in a thread)
+    and its /api/async/ twin; twin_speedup compares those two, which is the
+    choice an ASGI deployment actually makes. Every side replays the same
+    request paths, and the first pass of each warms the caches so none pays for
+    the cold build alone.
+    """
+    ctx = BenchContext(dataset, seed=seed)
+    ids = {
+        'blogs': list(Blog.objects.values_list('id', flat=True)) or [0],
+        'attempts': list(QuizAttempt.objects.values_list('id', flat=True)) or [0],
+    }
+    results = {}
+    for name, make_path in ENDPOINTS.items():
+        if name == 'view_therapist_profile' and not dataset.therapist_ids:
+            continue
+        paths = [make_path(ctx, ids) for _ in range(requests)]
+        twin_paths = [async_path(path) for path in paths]
+        _serve_wsgi(paths[:3])
+        wsgi_seconds, wsgi_errors = _serve_wsgi(paths)
+        asyncio.run(_serve_asgi(paths[:3], concurrency))
+        sync_seconds, sync_errors = asyncio.run(_serve_asgi(paths, concurrency))
+        asyncio.run(_serve_asgi(twin_paths[:3], concurrency))
+        asgi_seconds, asgi_errors = asyncio.run(_serve_asgi(twin_paths, concurrency))
+        wsgi_rps = requests / wsgi_seconds if wsgi_seconds else 0
+        sync_rps = requests / sync_seconds if sync_seconds else 0
+        asgi_rps = requests / asgi_seconds if asgi_seconds else 0
+        results[name] = {
+            'requests': requests,
+            'concurrency': concurrency,
+            'wsgi_rps': round(wsgi_rps, 1),
+            'asgi_sync_rps': round(sync_rps, 1),
+            'asgi_rps': round(asgi_rps, 1),
+            'speedup': round(asgi_rps / wsgi_rps, 2) if wsgi_rps else 0,
+            'twin_speedup': round(asgi_rps / sync_rps, 2) if sync_rps else 0,
+            'errors': wsgi_errors + sync_errors + asgi_errors,
+        }
+    return results
@@ -0,0 +1,203 @@
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from functools import cache
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from account.models import Admin, Customer, Hospital, Therapist, UserAuth
+from blog.models import Blog
+from quiz.models import Quiz, QuizAnswer, QuizAttempt, QuizQuestion, QuizResultRange
+from therapy.models import Appointment
+
+SPECIALIZATIONS = ['Psychiatrist', 'Psychologist', 'Counselor', 'Child Psychologist', 'Addiction Specialist']
+GENDERS = ['male', 'female', 'no choice']
+FIRST_NAMES = ['Ayesha', 'Rahim', 'Nusrat', 'Karim', 'Farhana', 'Tanvir', 'Sadia', 'Imran', 'Mitu', 'Arif']
+LAST_NAMES = ['Ahmed', 'Hossain', 'Rahman', 'Islam', 'Chowdhury', 'Khan', 'Akter', 'Sarkar']
+TITLE_WORDS = ['anxiety', 'sleep', 'recovery', 'stress', 'mindfulness', 'grief', 'focus', 'healing', 'habits']
+
+PASSWORD = 'bench-pass'
+CHUNK_SIZE = 1000
+
+
+@cache
+def password_hash():
+    # Hashed once per process: every generated account shares the same stored hash
+    return make_password(PASSWORD)
+
+
+@dataclass
+class Dataset:
+    """Ids and credentials of generated rows, used by the scenarios."""
+    seed: int
+    counts: dict = field(default_factory=dict)
+    hospital_ids: list = field(default_factory=list)
+    therapist_ids: list = field(default_factory=list)
+    therapist_hospitals: dict = field(default_factory=dict)
+    customer_ids: list = field(default_factory=list)
+    quiz_id: int = None
+    question_ids: list = field(default_factory=list)
+    # (email, role) -> UserAuth id
+    auth_ids: dict = field(default_factory=dict)
+    customer_emails: list = field(default_factory=list)
+    therapist_emails: list = field(default_factory=list)
+    admin_emails: list = field(default_factory=list)
+
+
+def _name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _auth_rows(objects, role):
+    return [UserAuth(**{role: obj}, user_role=role) for obj in objects]
+
+
+@transaction.atomic
+def generate(hospitals=20, therapists=200, customers=1000, appointments=5000, blogs=500,
+             quiz_questions=10, quiz_attempts=200, admins=1, blacklisted_tokens=0, seed=1):
+    """Populate the current database with a reproducible synthetic dataset."""
+    rng = random.Random(seed)
+    dataset = Dataset(seed=seed)
+
+    hospital_objs = Hospital.objects.bulk_create(
+        [Hospital(name=f'{rng.choice(LAST_NAMES)} Hospital {i}', address=f'Road {i}, Dhaka') for i in range(hospitals)],
+        batch_size=CHUNK_SIZE,
+    )
+    dataset.hospital_ids = [h.id for h in hospital_objs]
+
+    therapist_objs = Therapist.objects.bulk_create(
+        [
+            Therapist(
+                therapist_name=_name(rng),
+                therapist_email=f'therapist{i}@bench.local',
+                therapist_phone=f'01{i:09d}',
+                year_of_experience=rng.randint(1, 35),
+                therapist_specialization=rng.choice(SPECIALIZATIONS),
+                therapist_qualification='MBBS, MD',
+                therapist_password=password_hash(),
+                therapist_gender=rng.choice(GENDERS),
+            )
+            for i in range(therapists)
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+    dataset.therapist_ids = [t.id for t in therapist_objs]
+    dataset.therapist_emails = [t.therapist_email for t in therapist_objs]
+
+    through = Therapist.hospital.through
+    links = []
+    therapist_hospitals = dataset.therapist_hospitals
+    for therapist in therapist_objs:
+        picked = rng.sample(dataset.hospital_ids, min(len(dataset.hospital_ids), rng.randint(1, 3)))
+        therapist_hospitals[therapist.id] = picked
+        links.extend(through(therapist_id=therapist.id, hospital_id=h) for h in picked)
+    through.objects.bulk_create(links, batch_size=CHUNK_SIZE)
+
+    customer_objs = Customer.objects.bulk_create(
+        [
+            Customer(
+                customer_name=_name(rng),
+                customer_email=f'customer{i}@bench.local',
+                customer_phone=f'01{i:09d}',
+                customer_age=rng.randint(16, 80),
+                customer_password=password_hash(),
+                customer_gender=rng.choice(GENDERS),
+            )
+            for i in range(customers)
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+    dataset.customer_ids = [c.id for c in customer_objs]
+    dataset.customer_emails = [c.customer_email for c in customer_objs]
+
+    admin_objs = Admin.objects.bulk_create(
+        [Admin(admin_name=f'Admin {i}', admin_email=f'admin{i}@bench.local', admin_password=password_hash()) for i in range(admins)]
+    )
+    dataset.admin_emails = [a.admin_email for a in admin_objs]
+
+    auth_objs = UserAuth.objects.bulk_create(
+        _auth_rows(customer_objs, 'customer')
+        + _auth_rows(therapist_objs, 'therapist')
+        + _auth_rows(admin_objs, 'admin'),
+        batch_size=CHUNK_SIZE,
+    )
+    dataset.auth_ids = {(a.user_email, a.user_role): a.id for a in auth_objs}
+
+    if customer_objs and therapist_objs:
+        today = date.today()
+        rows = []
+        for _ in range(appointments):
+            therapist_id = rng.choice(dataset.therapist_ids)
+            rows.append(Appointment(
+                customer_id=rng.choice(dataset.customer_ids),
+                therapist_id=therapist_id,
+                hospital_id=rng.choice(therapist_hospitals[therapist_id]) if therapist_hospitals[therapist_id] else None,
+                consultation_type=rng.choice(['online', 'offline']),
+                appointment_type=rng.choice(['new patient', 'follow up']),
+                appointment_date=today + timedelta(days=rng.randint(-90, 90)),
+                appointment_time=time(rng.randint(9, 20), rng.choice([0, 15, 30, 45])),
+            ))
+        Appointment.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+
+    author_ids = [dataset.auth_ids[(email, 'therapist')] for email in dataset.therapist_emails]
+    author_ids += [dataset.auth_ids[(email, 'customer')] for email in dataset.customer_emails[:50]]
+    if author_ids:
+        rows = []
+        for _ in range(blogs):
+            title = ' '.join(rng.choice(TITLE_WORDS) for _ in range(4)).capitalize()
+            rows.append(Blog(
+                blog_title=title,
+                blog_content=' '.join(rng.choice(TITLE_WORDS) for _ in range(120)),
+                blog_author_name=_name(rng),
+                blog_author_id=rng.choice(author_ids),
+            ))
+        Blog.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+
+    quiz = Quiz.objects.create(title='Wellbeing check', is_active=True)
+    dataset.quiz_id = quiz.id
+    question_objs = QuizQuestion.objects.bulk_create([
+        QuizQuestion(
+            quiz=quiz, order=i + 1, question_text=f'Question {i + 1}?',
+            option_a='Never', option_b='Sometimes', option_c='Often', option_d='Always',
+            score_a=0, score_b=1, score_c=2, score_d=3,
+        )
+        for i in range(quiz_questions)
+    ])
+    dataset.question_ids = [q.id for q in question_objs]
+    top = quiz_questions * 3
+    QuizResultRange.objects.bulk_create([
+        QuizResultRange(quiz=quiz, min_score=0, max_score=top // 3, result_text='Low'),
+        QuizResultRange(quiz=quiz, min_score=top // 3 + 1, max_score=2 * top // 3, result_text='Moderate'),
+        QuizResultRange(quiz=quiz, min_score=2 * top // 3 + 1, max_score=top, result_text='High'),
+    ])
+
+    if customer_objs:
+        attempts = QuizAttempt.objects.bulk_create([
+            QuizAttempt(customer_id=rng.choice(dataset.customer_ids), quiz=quiz, is_completed=True,
+                        completed_at=datetime.now(), total_score=rng.randint(0, top))
+            for _ in range(quiz_attempts)
+        ], batch_size=CHUNK_SIZE)
+        QuizAnswer.objects.bulk_create([
+            QuizAnswer(attempt=attempt, question=question, chosen_option=rng.choice('abcd'))
+            for attempt in attempts for question in question_objs
+        ], batch_size=CHUNK_SIZE)
+
+    # An aged blacklist: rotated refresh tokens that have not expired yet
+    if blacklisted_tokens:
+        expires = datetime.now() + timedelta(days=30)
+        outstanding = OutstandingToken.objects.bulk_create([
+            OutstandingToken(jti=f'bench-{seed}-{i:x}', token='', created_at=datetime.now(), expires_at=expires)
+            for i in range(blacklisted_tokens)
+        ], batch_size=CHUNK_SIZE)
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=t) for t in outstanding], batch_size=CHUNK_SIZE)
+
+    dataset.counts = {
+        'hospitals': hospitals, 'therapists': therapists, 'customers': customers,
+        'appointments': appointments if customer_objs and therapist_objs else 0,
+        'blogs': blogs if author_ids else 0, 'quiz_questions': quiz_questions,
+        'quiz_attempts': quiz_attempts if customer_objs else 0, 'admins': admins,
+        'blacklisted_tokens': blacklisted_tokens,
+    }
+    return dataset
@@ -0,0 +1,215 @@
+import csv
+import random
+from datetime import date, time, timedelta
+from itertools import islice
+
+from django.db import connection, transaction
+
+from account.models import Customer, Hospital, Therapist, UserAuth
+from account.passwords import hash_many
+from therapy.models import Appointment
+from .data import FIRST_NAMES, GENDERS, LAST_NAMES, SPECIALIZATIONS, password_hash
+
+CHUNK_SIZE = 5000
+
+
+def chunked(rows, size):
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_csv(path):
+    # Streams rows; blank cells become None so nullable columns stay NULL
+    with open(path, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            yield {k: (v if v != '' else None) for k, v in row.items()}
+
+
+def _split(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [part.strip() for part in str(value).split('|') if part.strip()]
+
+
+def sqlite_fast_mode():
+    # Trade durability for speed while bulk loading a throwaway/capacity database
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+            cursor.execute('PRAGMA journal_mode = MEMORY')
+
+
+def _create_auth(objects, role):
+    UserAuth.objects.bulk_create([UserAuth(**{role: obj}, user_role=role) for obj in objects])
+
+
+def _hospital_ids(names):
+    # Rows may reference hospitals by id or by name; keys are always strings
+    names = {str(n) for n in names}
+    mapping = {n: int(n) for n in names if n.isdigit()}
+    by_name = [n for n in names if not n.isdigit()]
+    if by_name:
+        for name, pk in Hospital.objects.filter(name__in=by_name).values_list('name', 'id'):
+            mapping.setdefault(name, pk)
+    return mapping
+
+
+def load_hospitals(rows, chunk_size=CHUNK_SIZE):
+    total = 0
+    for chunk in chunked(rows, chunk_size):
+        with transaction.atomic():
+            Hospital.objects.bulk_create([Hospital(name=r['name'], address=r.get('address') or '') for r in chunk])
+        total += len(chunk)
+    return total
+
+
+def _passwords(chunk):
+    # Rows without a password get the shared benchmark hash; the rest are hashed in parallel
+    given = [r.get('password') for r in chunk]
+    hashed = iter(hash_many([p for p in given if p], keep_hashed=True))
+    return [next(hashed) if p else password_hash() for p in given]
+
+
+def load_customers(rows, chunk_size=CHUNK_SIZE):
+    total = 0
+    for chunk in chunked(rows, chunk_size):
+        hashed = _passwords(chunk)
+        with transaction.atomic():
+            customers = Customer.objects.bulk_create([
+                Customer(
+                    customer_name=r['name'],
+                    customer_email=r['email'],
+                    customer_phone=r.get('phone'),
+                    customer_age=int(r['age']) if r.get('age') else None,
+                    customer_password=password,
+                    customer_gender=r.get('gender') or 'no choice',
+                )
+                for r, password in zip(chunk, hashed)
+            ])
+            _create_auth(customers, 'customer')
+        total += len(chunk)
+    return total
+
+
+def load_therapists(rows, chunk_size=CHUNK_SIZE):
+    total = 0
+    through = Therapist.hospital.through
+    for chunk in chunked(rows, chunk_size):
+        hospitals = [_split(r.get('hospitals')) for r in chunk]
+        mapping = _hospital_ids({h for names in hospitals for h in names})
+        hashed = _passwords(chunk)
+        with transaction.atomic():
+            therapists = Therapist.objects.bulk_create([
+                Therapist(
+                    therapist_name=r['name'],
+                    therapist_email=r['email'],
+                    therapist_phone=r.get('phone'),
+                    year_of_experience=int(r['year_of_experience']) if r.get('year_of_experience') else None,
+                    therapist_specialization=r.get('specialization'),
+                    therapist_qualification=r.get('qualification'),
+                    therapist_password=password,
+                    therapist_gender=r.get('gender') or 'no choice',
+                    therapist_role='therapist',
+                )
+                for r, password in zip(chunk, hashed)
+            ])
+            _create_auth(therapists, 'therapist')
+            through.objects.bulk_create(
+                [
+                    through(therapist_id=t.id, hospital_id=mapping[str(name)])
+                    for t, names in zip(therapists, hospitals)
+                    for name in dict.fromkeys(names) if str(name) in mapping
+                ],
+                ignore_conflicts=True,
+            )
+        total += len(chunk)
+    return total
+
+
+def load_appointments(rows, chunk_size=CHUNK_SIZE):
+    # Customers and therapists are referenced by email and resolved one chunk at a time
+    total = skipped = 0
+    for chunk in chunked(rows, chunk_size):
+        customers = dict(Customer.objects.filter(
+            customer_email__in={r['customer_email'] for r in chunk}).values_list('customer_email', 'id'))
+        therapists = dict(Therapist.objects.filter(
+            therapist_email__in={r['therapist_email'] for r in chunk}).values_list('therapist_email', 'id'))
+        hospitals = _hospital_ids({r['hospital'] for r in chunk if r.get('hospital')})
+        objects = []
+        for r in chunk:
+            customer_id = customers.get(r['customer_email'])
+            therapist_id = therapists.get(r['therapist_email'])
+            if customer_id is None or therapist_id is None:
+                skipped += 1
+                continue
+            objects.append(Appointment(
+                customer_id=customer_id,
+                therapist_id=therapist_id,
+                hospital_id=hospitals.get(str(r['hospital'])) if r.get('hospital') else None,
+                consultation_type=r.get('consultation_type') or 'offline',
+                appointment_type=r.get('appointment_type') or 'new patient',
+                appointment_date=r['appointment_date'],
+                appointment_time=r['appointment_time'],
+            ))
+        with transaction.atomic():
+            Appointment.objects.bulk_create(objects)
+        total += len(objects)
+    return total, skipped
+
+
+# Generated row sources; each yields plain dicts in the same shape as the CSV columns
+
+def generate_hospitals(n, seed=1):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {'name': f'{rng.choice(LAST_NAMES)} Hospital {i}', 'address': f'Road {i}, Dhaka'}
+
+
+def generate_customers(n, seed=1, prefix='customer'):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'email': f'{prefix}{i}@load.local',
+            'phone': f'01{i:09d}',
+            'age': rng.randint(16, 80),
+            'gender': rng.choice(GENDERS),
+        }
+
+
+def generate_therapists(n, hospital_ids, seed=1, prefix='therapist'):
+    rng = random.Random(seed)
+    for i in range(n):
+        picked = rng.sample(hospital_ids, min(len(hospital_ids), rng.randint(1, 3))) if hospital_ids else []
+        yield {
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'email': f'{prefix}{i}@load.local',
+            'phone': f'01{i:09d}',
+            'year_of_experience': rng.randint(1, 35),
+            'specialization': rng.choice(SPECIALIZATIONS),
+            'qualification': 'MBBS, MD',
+            'gender': rng.choice(GENDERS),
+            'hospitals': picked,
+        }
+
+
+def generate_appointments(n, customers, therapists, hospital_ids, seed=1,
+                          customer_prefix='customer', therapist_prefix='therapist'):
+    rng = random.Random(seed)
+    today = date.today()
+    for _ in range(n):
+        yield {
+            'customer_email': f'{customer_prefix}{rng.randrange(customers)}@load.local',
+            'therapist_email': f'{therapist_prefix}{rng.randrange(therapists)}@load.local',
+            'hospital': rng.choice(hospital_ids) if hospital_ids else None,
+            'consultation_type': rng.choice(['online', 'offline']),
+            'appointment_type': rng.choice(['new patient', 'follow up']),
+            'appointment_date': today + timedelta(days=rng.randint(-180, 180)),
+            'appointment_time': time(rng.randint(9, 20), rng.choice([0, 15, 30, 45])),
+        }
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from account.models import Hospital
+from benchmarks import loader
+from therapy import availability
+
+
+class Command(BaseCommand):
+    help = ("Bulk-load hospitals, therapists, customers and appointments, either generated "
+            "or from CSV files, in constant memory.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hospitals', type=int, default=0, help="Number of hospitals to generate.")
+        parser.add_argument('--therapists', type=int, default=0, help="Number of therapists to generate.")
+        parser.add_argument('--customers', type=int, default=0, help="Number of customers to generate.")
+        parser.add_argument('--appointments', type=int, default=0, help="Number of appointments to generate.")
+        parser.add_argument('--hospitals-csv', help="CSV with columns name,address.")
+        parser.add_argument('--therapists-csv',
+                            help="CSV with columns name,email,phone,year_of_experience,specialization,"
+                                 "qualification,gender,password,hospitals (ids or names separated by '|').")
+        parser.add_argument('--customers-csv', help="CSV with columns name,email,phone,age,gender,password.")
+        parser.add_argument('--appointments-csv',
+                            help="CSV with columns customer_email,therapist_email,hospital,consultation_type,"
+                                 "appointment_type,appointment_date,appointment_time.")
+        parser.add_argument('--chunk-size', type=int, default=loader.CHUNK_SIZE)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='', help="Prefix for generated emails, to load several batches.")
+        parser.add_argument('--fast', action='store_true',
+                            help="On SQLite, disable fsync and journal to disk while loading.")
+
+    def handle(self, *args, **options):
+        chunk = options['chunk_size']
+        seed = options['seed']
+        customer_prefix = f"{options['prefix']}customer"
+        therapist_prefix = f"{options['prefix']}therapist"
+        if options['appointments'] and not (options['customers'] and options['therapists']):
+            raise CommandError("Generated appointments need --customers and --therapists in the same run.")
+        if options['fast']:
+            loader.sqlite_fast_mode()
+
+        started = time.perf_counter()
+        total = 0
+
+        if options['hospitals_csv']:
+            total += self._step('hospitals', loader.load_hospitals(loader.read_csv(options['hospitals_csv']), chunk))
+        if options['hospitals']:
+            total += self._step('hospitals', loader.load_hospitals(
+                loader.generate_hospitals(options['hospitals'], seed), chunk))
+        hospital_ids = list(Hospital.objects.values_list('id', flat=True))
+
+        if options['therapists_csv']:
+            total += self._step('therapists', loader.load_therapists(loader.read_csv(options['therapists_csv']), chunk))
+        if options['therapists']:
+            total += self._step('therapists', loader.load_therapists(
+                loader.generate_therapists(options['therapists'], hospital_ids, seed, therapist_prefix), chunk))
+
+        if options['customers_csv']:
+            total += self._step('customers', loader.load_customers(loader.read_csv(options['customers_csv']), chunk))
+        if options['customers']:
+            total += self._step('customers', loader.load_customers(
+                loader.generate_customers(options['customers'], seed, customer_prefix), chunk))
+
+        sources = []
+        if options['appointments_csv']:
+            sources.append(loader.read_csv(options['appointments_csv']))
+        if options['appointments']:
+            sources.append(loader.generate_appointments(
+                options['appointments'], options['customers'], options['therapists'], hospital_ids, seed,
+                customer_prefix, therapist_prefix))
+        for source in sources:
+            loaded, skipped = loader.load_appointments(source, chunk)
+            total += self._step('appointments', loaded)
+            if skipped:
+                self.stdout.write(self.style.WARNING(f"  skipped {skipped} appointments with unknown customer/therapist"))
+        if sources:
+            # bulk_create skips the booking signals that keep next_available_date current
+            availability.refresh()
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed * 60 if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(f"Loaded {total} rows in {elapsed:.1f}s ({rate:,.0f} rows/min)"))
+
+    def _step(self, label, count):
+        self.stdout.write(f"  {label}: {count}")
+        return count
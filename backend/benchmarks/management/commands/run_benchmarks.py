@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import asgi, data, runner, serialization
+from benchmarks.scenarios import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = "Run the headless API benchmark scenarios against a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help="Scenario to run (repeatable). Defaults to all.")
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--hospitals', type=int, default=20)
+        parser.add_argument('--therapists', type=int, default=200)
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--appointments', type=int, default=5000)
+        parser.add_argument('--blogs', type=int, default=500)
+        parser.add_argument('--quiz-questions', type=int, default=10)
+        parser.add_argument('--quiz-attempts', type=int, default=200)
+        parser.add_argument('--blacklisted-tokens', type=int, default=0,
+                            help="Pre-populate the refresh-token blacklist to simulate an aged table.")
+        parser.add_argument('--accept-encoding', default='',
+                            help="Accept-Encoding sent with every request, e.g. 'gzip' or 'br, gzip'.")
+        parser.add_argument('--asgi', action='store_true',
+                            help="Also compare requests/s of the sync views (WSGI and ASGI) and their /api/async/ twins (ASGI).")
+        parser.add_argument('--asgi-requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help="Requests kept in flight by the ASGI worker.")
+        parser.add_argument('--serializers', action='store_true',
+                            help="Also time DRF against the compiled serializers on large lists.")
+        parser.add_argument('--serializer-rows', type=int, default=10000)
+        parser.add_argument('--target', action='append', metavar='SCENARIO=MS',
+                            help="Fail if the scenario's p95 is over MS milliseconds (repeatable), "
+                                 "e.g. --target login_customer=350. Login cost follows LETS_HEAL_PBKDF2_ITERATIONS.")
+        parser.add_argument('--output', help="Write results as JSON to this path.")
+        parser.add_argument('--compare', help="Previous results JSON to check for regressions.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed relative p95 slowdown before flagging a regression.")
+
+    def handle(self, *args, **options):
+        try:
+            targets = runner.parse_targets(options['target'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        unknown = sorted(set(targets) - set(SCENARIOS))
+        if unknown:
+            raise CommandError(f"Unknown target scenario(s): {', '.join(unknown)}")
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            dataset = data.generate(
+                hospitals=options['hospitals'],
+                therapists=options['therapists'],
+                customers=options['customers'],
+                appointments=options['appointments'],
+                blogs=options['blogs'],
+                quiz_questions=options['quiz_questions'],
+                quiz_attempts=options['quiz_attempts'],
+                blacklisted_tokens=options['blacklisted_tokens'],
+                seed=options['seed'],
+            )
+            results = runner.run(
+                dataset,
+                names=options['scenario'],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                accept_encoding=options['accept_encoding'],
+            )
+            if options['asgi']:
+                results['asgi'] = asgi.compare(dataset, requests=options['asgi_requests'],
+                                               concurrency=options['concurrency'])
+            if options['serializers']:
+                results['serializers'] = serialization.compare(rows=options['serializer_rows'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'cpu ms':>9}{'KB':>9}"
+            f"{'ops/s':>9}{'queries':>9}{'errors':>8}")
+        for name, row in results['scenarios'].items():
+            self.stdout.write(
+                f"{name:<28}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                f"{row['cpu_ms_p50']:>9.2f}{row['bytes_p50'] / 1024:>9.1f}"
+                f"{row['ops_per_sec']:>9.1f}{row['queries_p50']:>9}{row['errors']:>8}"
+            )
+
+        if results.get('asgi'):
+            self.stdout.write(f"\n{'endpoint':<28}{'wsgi req/s':>12}{'asgi sync':>11}{'asgi twin':>11}"
+                              f"{'vs wsgi':>9}{'vs sync':>9}{'errors':>8}")
+            for name, row in results['asgi'].items():
+                self.stdout.write(
+                    f"{name:<28}{row['wsgi_rps']:>12.1f}{row['asgi_sync_rps']:>11.1f}{row['asgi_rps']:>11.1f}"
+                    f"{row['speedup']:>9.2f}{row['twin_speedup']:>9.2f}{row['errors']:>8}"
+                )
+
+        if results.get('serializers'):
+            self.stdout.write(f"\n{'serializer':<28}{'rows':>8}{'drf ms':>10}{'compiled ms':>13}{'speedup':>9}{'same':>6}")
+            for name, row in results['serializers'].items():
+                self.stdout.write(
+                    f"{name:<28}{row['rows']:>8}{row['drf_ms']:>10.1f}{row['compiled_ms']:>13.1f}"
+                    f"{row['speedup']:>9.1f}{'yes' if row['identical'] else 'NO':>6}"
+                )
+
+        if options['output']:
+            runner.dump(results, options['output'])
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if targets:
+            missed = runner.check_targets(results, targets)
+            if missed:
+                raise CommandError("Missed p95 targets:\n  " + "\n  ".join(missed))
+            self.stdout.write(self.style.SUCCESS("All p95 targets met."))
+
+        if options['compare']:
+            regressions = runner.compare(results, runner.load(options['compare']), options['tolerance'])
+            if regressions:
+                raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,150 @@
+import json
+import math
+import platform
+import time
+from contextlib import ExitStack
+from datetime import datetime
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.test.utils import override_settings
+
+from Lets_heal.profiling import QueryRecorder
+from .scenarios import SCENARIOS, BenchContext
+
+# Every scenario comes from one client address, so the throttles get limits that are
+# never reached: their checks stay on the measured path without turning into 429s
+UNREACHABLE_RATE = '1000000/min'
+
+
+def percentile(values, q):
+    # Nearest-rank percentile; values need not be sorted
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _failed(result):
+    responses = result if isinstance(result, (list, tuple)) else [result]
+    return any(getattr(r, 'status_code', 200) >= 400 for r in responses)
+
+
+def _drain(result):
+    # Bytes on the wire; streamed bodies are read to the end like a client would
+    total = 0
+    for response in result if isinstance(result, (list, tuple)) else [result]:
+        if getattr(response, 'streaming', False):
+            total += sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            total += len(getattr(response, 'content', b''))
+    return total
+
+
+def run_scenario(func, ctx, iterations=30, warmup=3):
+    for _ in range(warmup):
+        _drain(func(ctx))
+
+    timings, cpu, sizes, queries, errors = [], [], [], [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            start, start_cpu = time.perf_counter(), time.process_time()
+            result = func(ctx)
+            sizes.append(_drain(result))
+            elapsed = time.perf_counter() - start
+            cpu.append((time.process_time() - start_cpu) * 1000)
+        timings.append(elapsed * 1000)
+        queries.append(recorder.count)
+        if _failed(result):
+            errors += 1
+    wall = time.perf_counter() - started
+
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'ops_per_sec': round(iterations / wall, 1) if wall else 0,
+        'mean_ms': round(sum(timings) / len(timings), 3) if timings else 0,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'cpu_ms_p50': round(percentile(cpu, 50), 3),
+        'bytes_p50': percentile(sizes, 50),
+        'queries_p50': percentile(queries, 50),
+        'queries_max': max(queries, default=0),
+    }
+
+
+def run(dataset, names=None, iterations=30, warmup=3, seed=None, accept_encoding=''):
+    ctx = BenchContext(dataset, seed=seed, accept_encoding=accept_encoding)
+    rest_framework = dict(settings.REST_FRAMEWORK)
+    rest_framework['DEFAULT_THROTTLE_RATES'] = {
+        scope: UNREACHABLE_RATE for scope in rest_framework.get('DEFAULT_THROTTLE_RATES', {})}
+    results = {}
+    with override_settings(REST_FRAMEWORK=rest_framework):
+        for name in names or SCENARIOS:
+            results[name] = run_scenario(SCENARIOS[name], ctx, iterations=iterations, warmup=warmup)
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections['default'].vendor,
+            'seed': dataset.seed,
+            'dataset': dataset.counts,
+            'iterations': iterations,
+            'accept_encoding': accept_encoding,
+        },
+        'scenarios': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.25):
+    """Return a list of regression messages of current vs. a previous results file."""
+    regressions = []
+    for name, now in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now['queries_max'] > before['queries_max']:
+            regressions.append(f"{name}: max queries {before['queries_max']} -> {now['queries_max']}")
+    return regressions
+
+
+def check_targets(current, targets):
+    """Messages for scenarios whose p95 is over its target; targets maps scenario name -> ms."""
+    missed = []
+    for name, target_ms in targets.items():
+        row = current['scenarios'].get(name)
+        if row and row['p95_ms'] > target_ms:
+            missed.append(f"{name}: p95 {row['p95_ms']}ms over the {target_ms}ms target")
+    return missed
+
+
+def parse_targets(values):
+    """{'login_customer': 350.0} from ['login_customer=350', ...]."""
+    targets = {}
+    for value in values or ():
+        name, _, ms = value.partition('=')
+        try:
+            targets[name.strip()] = float(ms)
+        except ValueError:
+            raise ValueError(f"Expected SCENARIO=MS, got {value!r}") from None
+    return targets
+
+
+def load(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def dump(results, path):
+    with open(path, 'w') as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
@@ -0,0 +1,185 @@
+import random
+from datetime import date, timedelta
+
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from account.tokens import UserAuthRefreshToken
+
+from .data import FIRST_NAMES, GENDERS, LAST_NAMES, PASSWORD, SPECIALIZATIONS, TITLE_WORDS
+
+# name -> callable(ctx) performing one timed operation and returning its response(s)
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+class BenchContext:
+    def __init__(self, dataset, seed=None, accept_encoding=''):
+        self.dataset = dataset
+        self.rng = random.Random(dataset.seed if seed is None else seed)
+        self.client = Client(HTTP_ACCEPT_ENCODING=accept_encoding) if accept_encoding else Client()
+        self._headers = {}
+
+    def auth_headers(self, email, role):
+        # Mint the same claims as account.views.login, without going through it
+        key = (email, role)
+        if key not in self._headers:
+            refresh = RefreshToken()
+            refresh['user_id'] = self.dataset.auth_ids[key]
+            refresh['email'] = email
+            refresh['role'] = role
+            self._headers[key] = {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+        return self._headers[key]
+
+    def random_customer(self):
+        email = self.rng.choice(self.dataset.customer_emails)
+        return email, self.auth_headers(email, 'customer')
+
+    def random_therapist(self):
+        email = self.rng.choice(self.dataset.therapist_emails)
+        return email, self.auth_headers(email, 'therapist')
+
+    def post_json(self, path, data, **headers):
+        return self.client.post(path, data, content_type='application/json', **headers)
+
+
+def _login(ctx, emails, role):
+    email = ctx.rng.choice(emails)
+    return ctx.post_json('/api/login/', {'email': email, 'password': PASSWORD, 'role': role})
+
+
+@scenario('login_customer')
+def login_customer(ctx):
+    return _login(ctx, ctx.dataset.customer_emails, 'customer')
+
+
+@scenario('login_therapist')
+def login_therapist(ctx):
+    return _login(ctx, ctx.dataset.therapist_emails, 'therapist')
+
+
+@scenario('login_admin')
+def login_admin(ctx):
+    return _login(ctx, ctx.dataset.admin_emails, 'admin')
+
+
+@scenario('token_refresh')
+def token_refresh(ctx):
+    email = ctx.rng.choice(ctx.dataset.customer_emails)
+    refresh = UserAuthRefreshToken()
+    refresh['user_id'] = ctx.dataset.auth_ids[(email, 'customer')]
+    refresh['email'] = email
+    refresh['role'] = 'customer'
+    return ctx.post_json('/api/token/refresh/', {'refresh': str(refresh)})
+
+
+@scenario('search_therapist')
+def search_therapist(ctx):
+    rng = ctx.rng
+    params = {'sort': rng.choice(['name_asc', 'name_desc', 'experience_desc', 'rating_desc', 'soonest'])}
+    mode = rng.randrange(4)
+    if mode == 0:
+        params['search'] = rng.choice(['a', 'ra', 'psych', 'hospital'])
+    elif mode == 1:
+        params['specialty'] = rng.choice(SPECIALIZATIONS)
+    elif mode == 2:
+        params['gender'] = rng.choice(GENDERS)
+    return ctx.client.get('/api/search_therapist/', params)
+
+
+@scenario('therapist_facets')
+def therapist_facets(ctx):
+    rng = ctx.rng
+    params = {}
+    if rng.random() < 0.3:
+        params['search'] = rng.choice(['a', 'ra', 'psych', 'hospital'])
+    if rng.random() < 0.5:
+        params['specialty'] = rng.choice(SPECIALIZATIONS)
+    if rng.random() < 0.5:
+        params['gender'] = rng.choice(GENDERS)
+    return ctx.client.get('/api/therapist_facets/', params)
+
+
+@scenario('autocomplete')
+def autocomplete(ctx):
+    word = ctx.rng.choice(FIRST_NAMES + LAST_NAMES + SPECIALIZATIONS)
+    return ctx.client.get('/api/autocomplete/', {'q': word[:ctx.rng.randint(1, 4)]})
+
+
+@scenario('book_appointment')
+def book_appointment(ctx):
+    rng = ctx.rng
+    _, headers = ctx.random_customer()
+    therapist_id = rng.choice(ctx.dataset.therapist_ids)
+    hospitals = ctx.dataset.therapist_hospitals.get(therapist_id) or ctx.dataset.hospital_ids
+    payload = {
+        'appointment_type': 'new patient',
+        'consultation_type': rng.choice(['online', 'offline']),
+        'appointment_date': (date.today() + timedelta(days=rng.randint(100, 400))).isoformat(),
+        'appointment_time': f'{rng.randint(9, 20):02d}:{rng.choice([0, 30]):02d}',
+        'hospital': rng.choice(hospitals),
+    }
+    return ctx.post_json(f'/api/book_appointment/{therapist_id}/', payload, **headers)
+
+
+@scenario('customer_current_history')
+def customer_current_history(ctx):
+    _, headers = ctx.random_customer()
+    return ctx.client.get('/api/customer_appointment_current_history/', **headers)
+
+
+@scenario('customer_prev_history')
+def customer_prev_history(ctx):
+    _, headers = ctx.random_customer()
+    return ctx.client.get('/api/customer_appointment_prev_history/', **headers)
+
+
+@scenario('therapist_current_history')
+def therapist_current_history(ctx):
+    _, headers = ctx.random_therapist()
+    return ctx.client.get('/api/therapist_appointment_current_history/', **headers)
+
+
+@scenario('therapist_prev_history')
+def therapist_prev_history(ctx):
+    _, headers = ctx.random_therapist()
+    return ctx.client.get('/api/therapist_appointment_prev_history/', **headers)
+
+
+@scenario('quiz_flow')
+def quiz_flow(ctx):
+    # start -> (next question, answer)* -> finish, timed as one operation
+    i = ctx.rng.randrange(len(ctx.dataset.customer_ids))
+    headers = ctx.auth_headers(ctx.dataset.customer_emails[i], 'customer')
+    customer_id = ctx.dataset.customer_ids[i]
+    response = ctx.post_json('/api/start_quiz_attempt/', {'customer_id': customer_id}, **headers)
+    responses = [response]
+    if response.status_code >= 400:
+        return responses
+    attempt_id = response.json()['id']
+    while True:
+        response = ctx.client.get(f'/api/get_next_question/{attempt_id}/')
+        responses.append(response)
+        body = response.json()
+        if response.status_code >= 400 or body.get('done'):
+            break
+        responses.append(ctx.post_json(
+            f'/api/submit_answer/{attempt_id}/',
+            {'question_id': body['id'], 'chosen_option': ctx.rng.choice('abcd')},
+        ))
+    responses.append(ctx.post_json(f'/api/finish_attempt/{attempt_id}/', {}))
+    return responses
+
+
+@scenario('search_blog')
+def search_blog(ctx):
+    params = {}
+    if ctx.rng.random() < 0.7:
+        params['search'] = ctx.rng.choice(TITLE_WORDS)
+    return ctx.client.get('/api/search_blog/', params)
@@ -0,0 +1,103 @@
+import random
+import time
+
+from django.db import transaction
+
+from account.models import Hospital, Therapist
+from account.serializers import TherapistSerializer
+from blog.models import Blog
+from blog.serializers import BlogSerializer
+from Lets_heal.compiled import compiled
+from quiz.models import Quiz, QuizQuestion
+from quiz.serializers import QuizQuestionSerializer
+from therapy.models import Appointment
+from therapy.serializers import AppointmentSerializer
+from . import loader
+from .data import CHUNK_SIZE, TITLE_WORDS
+
+# Email prefix of the rows fill() adds, so they never collide with the generated dataset
+PREFIX = 'serializers'
+
+# name -> (serializer, queryset for DRF with the relations it needs preloaded)
+CASES = {
+    'therapist': (TherapistSerializer, lambda: Therapist.objects.prefetch_related('hospital').order_by('id')),
+    'appointment': (AppointmentSerializer, lambda: Appointment.objects.select_related(
+        'customer', 'therapist', 'hospital').prefetch_related('therapist__hospital').order_by('id')),
+    'blog': (BlogSerializer, lambda: Blog.objects.order_by('id')),
+    'quiz_question': (QuizQuestionSerializer, lambda: QuizQuestion.objects.order_by('id')),
+}
+
+
+def _best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def fill(rows, seed=1):
+    """Top every benchmarked table up to `rows` rows.
+
+    Customers, therapists and appointments go through the benchmarks.loader
+    pipeline; blogs and quiz questions, which it has no loader for, are bulk created.
+    """
+    rng = random.Random(seed)
+    if not Hospital.objects.exists():
+        loader.load_hospitals(loader.generate_hospitals(20, seed))
+    hospital_ids = list(Hospital.objects.values_list('id', flat=True))
+
+    missing = rows - Appointment.objects.count()
+    if missing > 0:
+        customers, therapists = max(1, missing // 10), max(1, missing // 50)
+        loader.load_customers(loader.generate_customers(customers, seed, prefix=f'{PREFIX}-customer'))
+        loader.load_therapists(loader.generate_therapists(therapists, hospital_ids, seed, prefix=f'{PREFIX}-therapist'))
+        loader.load_appointments(loader.generate_appointments(
+            missing, customers, therapists, hospital_ids, seed,
+            customer_prefix=f'{PREFIX}-customer', therapist_prefix=f'{PREFIX}-therapist'))
+    missing = rows - Therapist.objects.count()
+    if missing > 0:
+        loader.load_therapists(loader.generate_therapists(missing, hospital_ids, seed, prefix=f'{PREFIX}-extra-therapist'))
+
+    with transaction.atomic():
+        missing = rows - Blog.objects.count()
+        if missing > 0:
+            Blog.objects.bulk_create([
+                Blog(blog_title=' '.join(rng.choice(TITLE_WORDS) for _ in range(4)).capitalize(),
+                     blog_content=' '.join(rng.choice(TITLE_WORDS) for _ in range(120)),
+                     blog_author_name=f'Author {i}')
+                for i in range(missing)
+            ], batch_size=CHUNK_SIZE)
+        missing = rows - QuizQuestion.objects.count()
+        if missing > 0:
+            quiz = Quiz.objects.create(title='Serializer benchmark')
+            QuizQuestion.objects.bulk_create([
+                QuizQuestion(quiz=quiz, order=i + 1, question_text=f'Question {i + 1}?',
+                             option_a='Never', option_b='Sometimes', option_c='Often', option_d='Always',
+                             score_a=0, score_b=1, score_c=2, score_d=3)
+                for i in range(missing)
+            ], batch_size=CHUNK_SIZE)
+
+
+def compare(rows=10000, repeat=3, seed=1):
+    """Milliseconds to serialize `rows` rows with DRF and with the compiled path, queries included.
+
+    The tables are topped up to `rows` rows first (see fill()), so the speedup
+    is measured at the requested size rather than on whatever the dataset holds.
+    """
+    fill(rows, seed)
+    results = {}
+    for name, (serializer_class, queryset) in CASES.items():
+        fast = compiled(serializer_class)
+        drf_ms, expected = _best_of(lambda: serializer_class(queryset()[:rows], many=True).data, repeat)
+        fast_ms, actual = _best_of(lambda: fast.serialize(queryset()[:rows]), repeat)
+        results[name] = {
+            'rows': len(expected),
+            'drf_ms': round(drf_ms, 2),
+            'compiled_ms': round(fast_ms, 2),
+            'speedup': round(drf_ms / fast_ms, 1) if fast_ms else 0,
+            'identical': [dict(row) for row in expected] == actual,
+        }
+    return results
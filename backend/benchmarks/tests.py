@@ -0,0 +1,76 @@
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from account.models import Customer, Hospital, Therapist, UserAuth
+from therapy.models import Appointment
+from . import data, loader, runner, serialization
+from .scenarios import SCENARIOS
+
+
+class PercentileTests(TestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 50), 50)
+        self.assertEqual(runner.percentile(values, 95), 95)
+        self.assertEqual(runner.percentile([], 95), 0)
+
+    def test_compare_flags_slower_p95_and_extra_queries(self):
+        baseline = {'scenarios': {'login': {'p95_ms': 10, 'queries_max': 2}}}
+        current = {'scenarios': {'login': {'p95_ms': 20, 'queries_max': 3}}}
+        self.assertEqual(len(runner.compare(current, baseline)), 2)
+        self.assertEqual(runner.compare(baseline, baseline), [])
+
+    def test_p95_targets(self):
+        targets = runner.parse_targets(['login_customer=300', 'login_admin = 50'])
+        self.assertEqual(targets, {'login_customer': 300.0, 'login_admin': 50.0})
+        current = {'scenarios': {'login_customer': {'p95_ms': 280}, 'login_admin': {'p95_ms': 60}}}
+        self.assertEqual(len(runner.check_targets(current, targets)), 1)
+        with self.assertRaises(ValueError):
+            runner.parse_targets(['login_customer'])
+
+
+class ScenarioTests(TestCase):
+    def test_all_scenarios_run_cleanly_on_small_dataset(self):
+        dataset = data.generate(hospitals=3, therapists=5, customers=10, appointments=30,
+                                blogs=10, quiz_questions=3, quiz_attempts=2)
+        self.assertEqual(Customer.objects.count(), 10)
+        self.assertEqual(Therapist.objects.count(), 5)
+        self.assertEqual(UserAuth.objects.count(), 16)
+
+        results = runner.run(dataset, iterations=2, warmup=0)
+        self.assertEqual(set(results['scenarios']), set(SCENARIOS))
+        for name, row in results['scenarios'].items():
+            self.assertEqual(row['errors'], 0, name)
+
+        for name, row in serialization.compare(rows=50, repeat=1).items():
+            self.assertTrue(row['identical'], name)
+            self.assertEqual(row['rows'], 50, name)
+
+
+class LoaderTests(TestCase):
+    def test_generated_load_links_auth_and_hospitals(self):
+        call_command('load_fixtures', hospitals=3, therapists=7, customers=11, appointments=20,
+                     chunk_size=4, stdout=StringIO())
+        self.assertEqual(Customer.objects.count(), 11)
+        self.assertEqual(UserAuth.objects.filter(user_role='customer').count(), 11)
+        self.assertEqual(UserAuth.objects.filter(user_role='therapist').count(), 7)
+        therapist = Therapist.objects.order_by('id').last()
+        auth = UserAuth.objects.get(therapist=therapist)
+        self.assertEqual((auth.user_role, auth.user_email), ('therapist', therapist.therapist_email))
+        self.assertEqual(Therapist.objects.filter(hospital__isnull=True).count(), 0)
+        self.assertEqual(Appointment.objects.count(), 20)
+
+    def test_csv_rows_reference_hospitals_by_name(self):
+        Hospital.objects.create(name='Square', address='Panthapath')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write('name,email,gender,hospitals\n')
+            fh.write('Dr A,a@example.com,female,Square\n')
+            fh.write('Dr B,b@example.com,,\n')
+        try:
+            self.assertEqual(loader.load_therapists(loader.read_csv(fh.name)), 2)
+        finally:
+            os.unlink(fh.name)
+        self.assertEqual(list(Therapist.objects.get(therapist_email='a@example.com').hospital.values_list('name', flat=True)), ['Square'])
+        self.assertEqual(Therapist.objects.get(therapist_email='b@example.com').therapist_gender, 'no choice')
@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET
+from rest_framework.request import Request
+
+from account.authentication import aauthenticate
+from Lets_heal.renderers import json_response, list_response, plain_response
+from .models import Blog
+from .serializers import BlogSerializer
+from .views import blog_search_queryset
+
+
+# Async twin of search_blog: list_response's compiled and streaming paths, in one ORM hop
+@require_GET
+async def search_blog(request):
+    response = await sync_to_async(list_response)(Request(request), blog_search_queryset(request.GET), BlogSerializer)
+    return plain_response(response)
+
+
+# Async twin of blog_detail
+@require_GET
+async def blog_detail(request, pk):
+    blog = await Blog.objects.filter(pk=pk).afirst()
+    if blog is None:
+        return json_response({"error": "Blog not found"}, status=404)
+    data = BlogSerializer(blog).data
+    user = await aauthenticate(request)
+    data['is_author'] = user is not None and user.id == blog.blog_author_id
+    return json_response(data)
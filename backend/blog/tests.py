@@ -1,3 +1,31 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from account.models import Customer
+from account.tests import client_for, make_user
+from .models import Blog
 
-# Create your tests here.
+
+class BlogAuthorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _, self.author = make_user(Customer, 'customer', customer_name='A', customer_email='a@example.com', customer_password='pw')
+        _, self.other = make_user(Customer, 'customer', customer_name='B', customer_email='b@example.com', customer_password='pw')
+
+    def check_author_flow(self):
+        client = client_for(self.author)
+        response = client.post('/api/create_blog/', {'blog_title': 'Sleep', 'blog_content': '...'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        blog = Blog.objects.get()
+        self.assertEqual(blog.blog_author_id, self.author.id)
+        self.assertTrue(client.get(f'/api/blog_detail/{blog.id}/').json()['is_author'])
+        self.assertFalse(client_for(self.other).get(f'/api/blog_detail/{blog.id}/').json()['is_author'])
+        self.assertEqual(client_for(self.other).delete(f'/api/delete_blog/{blog.id}/').status_code, 403)
+        self.assertEqual(client.get('/api/get_my_blog/').status_code, 200)
+        self.assertEqual(client.delete(f'/api/delete_blog/{blog.id}/').status_code, 200)
+
+    def test_author_checks_with_database_user(self):
+        self.check_author_flow()
+
+    @override_settings(AUTH_CLAIMS_PRINCIPAL=True)
+    def test_author_checks_with_claims_principal(self):
+        self.check_author_flow()
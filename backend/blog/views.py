@@ -9,25 +9,25 @@ from rest_framework.decorators import permission_classes
 from django.db.models import Q
 from .models import Blog
 from .serializers import BlogSerializer
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from account.authentication import UserAuthJWTAuthentication
+from Lets_heal.renderers import list_response
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def search_blog(request):
-    search_query = request.GET.get('search', '').strip() or request.GET.get('q', '').strip()
+def blog_search_queryset(params):
+    search_query = params.get('search', '').strip() or params.get('q', '').strip()
 
     if search_query:
-        blogs = Blog.objects.filter(Q(blog_title__icontains=search_query) |Q(blog_author_name__icontains=search_query)).order_by('-blog_created_at')
-    else:
-        blogs = Blog.objects.all().order_by('-blog_created_at')
+        return Blog.objects.filter(Q(blog_title__icontains=search_query) |Q(blog_author_name__icontains=search_query)).order_by('-blog_created_at')
+    return Blog.objects.all().order_by('-blog_created_at')
 
-    serializer = BlogSerializer(blogs, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_blog(request):
+    return list_response(request, blog_search_queryset(request.GET), BlogSerializer)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_my_blog(request):
-    blogs = Blog.objects.filter(blog_author=request.user).order_by('-blog_created_at')
+    blogs = Blog.objects.filter(blog_author_id=request.user.id).order_by('-blog_created_at')
     if not blogs.exists():
             return Response({"message": "No blog found"}, status=status.HTTP_404_NOT_FOUND)
     serializer = BlogSerializer(blogs, many=True)
@@ -38,7 +38,7 @@ def get_my_blog(request):
 def create_blog(request):
     serializer = BlogSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(blog_author=request.user)
+        serializer.save(blog_author_id=request.user.id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -55,12 +55,12 @@ def blog_detail(request, pk):
     data = serializer.data
     data['is_author'] = False  # default
 
-    jwt_auth = JWTAuthentication()
+    jwt_auth = UserAuthJWTAuthentication()
     try:
         user_auth_tuple = jwt_auth.authenticate(request)
         if user_auth_tuple is not None:
             user, token = user_auth_tuple
-            if user == blog.blog_author:
+            if user is not None and user.id == blog.blog_author_id:
                 data['is_author'] = True
     except Exception:
         pass
@@ -71,7 +71,7 @@ def blog_detail(request, pk):
 @permission_classes([IsAuthenticated])
 def update_blog(request, pk):
     blog = Blog.objects.get(pk=pk)
-    if blog.blog_author != request.user:
+    if blog.blog_author_id != request.user.id:
         return Response({"error": "You are not authorized to update this blog"}, status=status.HTTP_403_FORBIDDEN)
     serializer = BlogSerializer(blog, data=request.data, partial=True)
     if serializer.is_valid():
@@ -83,7 +83,7 @@ def update_blog(request, pk):
 @permission_classes([IsAuthenticated])
 def delete_blog(request, pk):
     blog = Blog.objects.get(pk=pk)
-    if blog.blog_author != request.user:
+    if blog.blog_author_id != request.user.id:
         return Response({"error": "You are not authorized to delete this blog"}, status=status.HTTP_403_FORBIDDEN)
 
     blog.delete()
@@ -0,0 +1,82 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _serve(batch_size, poll_interval):
+    # Entry point of each worker process; spawned children start without Django set up
+    import django
+    django.setup()
+    from jobs.worker import Worker
+
+    worker = Worker(batch_size, poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs, in several worker processes unless --processes 1 or --once."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOBS_WORKER_PROCESSES,
+                            help="Worker processes, each running one job at a time.")
+        parser.add_argument('--batch-size', type=int, default=settings.JOBS_BATCH_SIZE,
+                            help="Jobs a worker claims per query.")
+        parser.add_argument('--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help="Seconds an idle worker waits before looking for due jobs again.")
+        parser.add_argument('--once', action='store_true',
+                            help="Run the jobs that are due now in this process, then exit (for cron).")
+
+    def handle(self, *args, **options):
+        from jobs.tasks import sync_recurring
+        from jobs.worker import Worker, recover, run_due
+
+        sync_recurring()
+        if options['once']:
+            recover()
+            ran = run_due(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} jobs."))
+            return
+        if options['processes'] <= 1:
+            worker = Worker(options['batch_size'], options['poll_interval'])
+            signal.signal(signal.SIGTERM, worker.stop)
+            signal.signal(signal.SIGINT, worker.stop)
+            worker.run()
+            return
+        self.supervise(options['processes'], options['batch_size'], options['poll_interval'])
+
+    def supervise(self, count, batch_size, poll_interval):
+        # Children must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        stopping = threading.Event()
+
+        def start():
+            process = context.Process(target=_serve, args=(batch_size, poll_interval), daemon=False)
+            process.start()
+            return process
+
+        def stop(*args):
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        processes = [start() for _ in range(count)]
+        self.stdout.write(f"Started {count} job workers.")
+        while not stopping.wait(1):
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    self.stderr.write(f"Job worker {process.pid} exited with {process.exitcode}; restarting.")
+                    processes[i] = start()
+
+        # Each worker finishes the batch it is running before exiting
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        self.stdout.write("Job workers stopped.")
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# task name -> function, filled in by @task as modules are imported
+_tasks = {}
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def task(func=None, *, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register func so it can be queued with enqueue() and run by a worker.
+
+    Arguments are stored as JSON, so pass ids and plain values, not model instances.
+    """
+    def register(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        func.task_name = name
+        func.max_attempts = max_attempts
+        _tasks[name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def resolve(name):
+    """The function registered under name, importing its module if no one has yet."""
+    if name not in _tasks:
+        try:
+            import_module(name.rpartition('.')[0])
+        except ImportError as exc:
+            raise UnknownTask(name) from exc
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise UnknownTask(name) from None
+
+
+def enqueue(func, args=(), kwargs=None, run_at=None, delay=None):
+    """Queue a call of a @task function and return its Job.
+
+    The row is written in the caller's transaction, so a rollback also drops
+    the job and a worker can never pick it up before the data it needs is
+    committed.
+    """
+    if getattr(func, 'task_name', None) not in _tasks:
+        raise UnknownTask(getattr(func, '__qualname__', repr(func)))
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        task=func.task_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at,
+        max_attempts=func.max_attempts,
+    )
+
+
+def sync_recurring(schedule=None):
+    """Make the recurring Job rows match JOBS_RECURRING ({key: (task name, seconds)}).
+
+    Missing entries are created due now, changed ones are updated in place and
+    rows whose key was removed from the setting are deleted. Workers call this
+    on start, so editing the setting and restarting is all it takes.
+    """
+    schedule = settings.JOBS_RECURRING if schedule is None else schedule
+    existing = {job.key: job for job in Job.objects.filter(repeat_every__isnull=False)}
+    for key, (name, every) in schedule.items():
+        func = resolve(name)
+        job = existing.pop(key, None)
+        if job is None:
+            Job.objects.create(task=name, key=key, repeat_every=every, max_attempts=func.max_attempts)
+        elif (job.task, job.repeat_every) != (name, every):
+            Job.objects.filter(id=job.id).update(task=name, repeat_every=every, max_attempts=func.max_attempts)
+    Job.objects.filter(id__in=[job.id for job in existing.values()]).delete()
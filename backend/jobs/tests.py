@@ -0,0 +1,99 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from account.notifications import queue_mass_mail
+from .models import Job
+from .tasks import UnknownTask, enqueue, sync_recurring, task
+from .worker import claim, recover, run_due
+
+calls = []
+
+
+@task(max_attempts=3)
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_due_jobs_run_once(self):
+        enqueue(record, ['now'])
+        later = enqueue(record, ['later'], delay=60)
+        self.assertEqual(run_due(), 1)
+        self.assertEqual(run_due(), 0)
+        self.assertEqual(calls, ['now'])
+        self.assertEqual(Job.objects.get(args=['now']).status, Job.DONE)
+
+        Job.objects.filter(id=later.id).update(run_at=timezone.now())
+        call_command('run_jobs', '--once', stdout=StringIO())
+        self.assertEqual(calls, ['now', 'later'])
+        with self.assertRaises(UnknownTask):
+            enqueue(print)
+
+    def test_claims_do_not_overlap(self):
+        for i in range(5):
+            enqueue(record, [i])
+        first, second = claim(3), claim(3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({job.id for job in first} & {job.id for job in second})
+        self.assertEqual(claim(3), [])
+
+    def test_failures_back_off_then_fail(self):
+        job = enqueue(explode)
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            run_due()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            run_due()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_lost_workers_are_recovered(self):
+        job = enqueue(record, ['x'])
+        claim(1)
+        recover(now=timezone.now() + timedelta(hours=1))
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.QUEUED)
+        run_due()
+        self.assertEqual(calls, ['x'])
+
+    def test_recurring_jobs(self):
+        name = record.task_name
+        with override_settings(JOBS_RECURRING={'tick': (name, 60)}):
+            sync_recurring()
+            sync_recurring()
+        job = Job.objects.get(key='tick')
+        Job.objects.filter(id=job.id).update(args=['tick'])
+        run_due()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 0))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(calls, ['tick'])
+
+        sync_recurring({})
+        self.assertFalse(Job.objects.filter(key='tick').exists())
+
+    def test_mail_is_batched_per_job(self):
+        with patch('account.notifications.MAIL_BATCH_SIZE', 2):
+            queue_mass_mail([('Hi', 'Body', [f'{i}@example.com']) for i in range(5)])
+        self.assertEqual(Job.objects.count(), 3)
+        run_due()
+        self.assertEqual(len(mail.outbox), 5)
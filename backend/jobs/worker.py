@@ -0,0 +1,140 @@
+import logging
+import random
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .tasks import resolve
+
+logger = logging.getLogger(__name__)
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`: exponential, capped, with jitter."""
+    delay = min(settings.JOBS_RETRY_MAX, settings.JOBS_RETRY_BASE * 2 ** max(attempts - 1, 0))
+    # Spread retries of jobs that failed together so they don't all come back at once
+    return delay * random.uniform(0.5, 1)
+
+
+def claim(limit, now=None):
+    """Mark up to `limit` due jobs as running for this caller and return them.
+
+    Databases with SKIP LOCKED pick the rows under FOR UPDATE, so concurrent
+    workers take disjoint batches without waiting on each other. SQLite has no
+    row locks: there the UPDATE only matches rows that are still queued, so a
+    worker that loses the race to the same row simply does not get it back.
+    Either way the claim token identifies which rows this caller won.
+    """
+    now = now or timezone.now()
+    token = uuid.uuid4()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    running = {'status': Job.RUNNING, 'claim': token, 'locked_at': now, 'attempts': F('attempts') + 1}
+    if connections[router.db_for_write(Job)].features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            if not ids:
+                return []
+            Job.objects.filter(id__in=ids).update(**running)
+    else:
+        ids = list(due.values_list('id', flat=True)[:limit])
+        if not ids or not Job.objects.filter(id__in=ids, status=Job.QUEUED).update(**running):
+            return []
+    return list(Job.objects.filter(claim=token).order_by('run_at', 'id'))
+
+
+def _next_run(job, now):
+    # Keep a recurring job on its cadence, skipping the runs it missed
+    next_run = job.run_at + timedelta(seconds=job.repeat_every)
+    return next_run if next_run > now else now + timedelta(seconds=job.repeat_every)
+
+
+def _finish(job, **fields):
+    # Filtered on the claim, so a worker whose lease ran out cannot overwrite the retry
+    return Job.objects.filter(id=job.id, claim=job.claim).update(claim=None, locked_at=None, **fields)
+
+
+def execute(job):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    try:
+        resolve(job.task)(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s (%s) failed on attempt %d", job.id, job.task, job.attempts)
+        if job.attempts < job.max_attempts:
+            _finish(job, status=Job.QUEUED, last_error=error,
+                    run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)))
+        elif job.repeat_every:
+            _finish(job, status=Job.QUEUED, last_error=error, attempts=0, run_at=_next_run(job, timezone.now()))
+        else:
+            _finish(job, status=Job.FAILED, last_error=error, finished_at=timezone.now())
+        return False
+
+    if job.repeat_every:
+        now = timezone.now()
+        _finish(job, status=Job.QUEUED, last_error='', attempts=0, finished_at=now, run_at=_next_run(job, now))
+    else:
+        _finish(job, status=Job.DONE, last_error='', finished_at=timezone.now())
+    return True
+
+
+def recover(now=None):
+    """Requeue jobs whose worker died mid-run and prune old finished jobs."""
+    now = now or timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOBS_LEASE_SECONDS))
+    stale.filter(attempts__lt=F('max_attempts')).update(status=Job.QUEUED, claim=None, locked_at=None)
+    stale.filter(repeat_every__isnull=False).update(status=Job.QUEUED, claim=None, locked_at=None, attempts=0)
+    stale.update(status=Job.FAILED, claim=None, locked_at=None, finished_at=now,
+                 last_error="Worker stopped before the job finished.")
+    Job.objects.filter(status=Job.DONE, finished_at__lt=now - timedelta(days=settings.JOBS_RETENTION_DAYS)).delete()
+
+
+def run_due(batch_size=None):
+    """Run every job that is due now, one batch at a time; returns how many ran."""
+    batch_size = batch_size or settings.JOBS_BATCH_SIZE
+    ran = 0
+    while True:
+        jobs = claim(batch_size)
+        if not jobs:
+            return ran
+        for job in jobs:
+            execute(job)
+        ran += len(jobs)
+
+
+class Worker:
+    """Claims and runs jobs until stop() is called. One per worker process."""
+
+    def __init__(self, batch_size=None, poll_interval=None):
+        self.batch_size = batch_size or settings.JOBS_BATCH_SIZE
+        self.poll_interval = settings.JOBS_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._stop = threading.Event()
+        self._next_recovery = 0
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= self._next_recovery:
+                    recover()
+                    self._next_recovery = time.monotonic() + settings.JOBS_LEASE_SECONDS / 2
+                jobs = claim(self.batch_size)
+            except DatabaseError:
+                # e.g. "database is locked" on SQLite under contention; try again next poll
+                logger.exception("Could not claim jobs")
+                jobs = []
+            for job in jobs:
+                # Finish the batch even when asked to stop, so nothing waits out its lease
+                execute(job)
+            close_old_connections()
+            if not jobs:
+                self._stop.wait(self.poll_interval)
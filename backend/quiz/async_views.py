@@ -0,0 +1,22 @@
+from django.views.decorators.http import require_GET
+
+from Lets_heal.renderers import json_response
+from .models import QuizAnswer, QuizAttempt, QuizQuestion
+from .serializers import QuizQuestionSerializer
+
+
+# Async twin of get_next_question
+@require_GET
+async def get_next_question(request, attempt_id):
+    attempt = await QuizAttempt.objects.filter(id=attempt_id).values('quiz_id', 'is_completed').afirst()
+    if attempt is None:
+        return json_response({"detail": "Not found."}, status=404)
+    if attempt['is_completed']:
+        return json_response({"done": True, "message": "Attempt already completed."})
+
+    answered = QuizAnswer.objects.filter(attempt_id=attempt_id).values('question_id')
+    next_question = await (QuizQuestion.objects.filter(quiz_id=attempt['quiz_id'])
+                           .exclude(id__in=answered).order_by('order').afirst())
+    if not next_question:
+        return json_response({"done": True})
+    return json_response(QuizQuestionSerializer(next_question).data)
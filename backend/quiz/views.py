@@ -6,6 +6,7 @@ from rest_framework.permissions import IsAuthenticated,AllowAny
 from rest_framework.response import Response
 from .models import Quiz, QuizQuestion, QuizResultRange, QuizAttempt, QuizAnswer, Customer
 from .serializers import QuizSerializer, QuizQuestionSerializer, QuizResultRangeSerializer, QuizAttemptSerializer, QuizAnswerSerializer
+from Lets_heal.compiled import serialize_many
 
 
 def get_main_quiz():
@@ -19,8 +20,7 @@ def get_main_quiz():
 def admin_view_all_questions(request):
     quiz = get_main_quiz()
     questions = QuizQuestion.objects.filter(quiz=quiz).order_by('order')
-    serializer = QuizQuestionSerializer(questions, many=True)
-    return Response(serializer.data)
+    return Response(serialize_many(questions, QuizQuestionSerializer))
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
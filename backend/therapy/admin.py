@@ -1,3 +1,3 @@
 from django.contrib import admin
-from .models import Appointment
-admin.site.register([Appointment])
+from .models import Appointment, AppointmentReminder
+admin.site.register([Appointment, AppointmentReminder])
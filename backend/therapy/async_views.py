@@ -0,0 +1,41 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from account.cache import aget_version, asingle_flight, therapist_namespace
+from account.models import Therapist
+from account.serializers import TherapistSerializer
+from Lets_heal.renderers import json_response, plain_response
+from .views import PROFILE_TTL, search_therapist_response, therapist_profile_key
+
+
+# Async twin of search_therapist: the same compiled rows, pagination and streaming
+# rules, with all of its queries made in one hop to the ORM thread
+@require_GET
+async def search_therapist(request):
+    try:
+        response = await sync_to_async(search_therapist_response)(Request(request))
+    except NotFound as exc:
+        return json_response({"detail": str(exc.detail)}, status=exc.status_code)
+    return plain_response(response)
+
+
+# Async twin of view_therapist_profile; shares its cache entries
+@require_GET
+async def view_therapist_profile(request, therapist_id):
+    key = therapist_profile_key(
+        therapist_id,
+        await aget_version(therapist_namespace(therapist_id)),
+        await aget_version('hospitals'),
+    )
+
+    async def build():
+        therapist = await Therapist.objects.prefetch_related('hospital').filter(id=therapist_id).afirst()
+        return dict(TherapistSerializer(therapist).data) if therapist else None
+
+    data = await asingle_flight(key, build, PROFILE_TTL)
+    if data is None:
+        return JsonResponse({"error": "therapist not found"}, status=404)
+    return JsonResponse(data)
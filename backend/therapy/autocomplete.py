@@ -0,0 +1,128 @@
+from bisect import bisect_left
+
+from account.cache import THERAPIST_INDEX, ChangeLogIndex
+from account.models import Hospital, Therapist
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+
+def _tokens(label):
+    # The whole label plus every word in it, so "rah" finds "Dr. Rahman"
+    text = ' '.join((label or '').lower().split())
+    if not text:
+        return []
+    words = text.split(' ')
+    return list(dict.fromkeys([text] + [' '.join(words[i:]) for i in range(1, len(words))]))
+
+
+class Autocomplete(ChangeLogIndex):
+    """Sorted-array prefix index over therapist names, specializations and hospital names.
+
+    keys[i] is a lowercase token and entries[i] the (type, id, label) it points
+    to; a lookup bisects to the first key >= the prefix and walks forward while
+    keys still start with it. Therapist rows are patched in place from the change
+    log in the cache; hospital changes, and reaching INDEX_MAX_AGE, rebuild the arrays.
+    """
+
+    namespace = THERAPIST_INDEX
+
+    def _reset(self):
+        self._keys = []
+        self._entries = []
+        self._therapist_keys = {}     # therapist id -> ([(key, entry)], specialty)
+        self._specialties = {}        # specialty label -> number of therapists
+
+    def _insert(self, key, entry):
+        index = bisect_left(self._keys, key)
+        while index < len(self._keys) and self._keys[index] == key and self._entries[index] < entry:
+            index += 1
+        self._keys.insert(index, key)
+        self._entries.insert(index, entry)
+
+    def _delete(self, key, entry):
+        index = bisect_left(self._keys, key)
+        while index < len(self._keys) and self._keys[index] == key:
+            if self._entries[index] == entry:
+                del self._keys[index]
+                del self._entries[index]
+                return
+            index += 1
+
+    def _add_specialty(self, label):
+        if self._specialties.get(label):
+            self._specialties[label] += 1
+            return
+        self._specialties[label] = 1
+        for key in _tokens(label):
+            self._insert(key, ('specialty', 0, label))
+
+    def _drop_specialty(self, label):
+        self._specialties[label] -= 1
+        if not self._specialties[label]:
+            del self._specialties[label]
+            for key in _tokens(label):
+                self._delete(key, ('specialty', 0, label))
+
+    def _add_therapist(self, pk, name, specialty):
+        entry = ('therapist', pk, name)
+        pairs = [(key, entry) for key in _tokens(name)]
+        for key, _ in pairs:
+            self._insert(key, entry)
+        specialty = (specialty or '').strip()
+        if specialty:
+            self._add_specialty(specialty)
+        self._therapist_keys[pk] = (pairs, specialty)
+
+    def _remove_therapist(self, pk):
+        pairs, specialty = self._therapist_keys.pop(pk, ([], ''))
+        for key, entry in pairs:
+            self._delete(key, entry)
+        if specialty:
+            self._drop_specialty(specialty)
+
+    def _rebuild(self):
+        self._reset()
+        pairs = []
+        for pk, name in Hospital.objects.values_list('id', 'name'):
+            pairs += [(key, ('hospital', pk, name)) for key in _tokens(name)]
+        for pk, name, specialty in Therapist.objects.values_list('id', 'therapist_name', 'therapist_specialization'):
+            entry = ('therapist', pk, name)
+            own = [(key, entry) for key in _tokens(name)]
+            pairs += own
+            specialty = (specialty or '').strip()
+            if specialty:
+                if specialty not in self._specialties:
+                    pairs += [(key, ('specialty', 0, specialty)) for key in _tokens(specialty)]
+                self._specialties[specialty] = self._specialties.get(specialty, 0) + 1
+            self._therapist_keys[pk] = (own, specialty)
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._entries = [entry for _, entry in pairs]
+
+    def _apply(self, changed):
+        rows = {pk: (name, specialty) for pk, name, specialty in Therapist.objects.filter(id__in=changed)
+                .values_list('id', 'therapist_name', 'therapist_specialization')}
+        for pk in changed:
+            self._remove_therapist(pk)
+            if pk in rows:
+                self._add_therapist(pk, *rows[pk])
+
+    def complete(self, prefix, limit=DEFAULT_LIMIT):
+        prefix = ' '.join((prefix or '').lower().split())
+        if not prefix:
+            return []
+        with self._lock:
+            self.sync()
+            results, seen = [], set()
+            index = bisect_left(self._keys, prefix)
+            while index < len(self._keys) and len(results) < limit and self._keys[index].startswith(prefix):
+                kind, pk, label = self._entries[index]
+                if (kind, pk, label) not in seen:
+                    seen.add((kind, pk, label))
+                    results.append({'type': kind, 'id': pk or None, 'label': label})
+                index += 1
+            return results
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+from django.db.models import Count
+
+from account.cache import bump_version, therapist_namespace
+from account.models import Therapist
+from .models import Appointment
+
+DAILY_LIMIT = 80
+
+
+def first_free_date(therapist_id, start):
+    """First date from start on with fewer than DAILY_LIMIT appointments."""
+    full = set(
+        Appointment.objects.filter(therapist_id=therapist_id, appointment_date__gte=start)
+        .values('appointment_date').annotate(n=Count('id')).filter(n__gte=DAILY_LIMIT)
+        .values_list('appointment_date', flat=True)
+    )
+    day = start
+    while day in full:
+        day += timedelta(days=1)
+    return day
+
+
+def _as_date(day):
+    return date.fromisoformat(day) if isinstance(day, str) else day
+
+
+def refresh(therapist_ids=None):
+    """Recompute next_available_date from scratch, e.g. after bulk-loaded appointments."""
+    today = date.today()
+    full = (Appointment.objects.filter(appointment_date__gte=today)
+            .values('therapist_id', 'appointment_date').annotate(n=Count('id')).filter(n__gte=DAILY_LIMIT))
+    if therapist_ids is not None:
+        full = full.filter(therapist_id__in=therapist_ids)
+    busy = {row['therapist_id'] for row in full}
+    stale = Therapist.objects.filter(next_available_date__isnull=False).exclude(id__in=busy)
+    if therapist_ids is not None:
+        stale = stale.filter(id__in=therapist_ids)
+    stale_ids = list(stale.values_list('id', flat=True))
+    stale.update(next_available_date=None)
+    for therapist_id in stale_ids:
+        bump_version(therapist_namespace(therapist_id))
+    for therapist_id in busy:
+        _set(therapist_id, first_free_date(therapist_id, today))
+    return len(busy) + len(stale_ids)
+
+
+def _set(therapist_id, day):
+    Therapist.objects.filter(id=therapist_id).update(next_available_date=day)
+    bump_version(therapist_namespace(therapist_id))
+
+
+# next_available_date is the soonest day with a free slot; NULL or a past date means today
+
+def booking_added(therapist_id, day):
+    day = _as_date(day)
+    current = Therapist.objects.filter(id=therapist_id).values_list('next_available_date', flat=True).first()
+    today = date.today()
+    soonest = max(current, today) if current else today
+    # Only filling up the soonest free day can move it
+    if day != soonest:
+        return
+    if Appointment.objects.filter(therapist_id=therapist_id, appointment_date=day).count() >= DAILY_LIMIT:
+        _set(therapist_id, first_free_date(therapist_id, day + timedelta(days=1)))
+
+
+def booking_removed(therapist_id, day):
+    day = _as_date(day)
+    if day < date.today():
+        return
+    # A freed slot before the stored date makes that day the soonest one
+    if Therapist.objects.filter(id=therapist_id, next_available_date__gt=day).update(next_available_date=day):
+        bump_version(therapist_namespace(therapist_id))
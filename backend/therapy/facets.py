@@ -0,0 +1,161 @@
+from collections import OrderedDict
+
+from account.cache import THERAPIST_INDEX, ChangeLogIndex
+from account.models import Therapist
+
+DIMENSIONS = ('specialty', 'hospital', 'gender')
+# Filter bar placeholders that mean "no filter"
+ANY_VALUES = {'', 'all specialties', 'all hospitals', 'any gender'}
+SEARCH_CACHE_SIZE = 64
+
+
+def _key(value):
+    return (value or '').strip().lower()
+
+
+class FacetIndex(ChangeLogIndex):
+    """In-memory bitmap index of therapists for filter-bar facet counts.
+
+    Every therapist gets a slot; each specialty, hospital and gender value maps to
+    a Python int used as a bitset over those slots, so a facet count is an AND of
+    a few ints plus a popcount. The index catches up with the change log in the
+    cache: changed therapists are reloaded one batch at a time, and a full
+    rebuild happens when the log is incomplete or the index reaches INDEX_MAX_AGE.
+    """
+
+    namespace = THERAPIST_INDEX
+
+    def _reset(self):
+        self._slots = {}          # therapist id -> slot
+        self._rows = []           # slot -> (therapist id, {dimension: keys}, search text) or None
+        self._alive = 0
+        self._bitmaps = {dim: {} for dim in DIMENSIONS}
+        self._labels = {dim: {} for dim in DIMENSIONS}
+        self._searches = OrderedDict()
+
+    # ---- loading -----------------------------------------------------------
+
+    def _load(self, ids=None):
+        therapists = Therapist.objects.order_by('id')
+        if ids is not None:
+            therapists = therapists.filter(id__in=ids)
+        rows = {
+            pk: (name, specialty, gender, [])
+            for pk, name, specialty, gender in therapists.values_list(
+                'id', 'therapist_name', 'therapist_specialization', 'therapist_gender')
+        }
+        links = Therapist.hospital.through.objects.filter(therapist_id__in=rows) if ids is not None \
+            else Therapist.hospital.through.objects.all()
+        for therapist_id, hospital in links.values_list('therapist_id', 'hospital__name'):
+            if therapist_id in rows:
+                rows[therapist_id][3].append(hospital)
+        return rows
+
+    def _add(self, pk, name, specialty, gender, hospitals):
+        slot = len(self._rows)
+        bit = 1 << slot
+        values = {'specialty': [specialty], 'hospital': hospitals, 'gender': [gender]}
+        keys = {}
+        for dim, labels in values.items():
+            keys[dim] = []
+            for label in labels:
+                key = _key(label)
+                if not key:
+                    continue
+                keys[dim].append(key)
+                self._bitmaps[dim][key] = self._bitmaps[dim].get(key, 0) | bit
+                self._labels[dim].setdefault(key, label.strip())
+        text = '\x00'.join(_key(v) for v in [name, specialty, *hospitals])
+        self._slots[pk] = slot
+        self._rows.append((pk, keys, text))
+        self._alive |= bit
+
+    def _remove(self, pk):
+        slot = self._slots.pop(pk, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        _, keys, _ = self._rows[slot]
+        for dim, dim_keys in keys.items():
+            for key in dim_keys:
+                remaining = self._bitmaps[dim][key] & ~bit
+                if remaining:
+                    self._bitmaps[dim][key] = remaining
+                else:
+                    del self._bitmaps[dim][key]
+                    del self._labels[dim][key]
+        self._rows[slot] = None
+        self._alive &= ~bit
+
+    def _rebuild(self):
+        self._reset()
+        for pk, row in self._load().items():
+            self._add(pk, *row)
+
+    def _stale(self):
+        # Too many dead slots from churn: start over compactly
+        return len(self._rows) > 2 * max(len(self._slots), 1000)
+
+    def _apply(self, changed):
+        rows = self._load(changed)
+        for pk in changed:
+            self._remove(pk)
+            if pk in rows:
+                self._add(pk, *rows[pk])
+        self._searches.clear()
+
+    # ---- querying ----------------------------------------------------------
+
+    def _search_bits(self, query):
+        query = _key(query)
+        if not query:
+            return self._alive
+        bits = self._searches.get(query)
+        if bits is None:
+            bits = 0
+            for slot, row in enumerate(self._rows):
+                if row is not None and query in row[2]:
+                    bits |= 1 << slot
+            self._searches[query] = bits
+            if len(self._searches) > SEARCH_CACHE_SIZE:
+                self._searches.popitem(last=False)
+        return bits
+
+    def counts(self, search='', **selected):
+        """Facet counts for the therapists matching search and the selected filters.
+
+        Each dimension is counted with every filter applied except its own, so the
+        filter bar can still show how many therapists the other options would give.
+        """
+        with self._lock:
+            self.sync()
+            base = self._search_bits(search)
+            masks = {}
+            for dim in DIMENSIONS:
+                key = _key(selected.get(dim))
+                if key not in ANY_VALUES:
+                    masks[dim] = self._bitmaps[dim].get(key, 0)
+
+            def without(dim):
+                bits = base
+                for other, mask in masks.items():
+                    if other != dim:
+                        bits &= mask
+                return bits
+
+            result = {}
+            for dim in DIMENSIONS:
+                scope = without(dim)
+                buckets = [
+                    {'value': self._labels[dim][key], 'count': (bits & scope).bit_count()}
+                    for key, bits in self._bitmaps[dim].items()
+                ]
+                result[dim] = sorted(buckets, key=lambda b: (-b['count'], b['value']))
+            total = base
+            for mask in masks.values():
+                total &= mask
+            result['total'] = total.bit_count()
+            return result
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from therapy.availability import refresh
+
+
+class Command(BaseCommand):
+    help = "Recompute every therapist's next available date from booked appointments."
+
+    def handle(self, *args, **options):
+        changed = refresh()
+        self.stdout.write(self.style.SUCCESS(f"Updated next available date for {changed} therapist(s)."))
@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+from django.db import migrations, models
+from django.db.models import Count
+
+DAILY_LIMIT = 80
+
+
+def backfill(apps, schema_editor):
+    Appointment = apps.get_model('therapy', 'Appointment')
+    Therapist = apps.get_model('account', 'Therapist')
+    full = {}
+    rows = (Appointment.objects.filter(appointment_date__gte=date.today())
+            .values('therapist_id', 'appointment_date').annotate(n=Count('id')).filter(n__gte=DAILY_LIMIT))
+    for row in rows:
+        full.setdefault(row['therapist_id'], set()).add(row['appointment_date'])
+    for therapist_id, days in full.items():
+        day = date.today()
+        while day in days:
+            day += timedelta(days=1)
+        Therapist.objects.filter(id=therapist_id).update(next_available_date=day)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0013_therapist_sort_keys'),
+        ('therapy', '0002_remove_appointment_hospital_address_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['therapist', 'appointment_date'], name='appointment_therapist_date_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
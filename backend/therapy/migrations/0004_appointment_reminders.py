@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:53
+
+from datetime import datetime, timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    # Reminders for appointments booked before the scheduler existed
+    Appointment = apps.get_model('therapy', 'Appointment')
+    AppointmentReminder = apps.get_model('therapy', 'AppointmentReminder')
+    now = datetime.now()
+    size = timedelta(seconds=settings.REMINDER_BUCKET_SECONDS)
+    upcoming = (Appointment.objects.filter(appointment_date__gte=now.date())
+                .values_list('id', 'appointment_date', 'appointment_time'))
+    reminders = []
+    for appointment_id, day, at in upcoming.iterator(chunk_size=BATCH_SIZE):
+        start = datetime.combine(day, at)
+        for offset in set(settings.APPOINTMENT_REMINDER_OFFSETS):
+            fire_at = start - timedelta(seconds=offset)
+            if fire_at > now:
+                reminders.append(AppointmentReminder(appointment_id=appointment_id, fire_at=fire_at,
+                                                     bucket=fire_at - (fire_at - datetime.min) % size))
+        if len(reminders) >= BATCH_SIZE:
+            AppointmentReminder.objects.bulk_create(reminders)
+            reminders = []
+    AppointmentReminder.objects.bulk_create(reminders)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('therapy', '0003_appointment_availability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fire_at', models.DateTimeField()),
+                ('bucket', models.DateTimeField()),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='therapy.appointment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='reminder_bucket_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
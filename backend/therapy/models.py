@@ -12,9 +12,28 @@ class Appointment(models.Model):
     appointment_time=models.TimeField(blank=False, null=False)
     hospital = models.ForeignKey(Hospital, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['therapist', 'appointment_date'], name='appointment_therapist_date_idx'),
+        ]
     
     def __str__(self):
         return f"Appointment of {self.customer.customer_name} with {self.therapist.therapist_name}"
 
 
-      
\ No newline at end of file
+class AppointmentReminder(models.Model):
+    """A reminder still to be sent; the row is deleted once it goes out."""
+
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name='reminders')
+    fire_at = models.DateTimeField()
+    # fire_at rounded down to REMINDER_BUCKET_SECONDS; the dispatcher reads whole buckets
+    bucket = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bucket'], name='reminder_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"Reminder for appointment {self.appointment_id} at {self.fire_at}"
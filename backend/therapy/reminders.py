@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.utils import timezone
+
+from jobs.tasks import task
+from .models import AppointmentReminder
+
+REMINDER_SUBJECT = "Appointment reminder"
+
+
+def bucket_for(moment):
+    """moment rounded down to the start of its REMINDER_BUCKET_SECONDS bucket."""
+    size = settings.REMINDER_BUCKET_SECONDS
+    floor = datetime.min if moment.tzinfo is None else datetime.min.replace(tzinfo=moment.tzinfo)
+    return moment - (moment - floor) % timedelta(seconds=size)
+
+
+def starts_at(appointment):
+    return datetime.combine(appointment.appointment_date, appointment.appointment_time)
+
+
+def schedule_reminders(appointment, now=None):
+    """Create the appointment's reminder rows, one per APPOINTMENT_REMINDER_OFFSETS still ahead.
+
+    Cancelling needs nothing extra: deleting the appointment cascades to
+    these rows through the indexed appointment_id column.
+    """
+    now = now or timezone.now()
+    start = starts_at(appointment)
+    fire_times = sorted({start - timedelta(seconds=offset) for offset in settings.APPOINTMENT_REMINDER_OFFSETS})
+    return AppointmentReminder.objects.bulk_create([
+        AppointmentReminder(appointment=appointment, fire_at=fire_at, bucket=bucket_for(fire_at))
+        for fire_at in fire_times if fire_at > now
+    ])
+
+
+def _message(appointment):
+    return (
+        REMINDER_SUBJECT,
+        f"This is a reminder of your appointment with {appointment.therapist.therapist_name} "
+        f"on {appointment.appointment_date} at {appointment.appointment_time}.",
+        settings.DEFAULT_FROM_EMAIL,
+        [appointment.customer.customer_email],
+    )
+
+
+def send_due_reminders(now=None, batch_size=None):
+    """Send the reminders in every bucket up to now's and delete them; returns how many were mailed.
+
+    Only due rows are read, through the bucket index, so the cost follows the
+    number of reminders due rather than the size of the calendar. Each batch of
+    batch_size goes out over the SMTP connection opened for the whole run.
+    Reminders for appointments that have already started (e.g. after the
+    workers were down) are dropped without mailing.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    due = (AppointmentReminder.objects.filter(bucket__lte=bucket_for(now))
+           .select_related('appointment__customer', 'appointment__therapist').order_by('bucket', 'id'))
+    sent = 0
+    with get_connection() as connection:
+        while True:
+            batch = list(due[:batch_size])
+            if not batch:
+                return sent
+            messages = [
+                _message(reminder.appointment) for reminder in batch
+                if starts_at(reminder.appointment) > now and reminder.appointment.customer.customer_email
+            ]
+            if messages:
+                sent += send_mass_mail(messages, fail_silently=False, connection=connection)
+            # Deleted only after sending: a failed batch is retried by the job, not lost
+            AppointmentReminder.objects.filter(id__in=[reminder.id for reminder in batch]).delete()
+
+
+@task
+def dispatch_reminders():
+    """Recurring job (see JOBS_RECURRING) that sends whatever reminders have come due."""
+    send_due_reminders()
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import availability
+from .models import Appointment
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, created, **kwargs):
+    if created:
+        availability.booking_added(instance.therapist_id, instance.appointment_date)
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    availability.booking_removed(instance.therapist_id, instance.appointment_date)
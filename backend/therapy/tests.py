@@ -1,3 +1,372 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from account.cache import single_flight
+from account.models import Customer, Hospital, IdempotencyKey, Review, Therapist, UserAuth
+from jobs.worker import run_due
+from Lets_heal.idempotency import prune_idempotency_keys
+from .availability import DAILY_LIMIT
+from .facets import facet_index
+from .autocomplete import autocomplete
+from . import reminders
+from .models import Appointment, AppointmentReminder
+from .reminders import send_due_reminders
 
 # Create your tests here.
+
+
+def customer_client(name, email):
+    customer = Customer.objects.create(customer_name=name, customer_email=email)
+    user_auth = UserAuth.objects.create(customer=customer, user_role='customer')
+    refresh = RefreshToken()
+    refresh['user_id'] = user_auth.id
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    return customer, client
+
+
+class TherapistProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hospital = Hospital.objects.create(name='Square', address='Panthapath')
+        self.therapist = Therapist.objects.create(therapist_name='Dr. Rahman', therapist_email='t@example.com')
+        self.therapist.hospital.add(self.hospital)
+        self.url = f'/api/view_therapist_profile/{self.therapist.id}/'
+
+    def test_profile_is_served_from_cache(self):
+        self.assertEqual(self.client.get(self.url).json()['hospital'][0]['name'], 'Square')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get('/api/view_therapist_profile/9999/').status_code, 404)
+
+    def test_writes_invalidate(self):
+        self.client.get(self.url)
+        self.therapist.therapist_name = 'Dr. Karim'
+        self.therapist.save()
+        self.assertEqual(self.client.get(self.url).json()['therapist_name'], 'Dr. Karim')
+
+        other = Hospital.objects.create(name='Labaid', address='Dhanmondi')
+        other.therapist.add(self.therapist)
+        self.assertEqual(len(self.client.get(self.url).json()['hospital']), 2)
+
+        self.hospital.name = 'Square Hospital'
+        self.hospital.save()
+        names = {h['name'] for h in self.client.get(self.url).json()['hospital']}
+        self.assertIn('Square Hospital', names)
+
+    def test_single_flight_serves_stale_while_locked(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(single_flight('k', build, ttl=-1), 1)  # stored already expired
+        cache.add('lock:k', 1)  # another worker is recomputing
+        self.assertEqual(single_flight('k', build, ttl=60), 1)
+        self.assertEqual(len(calls), 1)
+        cache.delete('lock:k')
+        self.assertEqual(single_flight('k', build, ttl=60), 2)
+
+
+class ReviewRatingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.therapist = Therapist.objects.create(therapist_name='A', therapist_email='a@example.com')
+        self.other = Therapist.objects.create(therapist_name='B', therapist_email='b@example.com')
+        self.customer, self.client_a = customer_client('C1', 'c1@example.com')
+        _, self.client_b = customer_client('C2', 'c2@example.com')
+
+    def rating(self, therapist):
+        therapist.refresh_from_db()
+        return therapist.rating_count, therapist.rating_sum, therapist.rating_avg
+
+    def test_create_update_delete_keep_aggregates(self):
+        url = f'/api/submit_review/{self.therapist.id}/'
+        self.assertEqual(self.client_a.post(url, {'review_rating': 5}).status_code, 201)
+        self.assertEqual(self.client_b.post(url, {'review_rating': 2}).status_code, 201)
+        self.assertEqual(self.rating(self.therapist), (2, 7, 3.5))
+
+        self.assertEqual(self.client_a.post(url, {'review_rating': 3}).status_code, 200)
+        self.assertEqual(self.rating(self.therapist), (2, 5, 2.5))
+        self.assertEqual(self.client_a.post(url, {'review_rating': 9}).status_code, 400)
+
+        body = self.client.get(f'/api/therapist_reviews/{self.therapist.id}/').json()
+        self.assertEqual((body['rating_count'], len(body['results'])), (2, 2))
+        self.assertEqual(self.client.get(f'/api/view_therapist_profile/{self.therapist.id}/').json()['rating_avg'], 2.5)
+
+        review = Review.objects.get(customer=self.customer)
+        self.assertEqual(self.client_b.delete(f'/api/delete_review/{review.id}/').status_code, 403)
+        self.assertEqual(self.client_a.delete(f'/api/delete_review/{review.id}/').status_code, 204)
+        self.assertEqual(self.rating(self.therapist), (1, 2, 2.0))
+        self.assertEqual(self.client.get(f'/api/view_therapist_profile/{self.therapist.id}/').json()['rating_avg'], 2.0)
+
+    def test_concurrent_first_reviews_become_one(self):
+        url = f'/api/submit_review/{self.therapist.id}/'
+        self.client_a.post(url, {'review_rating': 5})
+        select_for_update = Review.objects.select_for_update
+        lookups = []
+
+        def racing(*args, **kwargs):
+            # The first lookup runs before the other submit's row exists
+            lookups.append(1)
+            return Review.objects.none() if len(lookups) == 1 else select_for_update(*args, **kwargs)
+
+        with patch.object(Review.objects, 'select_for_update', side_effect=racing):
+            self.assertEqual(self.client_a.post(url, {'review_rating': 3}).status_code, 200)
+        self.assertEqual(Review.objects.filter(customer=self.customer).count(), 1)
+        self.assertEqual(self.rating(self.therapist), (1, 3, 3.0))
+
+    def test_rating_sort(self):
+        Review.objects.create(customer=self.customer, therapist=self.other, review_rating=4)
+        names = [t['therapist_name'] for t in self.client.get('/api/search_therapist/', {'sort': 'rating_desc'}).json()]
+        self.assertEqual(names, ['B', 'A'])
+
+    def test_reconcile_repairs_drift(self):
+        Review.objects.create(customer=self.customer, therapist=self.therapist, review_rating=4)
+        Review.objects.filter(therapist=self.therapist).update(review_rating=1)  # skips signals
+        Therapist.objects.filter(id=self.other.id).update(rating_count=3, rating_sum=9, rating_avg=3)
+
+        out = StringIO()
+        call_command('reconcile_ratings', '--dry-run', stdout=out)
+        self.assertIn('Found 2', out.getvalue())
+        call_command('reconcile_ratings', stdout=StringIO())
+        self.assertEqual(self.rating(self.therapist), (1, 1, 1.0))
+        self.assertEqual(self.rating(self.other), (0, 0, 0.0))
+
+
+class TherapistSortTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.junior = Therapist.objects.create(therapist_name='Junior', therapist_email='j@example.com', year_of_experience=2)
+        self.senior = Therapist.objects.create(therapist_name='Senior', therapist_email='s@example.com', year_of_experience=20)
+        self.customer, _ = customer_client('C', 'c@example.com')
+
+    def names(self, **params):
+        return [t['therapist_name'] for t in self.client.get('/api/search_therapist/', params).json()]
+
+    def test_experience_and_pagination(self):
+        self.assertEqual(self.names(sort='experience_desc'), ['Senior', 'Junior'])
+        body = self.client.get('/api/search_therapist/', {'sort': 'experience_desc', 'page_size': 1}).json()
+        self.assertEqual((body['count'], len(body['results'])), (2, 1))
+        self.assertIsNotNone(body['next'])
+        with patch('therapy.views.compiled', return_value=None):
+            self.assertEqual(self.client.get('/api/search_therapist/', {'sort': 'experience_desc', 'page_size': 1}).json(), body)
+
+    def test_soonest_follows_bookings_and_cancellations(self):
+        today = date.today()
+        Appointment.objects.bulk_create([
+            Appointment(customer=self.customer, therapist=self.senior, consultation_type='online',
+                        appointment_type='new patient', appointment_date=today, appointment_time=time(10))
+            for _ in range(DAILY_LIMIT - 1)
+        ])
+        last = Appointment.objects.create(customer=self.customer, therapist=self.senior, consultation_type='online',
+                                          appointment_type='new patient', appointment_date=today, appointment_time=time(11))
+        self.senior.refresh_from_db()
+        self.assertEqual(self.senior.next_available_date, today + timedelta(days=1))
+        self.assertEqual(self.names(sort='soonest'), ['Junior', 'Senior'])
+
+        last.delete()
+        self.senior.refresh_from_db()
+        self.assertEqual(self.senior.next_available_date, today)
+
+        Therapist.objects.filter(id=self.junior.id).update(next_available_date=today + timedelta(days=5))
+        call_command('refresh_availability', stdout=StringIO())
+        self.junior.refresh_from_db()
+        self.assertIsNone(self.junior.next_available_date)
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        facet_index._version = None
+        self.square = Hospital.objects.create(name='Square', address='Panthapath')
+        self.labaid = Hospital.objects.create(name='Labaid', address='Dhanmondi')
+        a = Therapist.objects.create(therapist_name='Anika', therapist_email='a@example.com',
+                                     therapist_specialization='Psychiatrist', therapist_gender='female')
+        b = Therapist.objects.create(therapist_name='Bashir', therapist_email='b@example.com',
+                                     therapist_specialization='Psychologist', therapist_gender='male')
+        c = Therapist.objects.create(therapist_name='Chaity', therapist_email='c@example.com',
+                                     therapist_specialization='Psychologist', therapist_gender='female')
+        a.hospital.add(self.square)
+        b.hospital.add(self.square, self.labaid)
+        c.hospital.add(self.labaid)
+        self.c = c
+
+    def facets(self, **params):
+        body = self.client.get('/api/therapist_facets/', params).json()
+        return body['total'], {dim: {b['value']: b['count'] for b in body[dim]} for dim in ('specialty', 'hospital', 'gender')}
+
+    def test_counts_exclude_own_dimension(self):
+        total, facets = self.facets(gender='female', hospital='All Hospitals')
+        self.assertEqual(total, 2)
+        self.assertEqual(facets['gender'], {'female': 2, 'male': 1})
+        self.assertEqual(facets['specialty'], {'Psychiatrist': 1, 'Psychologist': 1})
+        self.assertEqual(self.facets(search='labaid')[0], 2)
+
+    def test_follows_changes_incrementally(self):
+        self.facets()
+        with self.assertNumQueries(0):
+            self.facets(hospital='square')
+        self.c.hospital.add(self.square)
+        self.assertEqual(self.facets()[1]['hospital'], {'Square': 3, 'Labaid': 2})
+        self.c.delete()
+        total, facets = self.facets()
+        self.assertEqual((total, facets['hospital']), (2, {'Square': 2, 'Labaid': 1}))
+        self.square.name = 'Square Hospital'
+        self.square.save()
+        self.assertIn('Square Hospital', self.facets()[1]['hospital'])
+
+    def test_rebuilds_after_max_age(self):
+        self.facets()
+        # A change made by another worker leaves nothing in this process's change log
+        Therapist.objects.filter(id=self.c.id).update(therapist_gender='male')
+        self.assertEqual(self.facets()[1]['gender'], {'female': 2, 'male': 1})
+        with override_settings(INDEX_MAX_AGE=0):
+            self.assertEqual(self.facets()[1]['gender'], {'female': 1, 'male': 2})
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete._version = None
+        self.square = Hospital.objects.create(name='Square Hospital', address='Panthapath')
+        self.rahman = Therapist.objects.create(therapist_name='Dr. Rahman', therapist_email='r@example.com',
+                                               therapist_specialization='Psychiatrist')
+        Therapist.objects.create(therapist_name='Rashida Akter', therapist_email='a@example.com',
+                                 therapist_specialization='Psychiatrist')
+
+    def labels(self, q, **params):
+        body = self.client.get('/api/autocomplete/', {'q': q, **params}).json()
+        return [(r['type'], r['label']) for r in body['results']]
+
+    def test_prefix_matches_any_word(self):
+        self.assertEqual(self.labels('ra'), [('therapist', 'Dr. Rahman'), ('therapist', 'Rashida Akter')])
+        self.assertEqual(self.labels('psy'), [('specialty', 'Psychiatrist')])
+        self.assertEqual(self.labels('hosp'), [('hospital', 'Square Hospital')])
+        self.assertEqual(len(self.labels('ra', limit=1)), 1)
+        with self.assertNumQueries(0):
+            self.labels('akt')
+
+    def test_refreshes_on_changes(self):
+        self.labels('ra')
+        self.rahman.therapist_name = 'Dr. Karim'
+        self.rahman.therapist_specialization = 'Counsellor'
+        self.rahman.save()
+        self.assertEqual(self.labels('ra'), [('therapist', 'Rashida Akter')])
+        self.assertEqual(self.labels('kar'), [('therapist', 'Dr. Karim')])
+        self.assertEqual(self.labels('coun'), [('specialty', 'Counsellor')])
+        Hospital.objects.create(name='Labaid', address='Dhanmondi')
+        self.assertEqual(self.labels('lab'), [('hospital', 'Labaid')])
+
+    def test_rebuilds_after_max_age(self):
+        self.labels('ra')
+        # Written by another worker: this process's change log never hears of it
+        Hospital.objects.bulk_create([Hospital(name='Labaid', address='Dhanmondi')])
+        self.assertEqual(self.labels('lab'), [])
+        with override_settings(INDEX_MAX_AGE=0):
+            self.assertEqual(self.labels('lab'), [('hospital', 'Labaid')])
+
+
+class IdempotentBookingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer, self.client = customer_client('Nabila', 'n@example.com')
+        hospital = Hospital.objects.create(name='Square', address='Panthapath')
+        self.therapist = Therapist.objects.create(therapist_name='Dr. Rahman', therapist_email='t@example.com')
+        self.url = f'/api/book_appointment/{self.therapist.id}/'
+        self.body = {'appointment_type': 'new patient', 'consultation_type': 'online',
+                     'appointment_date': str(date.today() + timedelta(days=1)), 'appointment_time': '10:00',
+                     'hospital': hospital.id}
+
+    def book(self, key, **changes):
+        return self.client.post(self.url, {**self.body, **changes}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_without_booking_again(self):
+        first = self.book('retry-1')
+        self.assertEqual(first.status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            replay = self.book('retry-1')
+        # Served from the stored response: no capacity COUNT, no insert
+        self.assertFalse([q for q in queries if 'therapy_appointment' in q['sql']])
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Appointment.objects.count(), 1)
+        run_due()
+        self.assertEqual(len(mail.outbox), 1)
+
+        self.assertEqual(self.book('retry-2').status_code, 200)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+    def test_key_misuse(self):
+        self.book('retry-1')
+        self.assertEqual(self.book('retry-1', appointment_time='11:00').status_code, 422)
+        # Another customer's identical key is a separate request
+        _, other = customer_client('Other', 'o@example.com')
+        response = other.post(self.url, self.body, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+        IdempotencyKey.objects.update(status_code=None)  # first attempt still running
+        self.assertEqual(self.book('retry-1').status_code, 409)
+        # A first attempt that never finished gives the key up once its lock expires
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.book('retry-1').status_code, 200)
+        self.assertEqual(Appointment.objects.count(), 3)
+
+        # The other customer's row is still expired
+        prune_idempotency_keys()
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class AppointmentReminderTests(TestCase):
+    def setUp(self):
+        self.customer, self.client = customer_client('Nabila', 'n@example.com')
+        self.hospital = Hospital.objects.create(name='Square', address='Panthapath')
+        self.therapist = Therapist.objects.create(therapist_name='Dr. Rahman', therapist_email='t@example.com')
+        self.day = date.today() + timedelta(days=3)
+
+    def book(self, at='10:00'):
+        response = self.client.post(f'/api/book_appointment/{self.therapist.id}/', {
+            'appointment_type': 'new patient', 'consultation_type': 'online',
+            'appointment_date': str(self.day), 'appointment_time': at, 'hospital': self.hospital.id,
+        }, format='json')
+        return Appointment.objects.get(id=response.json()['data']['id'])
+
+    def test_booking_schedules_and_dispatch_sends_due_buckets(self):
+        appointment = self.book()
+        start = datetime.combine(self.day, time(10))
+        self.assertEqual(sorted(appointment.reminders.values_list('fire_at', flat=True)),
+                         [start - timedelta(hours=24), start - timedelta(hours=1)])
+
+        self.assertEqual(send_due_reminders(now=start - timedelta(hours=30)), 0)
+        with self.assertNumQueries(3):  # due batch, delete, empty batch
+            self.assertEqual(send_due_reminders(now=start - timedelta(hours=24)), 1)
+        self.assertEqual(mail.outbox[-1].to, ['n@example.com'])
+        self.assertIn('Dr. Rahman', mail.outbox[-1].body)
+        self.assertEqual(appointment.reminders.count(), 1)
+
+        # Reminders whose appointment has already started are dropped unsent
+        self.assertEqual(send_due_reminders(now=start + timedelta(minutes=5)), 0)
+        self.assertFalse(AppointmentReminder.objects.exists())
+
+    def test_batches_and_cancellation(self):
+        appointments = [self.book(f'1{i}:00') for i in range(3)]
+        start = datetime.combine(self.day, time(12))
+        with patch('therapy.reminders.send_mass_mail', wraps=reminders.send_mass_mail) as send:
+            self.assertEqual(send_due_reminders(now=start - timedelta(hours=24), batch_size=2), 3)
+        self.assertEqual(send.call_count, 2)
+
+        self.assertEqual(self.client.delete(f'/api/cancel_appointment/{appointments[0].id}/').status_code, 204)
+        self.assertEqual(AppointmentReminder.objects.count(), 2)
@@ -2,32 +2,64 @@ from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from account.models import Customer, Therapist,Hospital
-from account.serializers import TherapistSerializer
+from account.models import Customer, Therapist,Hospital, Review
+from account.serializers import TherapistSerializer, ReviewSerializer
+from account.authentication import is_owner
+from account.cache import get_version, single_flight, therapist_namespace
+from account.pagination import DirectoryPagination
 from rest_framework.permissions import IsAuthenticated ,AllowAny
 from rest_framework.decorators import permission_classes
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
 from .models import Appointment
+from .availability import DAILY_LIMIT
+from .facets import facet_index
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, autocomplete
+from .reminders import schedule_reminders
 from .serializers import AppointmentSerializer
-from django.core.mail import send_mail
-from django.conf import settings
+from account.notifications import queue_mail
 from django.utils import timezone
 from datetime import  timedelta
+from Lets_heal.compiled import compiled, serialize_many
+from Lets_heal.idempotency import idempotent
+from Lets_heal.renderers import list_response
 # Create your views here.
 
-#view therapist list(for admin and customer)
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def search_therapist(request): 
+PROFILE_TTL = 60 * 15
+
+def therapist_profile_key(therapist_id, therapist_version, hospitals_version):
+    # Keyed by the therapist's own version and the hospital directory version,
+    # so profile edits, hospital M2M changes and hospital edits all miss the old entry
+    return f'therapist_profile:{therapist_id}:{therapist_version}:{hospitals_version}'
+
+def cached_therapist_profile(therapist_id):
+    key = therapist_profile_key(therapist_id, get_version(therapist_namespace(therapist_id)), get_version("hospitals"))
+
+    def build():
+        therapist = Therapist.objects.prefetch_related('hospital').filter(id=therapist_id).first()
+        return dict(TherapistSerializer(therapist).data) if therapist else None
+
+    return single_flight(key, build, PROFILE_TTL)
+
+# Each sort mode matches an index on Therapist, with id as the tie-breaker
+SORT_ORDERS = {
+    'name_asc': ('therapist_name',),
+    'name_desc': ('-therapist_name',),
+    'experience_desc': (F('year_of_experience').desc(nulls_last=True), 'id'),
+    'rating_desc': ('-rating_avg', '-rating_count', 'id'),
+    'soonest': (F('next_available_date').asc(nulls_first=True), 'id'),
+}
+
+def therapist_search_queryset(params):
     therapists = Therapist.objects.all().order_by('therapist_name')
-    query = request.GET.get('search', '').strip()
+    query = params.get('search', '').strip()
     if query:
         therapists = therapists.filter(Q(therapist_name__icontains=query) |Q(therapist_specialization__icontains=query) |Q(hospital__name__icontains=query)).distinct()
 
-    specialty = request.GET.get('specialty', '')
-    hospital = request.GET.get('hospital', '')
-    gender = request.GET.get('gender', '')
-    sort_by = request.GET.get('sort', 'name_asc')
+    specialty = params.get('specialty', '')
+    hospital = params.get('hospital', '')
+    gender = params.get('gender', '')
+    sort_by = params.get('sort', 'name_asc')
 
     if specialty and specialty != 'All Specialties':
         therapists = therapists.filter(therapist_specialization__iexact=specialty)
@@ -38,33 +70,49 @@ def search_therapist(request):
     if gender and gender != 'Any Gender':
         therapists = therapists.filter(therapist_gender__iexact=gender)
 
-    if sort_by == 'name_asc':
-        therapists = therapists.order_by('therapist_name')
-    elif sort_by == 'name_desc':
-        therapists = therapists.order_by('-therapist_name')
+    if sort_by in SORT_ORDERS:
+        therapists = therapists.order_by(*SORT_ORDERS[sort_by])
+    return therapists
 
-    if not therapists.exists():
-        return Response({"message": "No therapists found"}, status=status.HTTP_404_NOT_FOUND)
-    serializer = TherapistSerializer(therapists, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+#view therapist list(for admin and customer)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_therapist(request): 
+    return search_therapist_response(request)
+
+def search_therapist_response(request):
+    # Shared with the async twin, which runs it in a single hop to the ORM thread
+    therapists = therapist_search_queryset(request.GET)
+    empty = {"message": "No therapists found"}
+
+    if request.GET.get('page_size'):
+        fast = compiled(TherapistSerializer)
+        paginator = DirectoryPagination()
+        page = paginator.paginate_queryset(therapists if fast is None else fast.rows(therapists), request)
+        if not paginator.page.paginator.count:
+            return Response(empty, status=status.HTTP_404_NOT_FOUND)
+        data = TherapistSerializer(page, many=True).data if fast is None else fast.represent(page)
+        return paginator.get_paginated_response(data)
+    return list_response(request, therapists, TherapistSerializer, empty=empty)
 
 #view therapist details admin,therapist and customer
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def view_therapist_profile(request,therapist_id):
-    therapist=Therapist.objects.get(id=therapist_id)
-    serializer=TherapistSerializer(therapist)
-    return Response(serializer.data,status=status.HTTP_200_OK)
+    data = cached_therapist_profile(therapist_id)
+    if data is None:
+        return Response({"error": "therapist not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(data,status=status.HTTP_200_OK)
 
 #update therapist profile (for therapist)
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def update_therapist_profile(request,therapist_id):
     user = request.user
-    therapist = Therapist.objects.filter(pk=therapist_id).first()
+    therapist = Therapist.objects.select_related('auth').filter(pk=therapist_id).first()
     if not therapist:
         return Response({"error": "therapist not found"}, status=status.HTTP_404_NOT_FOUND)
-    if user.user_role != "therapist" and user.user_email != therapist.therapist_email :
+    if user.user_role != "admin" and not is_owner(user, therapist):
         return Response({"error": "Not authorized to update this profile"}, status=status.HTTP_403_FORBIDDEN)
 
     serializer = TherapistSerializer(therapist, data=request.data, partial=True)
@@ -78,8 +126,8 @@ def update_therapist_profile(request,therapist_id):
 @permission_classes([IsAuthenticated])
 def delete_therapist(request,therapist_id):
     user = request.user
-    therapist = get_object_or_404(Therapist, id=therapist_id)
-    if user.user_role != "admin" and user.user_role != "therapist"  and user.user_email != therapist.therapist_email:
+    therapist = get_object_or_404(Therapist.objects.select_related('auth'), id=therapist_id)
+    if user.user_role != "admin" and not is_owner(user, therapist):
         return Response({"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
     therapist.delete()
     return Response({"message":"Therapist deleted successfully"},status=status.HTTP_204_NO_CONTENT)
@@ -87,13 +135,14 @@ def delete_therapist(request,therapist_id):
 # view for book appointment
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def book_appointment(request, therapist_id):
     user = request.user
     if user.user_role != "customer":
         return Response({"error": "Only customers can book appointment"}, status=status.HTTP_403_FORBIDDEN)
 
     try:
-        customer = Customer.objects.get(customer_email=user.user_email)
+        customer = Customer.objects.get(auth__id=user.id)
     except Customer.DoesNotExist:
         return Response({"error": "Customer not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -110,19 +159,19 @@ def book_appointment(request, therapist_id):
     hospital = get_object_or_404(Hospital, id=hospital_id)
 
     current_appointment = Appointment.objects.filter(therapist=therapist, appointment_date=appointment_date).count()
-    if current_appointment >= 80:
-        return Response({"error": "This therapist has reached the daily limit of 80 patients."}, status=status.HTTP_400_BAD_REQUEST)
+    if current_appointment >= DAILY_LIMIT:
+        return Response({"error": f"This therapist has reached the daily limit of {DAILY_LIMIT} patients."}, status=status.HTTP_400_BAD_REQUEST)
 
     serializer = AppointmentSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(customer=customer, therapist=therapist, hospital=hospital)
-        send_mail(
-            "About appointment booking",
-            "Your appointment is booked successfully!",
-            settings.DEFAULT_FROM_EMAIL,
-            [customer.customer_email],
-            fail_silently=False,
-        )
+        with transaction.atomic():
+            appointment = serializer.save(customer=customer, therapist=therapist, hospital=hospital)
+            schedule_reminders(appointment)
+            queue_mail(
+                "About appointment booking",
+                "Your appointment is booked successfully!",
+                [customer.customer_email],
+            )
         return Response({"message": "Appointment booked successfully!", "data": serializer.data}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -135,7 +184,7 @@ def cancel_appointment(request, appointment_id):
         return Response({"error": "Only customers can cancel appointments"}, status=status.HTTP_403_FORBIDDEN)
 
     try:
-        customer = Customer.objects.get(customer_email=user.user_email)
+        customer = Customer.objects.get(auth__id=user.id)
     except Customer.DoesNotExist:
         return Response({"error": "Customer not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -151,15 +200,14 @@ def cancel_appointment(request, appointment_id):
     if now - appointment.created_at > timedelta(hours=5):
         return Response({"error": "You can only cancel your appointment within 5 hours after booking."}, status=status.HTTP_400_BAD_REQUEST)
 
-    send_mail(
-        "Appointment Cancellation Confirmation",
-        f"Your appointment with {appointment.therapist.therapist_name} on {appointment.appointment_date} at {appointment.appointment_time} has been successfully cancelled.",
-        settings.DEFAULT_FROM_EMAIL,
-        [customer.customer_email],
-        fail_silently=False,
-    )
-
-    appointment.delete()
+    with transaction.atomic():
+        queue_mail(
+            "Appointment Cancellation Confirmation",
+            f"Your appointment with {appointment.therapist.therapist_name} on {appointment.appointment_date} at {appointment.appointment_time} has been successfully cancelled.",
+            [customer.customer_email],
+        )
+        # Its pending reminders are deleted with it by the cascade
+        appointment.delete()
     return Response({"message": "Appointment cancelled successfully."}, status=status.HTTP_204_NO_CONTENT)
 
 # Customer previous booking history
@@ -167,7 +215,7 @@ def cancel_appointment(request, appointment_id):
 @permission_classes([IsAuthenticated])
 def customer_appointment_prev_history(request):
     try:
-        customer = Customer.objects.get(customer_email=request.user.user_email)
+        customer = Customer.objects.get(auth__id=request.user.id)
     except Customer.DoesNotExist:
         return Response({"error": "Customer not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -180,15 +228,14 @@ def customer_appointment_prev_history(request):
         Q(appointment_date__lt=today) | Q(appointment_date=today, appointment_time__lt=current_time)
     ).order_by('-appointment_date', '-appointment_time')
 
-    serializer = AppointmentSerializer(appointments, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(serialize_many(appointments, AppointmentSerializer), status=status.HTTP_200_OK)
 
 # Customer current booking history
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def customer_appointment_current_history(request):
     try:
-        customer = Customer.objects.get(customer_email=request.user.user_email)
+        customer = Customer.objects.get(auth__id=request.user.id)
     except Customer.DoesNotExist:
         return Response({"error": "Customer not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -201,15 +248,14 @@ def customer_appointment_current_history(request):
         Q(appointment_date__gt=today) | Q(appointment_date=today, appointment_time__gte=current_time)
     ).order_by('appointment_date', 'appointment_time')
 
-    serializer = AppointmentSerializer(appointments, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(serialize_many(appointments, AppointmentSerializer), status=status.HTTP_200_OK)
 
 # Therapist previous booking history
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def therapist_appointment_prev_history(request):
     try:
-        therapist = Therapist.objects.get(therapist_email=request.user.user_email)
+        therapist = Therapist.objects.get(auth__id=request.user.id)
     except Therapist.DoesNotExist:
         return Response({"error": "Therapist not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -222,15 +268,14 @@ def therapist_appointment_prev_history(request):
         Q(appointment_date__lt=today) | Q(appointment_date=today, appointment_time__lt=current_time)
     ).order_by('-appointment_date', '-appointment_time')
 
-    serializer = AppointmentSerializer(appointments, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(serialize_many(appointments, AppointmentSerializer), status=status.HTTP_200_OK)
 
 # Therapist current booking history
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def therapist_appointment_current_history(request):
     try:
-        therapist = Therapist.objects.get(therapist_email=request.user.user_email)
+        therapist = Therapist.objects.get(auth__id=request.user.id)
     except Therapist.DoesNotExist:
         return Response({"error": "Therapist not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -243,5 +288,86 @@ def therapist_appointment_current_history(request):
         Q(appointment_date__gt=today) | Q(appointment_date=today, appointment_time__gte=current_time)
     ).order_by('appointment_date', 'appointment_time')
 
-    serializer = AppointmentSerializer(appointments, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(serialize_many(appointments, AppointmentSerializer), status=status.HTTP_200_OK)
+
+# Filter bar counts per specialty, hospital and gender for the current search
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def therapist_facets(request):
+    counts = facet_index.counts(
+        search=request.GET.get('search', ''),
+        specialty=request.GET.get('specialty', ''),
+        hospital=request.GET.get('hospital', ''),
+        gender=request.GET.get('gender', ''),
+    )
+    return Response(counts, status=status.HTTP_200_OK)
+
+# Typeahead suggestions: therapists, specializations and hospitals by prefix
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def autocomplete_search(request):
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    results = autocomplete.complete(request.GET.get('q', ''), limit)
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
+# Submit or update the current customer's review of a therapist
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_review(request, therapist_id):
+    user = request.user
+    if user.user_role != "customer":
+        return Response({"error": "Only customers can review therapists"}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        customer = Customer.objects.get(auth__id=user.id)
+    except Customer.DoesNotExist:
+        return Response({"error": "Customer not found."}, status=status.HTTP_404_NOT_FOUND)
+    therapist = get_object_or_404(Therapist, id=therapist_id)
+
+    # One review per customer and therapist; resubmitting replaces the rating
+    with transaction.atomic():
+        review = Review.objects.select_for_update().filter(customer=customer, therapist=therapist).first()
+        serializer = ReviewSerializer(review, data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                serializer.save(customer=customer, therapist=therapist)
+        except IntegrityError:
+            # A concurrent submit created the review first (the row lock above had
+            # nothing to lock); update that one instead
+            review = Review.objects.select_for_update().get(customer=customer, therapist=therapist)
+            serializer = ReviewSerializer(review, data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(customer=customer, therapist=therapist)
+    return Response({"message": "Review saved.", "data": serializer.data},
+                    status=status.HTTP_200_OK if review else status.HTTP_201_CREATED)
+
+# Reviews of a therapist, newest first
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_therapist_reviews(request, therapist_id):
+    therapist = get_object_or_404(Therapist.objects.only('id', 'rating_count', 'rating_avg'), id=therapist_id)
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    reviews = Review.objects.filter(therapist_id=therapist.id).select_related('customer').order_by('-review_date', '-id')[:limit]
+    return Response({
+        "rating_count": therapist.rating_count,
+        "rating_avg": therapist.rating_avg,
+        "results": ReviewSerializer(reviews, many=True).data,
+    }, status=status.HTTP_200_OK)
+
+# Delete a review (its author or admin)
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def delete_review(request, review_id):
+    user = request.user
+    review = get_object_or_404(Review.objects.select_related('customer__auth'), id=review_id)
+    if user.user_role != "admin" and not is_owner(user, review.customer):
+        return Response({"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
+    review.delete()
+    return Response({"message": "Review deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
@@ -213,6 +213,9 @@ const Filterbar = ({ filters, onFilterChange, therapistCount }) => {
           >
             <option value="name_asc">Name (A-Z)</option>
             <option value="name_desc">Name (Z-A)</option>
+            <option value="experience_desc">Most Experienced</option>
+            <option value="rating_desc">Highest Rated</option>
+            <option value="soonest">Soonest Available</option>
           </select>
         </div>
       </div>